@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+"""
+End to end reads through the TCP bridge stand-in: framing, pacing, retries
+and reconnecting of the network stack against simulated devices, with the
+bridge dropping the connection halfway through.
+
+usage: python benchmarks/bench_bridge.py [reads] [noise_rate] [latency]
+"""
+
+import sys
+import time
+
+import synthetic  # NOQA
+
+from climatetalk.correlator import RequestTimeout
+from climatetalk.mdi.furnace import FurnaceMDI
+from climatetalk.mdi.thermostat import ThermostatMDI
+from climatetalk.network import Network
+from climatetalk.simulator import Thermostat, Furnace
+from climatetalk.simulator.bridge import BridgeServer
+
+
+def main():
+    reads = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    noise_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.005
+
+    bridge = BridgeServer(
+        [Thermostat(0x01), Furnace(0x02)],
+        segment_size=16,
+        latency=latency,
+        jitter=latency,
+        corrupt_rate=noise_rate,
+        noise_rate=noise_rate,
+        seed=0
+    )
+    bridge.start()
+
+    network = Network(*bridge.address, snapshot_ttl=0)
+    nodes = [
+        (ThermostatMDI(network, 0x01, 0x01, None, None), ['heat_setpoint']),
+        (FurnaceMDI(network, 0x02, 0x01, None, None), ['btu_output'])
+    ]
+
+    times = []
+    failed = 0
+    start = time.perf_counter()
+
+    for i in range(reads):
+        if i == reads // 2:
+            bridge.disconnect()
+
+        mdi, names = nodes[i % len(nodes)]
+        started = time.perf_counter()
+
+        try:
+            mdi.read(names)
+        except RequestTimeout:
+            failed += 1
+            continue
+
+        times.append(time.perf_counter() - started)
+
+    elapsed = time.perf_counter() - start
+    network.stop()
+    bridge.stop()
+
+    times.sort()
+    print(
+        '{0} reads in {1:.2f}s, {2} failed, p50 {3:.1f} ms, '
+        'p95 {4:.1f} ms'.format(
+            reads,
+            elapsed,
+            failed,
+            times[len(times) // 2] * 1e3,
+            times[int(len(times) * 0.95)] * 1e3
+        )
+    )
+    print(
+        'segments {0}, bytes skipped by the framer {1}, frames corrupted '
+        '{2}, noise {3}, reconnects {4}'.format(
+            bridge.segments,
+            network.rs485.skipped,
+            bridge.corrupted,
+            bridge.noise,
+            network.reconnects
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
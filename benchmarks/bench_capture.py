@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+"""
+Decoding a capture packet by packet compared to the NumPy bulk decoder,
+including filtering the result down to one message type from one node.
+
+usage: python benchmarks/bench_capture.py [frames] [corruption]
+"""
+
+import sys
+import time
+
+from synthetic import make_capture
+
+from climatetalk import capture
+from climatetalk.framing import find_frames
+from climatetalk.packet import Packet
+
+
+def packet_by_packet(data, message_type, source):
+    frames, _, _ = find_frames(data)
+    packets = [Packet(data[offset:offset + size]) for offset, size in frames]
+
+    return len(packets), [
+        packet for packet in packets
+        if packet.message_type == message_type and packet.source == source
+    ]
+
+
+def bulk(data, message_type, source):
+    records = capture.decode(data)
+    mask = (
+        (records['message_type'] == message_type) &
+        (records['source'] == source)
+    )
+    return len(records), records[mask]
+
+
+def run(name, decode, data):
+    start = time.perf_counter()
+    count, selected = decode(data, 0x82, 0x10)
+    elapsed = time.perf_counter() - start
+
+    print(
+        '{0:<18} {1} frames in {2:.3f}s = {3:.0f} frames/s, '
+        '{4} selected'.format(
+            name, count, elapsed, count / elapsed, len(selected)
+        )
+    )
+
+
+def main():
+    frame_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    corruption = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+
+    data, _ = make_capture(frame_count, corruption)
+    data = bytes(data)
+
+    run('packet by packet', packet_by_packet, data)
+    run('bulk', bulk, data)
+
+
+if __name__ == '__main__':
+    main()
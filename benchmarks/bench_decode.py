@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+"""
+Frames decoded per second by ``Packet(frame)``.
+
+The legacy decoder scanned every packet class for the message type and then
+built a new subclass for every frame. It is reproduced here so the two can
+be compared on the same capture.
+
+usage: python benchmarks/bench_decode.py [frames]
+"""
+
+import gc
+import sys
+import time
+
+from synthetic import make_capture
+
+from climatetalk.framing import find_frames
+from climatetalk.packet import Packet, PACKET_CLASSES
+
+
+def legacy_decode(data):
+    for cl in PACKET_CLASSES:
+        if cl.message_type == data[7]:
+            break
+    else:
+        return Packet(data)
+
+    namespace = dict(
+        _packet_number=data[8],
+        _payload_length=data[9],
+        _payload_data=data[11:-2]
+    )
+    cl = type('DynamicPacket', (cl,), namespace)
+    return cl(data)
+
+
+def run(name, decode, frames):
+    gc.collect()
+    start = time.perf_counter()
+    packets = [decode(frame) for frame in frames]
+    elapsed = time.perf_counter() - start
+
+    classes = len(set(type(packet) for packet in packets))
+
+    print(
+        '{0:<8} {1} frames in {2:.3f}s = {3:.0f} frames/s, '
+        '{4} distinct classes'.format(
+            name, len(frames), elapsed, len(frames) / elapsed, classes
+        )
+    )
+
+
+def main():
+    frame_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    capture, _ = make_capture(frame_count)
+    found, _, _ = find_frames(capture)
+    frames = [capture[offset:offset + size] for offset, size in found]
+
+    run('legacy', legacy_decode, frames)
+    run('current', Packet, frames)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+"""
+Decoding every field of a packet one property at a time compared to a
+single call to ``unpack``.
+
+usage: python benchmarks/bench_fields.py [iterations]
+"""
+
+import sys
+import time
+
+import synthetic  # NOQA
+
+from climatetalk import mac_address, session_id
+from climatetalk.packet import (
+    TokenOfferResponse,
+    NodeDiscoveryResponse,
+    DirectMemoryAccessReadRequest
+)
+
+
+def make_packets():
+    token = TokenOfferResponse()
+    token.pack(
+        payload_address=0x12,
+        payload_subnet=0x02,
+        payload_mac_address=mac_address.MACAddress.create(),
+        payload_session_id=session_id.SessionId.create()
+    )
+
+    discovery = NodeDiscoveryResponse()
+    discovery.pack(
+        payload_node_type=0x01,
+        payload_mac_address=mac_address.MACAddress.create(),
+        payload_session_id=session_id.SessionId.create()
+    )
+
+    read = DirectMemoryAccessReadRequest()
+    read.pack(0x02, 0x00, 30, 2)
+
+    return token, discovery, read
+
+
+# each run is timed this many times and the fastest is reported
+REPEAT = 5
+
+
+def run(name, decode, packet, iterations):
+    elapsed = None
+
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+
+        for _ in range(iterations):
+            decode(packet)
+
+        duration = time.perf_counter() - start
+
+        if elapsed is None or duration < elapsed:
+            elapsed = duration
+
+    print(
+        '{0:<40} {1:.0f} packets/s'.format(name, iterations / elapsed)
+    )
+
+
+def by_property(packet):
+    return tuple(getattr(packet, name) for name in packet.schema.names)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    for packet in make_packets():
+        name = packet.__class__.__name__
+        run(name + ' properties', by_property, packet, iterations)
+        run(name + ' unpack', packet.__class__.unpack, packet, iterations)
+
+
+if __name__ == '__main__':
+    main()
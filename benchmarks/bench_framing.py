@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+"""
+Receive side framing benchmark.
+
+Replays synthetic ClimateTalk frames over a socket pair and measures how
+much CPU time the reader burns per received frame. Frames are either sent
+a byte at a time at (roughly) the byte rate of a 9600 baud bus or in
+bursts the way a TCP RS485 bridge delivers them. The legacy reader, which restarted a busy
+spinning timer thread for every received byte, is reproduced here so the
+two can be compared on the same machine.
+
+The spinning threads hold the GIL long enough to starve the thread that
+reads. The legacy timer then fires in the middle of a frame or after
+several frames and the reader falls behind the sender. To compare the
+same work the legacy reader counts the frames on their length bytes
+whenever its timer fires, and both readers are given the time to read
+every frame that was sent. The sender runs in a process of its own so the
+spinning does not slow it down either.
+
+usage: python benchmarks/bench_framing.py [seconds] [serial|burst]
+"""
+
+import multiprocessing
+import os
+import select
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from climatetalk import rs485, timers  # NOQA
+from climatetalk.checksum import fletcher  # NOQA
+
+
+BYTE_TIME = 10.0 / 9600
+FRAME = bytearray([
+    0x01, 0x03, 0x02, 0x00, 0x00, 0x00, 0x01, 0x02, 0x00, 0x04,
+    0x01, 0x02, 0x03, 0x04, 0x00, 0x00
+])
+FRAME[-2], FRAME[-1] = fletcher(FRAME, 0, len(FRAME) - 2)
+FRAME_GAP = 0.02
+# most seconds a reader gets to catch up once the sender is done
+DRAIN_TIMEOUT = 60.0
+
+
+class SocketSerial(object):
+    """bare minimum of :class:`climatetalk.network.Network` used by RS485"""
+
+    def __init__(self, sock):
+        self.sock = sock
+
+    def recv(self, size=1, timeout=None):
+        if not select.select([self.sock], [], [], timeout)[0]:
+            return b''
+
+        return self.sock.recv(size)
+
+    def recv_into(self, buffer, timeout=None):
+        if not select.select([self.sock], [], [], timeout)[0]:
+            return 0
+
+        return self.sock.recv_into(buffer)
+
+    def write(self, data):
+        self.sock.sendall(data)
+
+
+class LegacyBusyTimer(object):
+
+    def __init__(self, threshold, func):
+        self.threshold = threshold
+        self.func = func
+        self.started = 0
+        self._event = threading.Event()
+
+    def start(self):
+        self._event.set()
+        self._event = event = threading.Event()
+        thread = threading.Thread(target=self._run, args=(event,))
+        thread.daemon = True
+        thread.start()
+        self.started += 1
+
+    def _run(self, event):
+        timer = timers.TimerUS()
+        while timer.elapsed() < self.threshold and not event.is_set():
+            pass
+
+        if not event.is_set():
+            self.func()
+
+
+class LegacyReader(object):
+
+    def __init__(self, serial):
+        self.serial = serial
+        self.packet = bytearray()
+        self.frames = 0
+        self.timer = LegacyBusyTimer(
+            rs485.INTERCHAR_DELAY_THRESHOLD,
+            self._queue_packet
+        )
+        self._event = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+
+    def _queue_packet(self):
+        packet = self.packet
+
+        while len(packet) >= 10 and len(packet) >= packet[9] + 12:
+            del packet[:packet[9] + 12]
+            self.frames += 1
+
+    def _run(self):
+        while not self._event.is_set():
+            char = self.serial.recv(1, 0.5)
+            if char:
+                self.packet += bytearray(char)
+                self.timer.start()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._event.set()
+        self._thread.join()
+
+
+class CurrentReader(object):
+
+    def __init__(self, serial):
+        self.frames = 0
+        self.rs485 = rs485.RS485(serial)
+        self.rs485._queue_packet = self._queue_packet
+
+    def _queue_packet(self, _):
+        self.frames += 1
+
+    def start(self):
+        self.rs485.start()
+
+    def stop(self):
+        thread = self.rs485._thread
+        self.rs485._event.set()
+        if thread is not None:
+            thread.join()
+
+
+def _sender(sock, duration, mode):
+    end = time.time() + duration
+    sent = 0
+
+    while time.time() < end:
+        if mode == 'burst':
+            sock.sendall(FRAME)
+        else:
+            for char in FRAME:
+                sock.sendall(bytearray([char]))
+                time.sleep(BYTE_TIME)
+
+        sent += 1
+        time.sleep(FRAME_GAP)
+
+    return sent
+
+
+def _send_process(sock, duration, mode, result):
+    result.put(_sender(sock, duration, mode))
+
+
+def run(reader_cls, duration, mode):
+    left, right = socket.socketpair()
+    reader = reader_cls(SocketSerial(right))
+
+    reader.start()
+    cpu_start = time.process_time()
+    wall_start = time.time()
+    result = multiprocessing.Queue()
+    sender = multiprocessing.Process(
+        target=_send_process,
+        args=(left, duration, mode, result)
+    )
+    sender.start()
+    sent = result.get()
+    sender.join()
+
+    # the legacy reader falls behind, the CPU time it takes to catch up
+    # is part of the cost
+    deadline = time.time() + DRAIN_TIMEOUT
+    while reader.frames < sent and time.time() < deadline:
+        time.sleep(0.05)
+
+    time.sleep(0.1)
+    cpu = time.process_time() - cpu_start
+    wall = time.time() - wall_start
+    reader.stop()
+
+    left.close()
+    right.close()
+
+    return dict(
+        name=reader_cls.__name__,
+        sent=sent,
+        received=reader.frames,
+        cpu=cpu,
+        wall=wall,
+        threads=getattr(getattr(reader, 'timer', None), 'started', 1)
+    )
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    mode = sys.argv[2] if len(sys.argv) > 2 else 'serial'
+
+    for reader_cls in (LegacyReader, CurrentReader):
+        result = run(reader_cls, duration, mode)
+        result['per_frame'] = (
+            result['cpu'] / max(result['received'], 1) * 1e3
+        )
+        result['load'] = result['cpu'] / result['wall'] * 100
+
+        print(
+            '{name:<14} sent={sent:<6} received={received:<6} '
+            'threads={threads:<7} cpu={cpu:.3f}s ({load:.1f}% of a core) '
+            'cpu/frame={per_frame:.3f}ms'.format(**result)
+        )
+
+
+if __name__ == '__main__':
+    main()
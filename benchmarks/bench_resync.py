@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+"""
+Throughput of the checksum driven framer on a recorded byte stream.
+
+usage: python benchmarks/bench_resync.py [frames] [corruption]
+"""
+
+import sys
+import time
+
+from synthetic import make_capture
+
+from climatetalk.checksum import validate_frames
+from climatetalk.framing import find_frames, ChecksumFramer
+
+
+def main():
+    frame_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    corruption = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+
+    capture, expected = make_capture(frame_count, corruption)
+    megabytes = len(capture) / 1e6
+
+    start = time.perf_counter()
+    frames, _, skipped = find_frames(capture)
+    elapsed = time.perf_counter() - start
+
+    print(
+        'find_frames     {0:.1f} MB in {1:.3f}s = {2:.1f} MB/s, '
+        '{3}/{4} frames, {5} bytes skipped'.format(
+            megabytes, elapsed, megabytes / elapsed,
+            len(frames), expected, skipped
+        )
+    )
+
+    start = time.perf_counter()
+    valid = sum(validate_frames(capture, frames))
+    elapsed = time.perf_counter() - start
+
+    print(
+        'validate_frames {0} frames in {1:.3f}s = {2:.0f} frames/s, '
+        '{3} valid'.format(
+            len(frames), elapsed, len(frames) / elapsed, valid
+        )
+    )
+
+    framer = ChecksumFramer()
+    found = 0
+    start = time.perf_counter()
+
+    # feed the capture the way TCP would deliver it
+    for offset in range(0, len(capture), 1460):
+        found += len(framer.feed(capture[offset:offset + 1460]))
+
+    elapsed = time.perf_counter() - start
+
+    print(
+        'ChecksumFramer  {0:.1f} MB in {1:.3f}s = {2:.1f} MB/s, '
+        '{3}/{4} frames, {5} bytes skipped'.format(
+            megabytes, elapsed, megabytes / elapsed,
+            found, expected, framer.skipped
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
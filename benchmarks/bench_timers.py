@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+"""
+Cost of scheduling, cancelling and firing many concurrent timers on the
+shared timing wheel, next to a heap of deadlines and to threading.Timer.
+
+usage: python benchmarks/bench_timers.py [timers]
+"""
+
+import heapq
+import random
+import sys
+import threading
+import time
+
+import synthetic  # NOQA
+
+from climatetalk.timers import TimingWheel
+
+
+def bench_wheel(count, delays):
+    wheel = TimingWheel()
+    fired = []
+    done = threading.Event()
+
+    def callback():
+        fired.append(None)
+        if len(fired) == count // 2:
+            done.set()
+
+    start = time.perf_counter()
+    timers = [wheel.schedule(delay, callback) for delay in delays]
+    scheduled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for timer in timers[1::2]:
+        timer.cancel()
+    cancelled = time.perf_counter() - start
+
+    wheel.start()
+    started = time.perf_counter()
+    done.wait(max(delays) + 5)
+    elapsed = time.perf_counter() - started
+    wheel.stop()
+
+    return scheduled, cancelled, len(fired), elapsed
+
+
+def bench_heap(count, delays):
+    heap = []
+    entries = []
+
+    start = time.perf_counter()
+    for index, delay in enumerate(delays):
+        entry = [time.perf_counter() + delay, index, True]
+        heapq.heappush(heap, entry)
+        entries.append(entry)
+    scheduled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    # a heap can not remove from the middle, cancelled entries are marked
+    # and skipped when they come up
+    for entry in entries[1::2]:
+        entry[2] = False
+    cancelled = time.perf_counter() - start
+
+    return scheduled, cancelled
+
+
+def bench_threads(count, delays):
+    start = time.perf_counter()
+    timers = [threading.Timer(delay, lambda: None) for delay in delays]
+    for timer in timers:
+        timer.start()
+    scheduled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for timer in timers:
+        timer.cancel()
+    for timer in timers:
+        timer.join()
+    cancelled = time.perf_counter() - start
+
+    return scheduled, cancelled
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    random.seed(0)
+    # a mix of frame gaps, request deadlines, polling ticks and demand
+    # refreshes
+    delays = [
+        random.choice((0.1, 2.0, random.uniform(1, 3), random.uniform(2, 6)))
+        for _ in range(count)
+    ]
+
+    scheduled, cancelled, fired, elapsed = bench_wheel(count, delays)
+    print(
+        'TimingWheel     schedule {0:.2f} us, cancel {1:.2f} us per timer, '
+        '{2} fired in {3:.2f}s'.format(
+            scheduled / count * 1e6,
+            cancelled / (count // 2) * 1e6,
+            fired,
+            elapsed
+        )
+    )
+
+    scheduled, cancelled = bench_heap(count, delays)
+    print(
+        'heapq           schedule {0:.2f} us, cancel {1:.2f} us per timer '
+        '(lazy)'.format(
+            scheduled / count * 1e6,
+            cancelled / (count // 2) * 1e6
+        )
+    )
+
+    # a thread per timer does not get anywhere near 10k on most systems
+    thread_count = min(count, 1000)
+    scheduled, cancelled = bench_threads(thread_count, delays[:thread_count])
+    print(
+        'threading.Timer schedule {0:.2f} us, cancel {1:.2f} us per timer '
+        '({2} timers)'.format(
+            scheduled / thread_count * 1e6,
+            cancelled / thread_count * 1e6,
+            thread_count
+        )
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+"""
+Synthetic bus traffic shared by the benchmarks.
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from climatetalk.checksum import fletcher  # NOQA
+
+# (message type, payload length) pairs seen on a typical bus
+MESSAGE_MIX = (
+    (0x01, 0),
+    (0x81, 30),
+    (0x02, 0),
+    (0x82, 40),
+    (0x03, 3),
+    (0x83, 3),
+    (0x07, 0),
+    (0x87, 12),
+    (0x1D, 4),
+    (0x9D, 16),
+    (0x77, 1),
+    (0xF7, 18),
+)
+
+
+def make_frame(rand, message_type, payload_length):
+    frame = bytearray(payload_length + 12)
+    frame[0] = rand.randint(1, 0xFE)
+    frame[1] = rand.randint(1, 0xFE)
+    frame[2] = 0x02
+    frame[6] = 0x01
+    frame[7] = message_type
+    frame[9] = payload_length
+
+    for i in range(payload_length):
+        frame[10 + i] = rand.randint(0, 0xFF)
+
+    frame[-2], frame[-1] = fletcher(frame, 0, len(frame) - 2)
+    return frame
+
+
+def make_capture(frame_count, corruption=0.0, seed=0):
+    """
+    :param frame_count: number of frames to generate
+    :param corruption: chance of a run of garbage bytes before a frame
+    :param seed: random seed so runs are repeatable
+    :return: (capture, number of good frames)
+    """
+    rand = random.Random(seed)
+    capture = bytearray()
+
+    for _ in range(frame_count):
+        if corruption and rand.random() < corruption:
+            capture += bytearray(
+                rand.randint(0, 0xFF) for _ in range(rand.randint(1, 20))
+            )
+
+        capture += make_frame(rand, *rand.choice(MESSAGE_MIX))
+
+    return capture, frame_count
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+"""
+Accounting of the time frames spend on the bus.
+
+At 9600 baud with a 100 ms gap after every frame the bus carries less than
+ten frames a second, so what is allowed on it is budgeted. Every priority
+gets a token bucket holding microseconds of bus time. Sending a frame
+takes its air time plus the gap out of the bucket of its priority and a
+frame whose bucket is empty waits until it has refilled.
+"""
+
+import threading
+from collections import deque
+
+from . import timers
+
+BAUD_RATE = 9600
+# start bit + 8 data bits + stop bit
+BITS_PER_BYTE = 10
+
+# control commands, a user is waiting on them
+CONTROL = 0
+# requests made by the application
+INTERACTIVE = 1
+# polling and anything else that can wait
+BACKGROUND = 2
+
+PRIORITIES = (CONTROL, INTERACTIVE, BACKGROUND)
+
+# priority -> (share of the bus time, burst in seconds of bus time)
+DEFAULT_SHARES = {
+    CONTROL: (1.0, 2.0),
+    INTERACTIVE: (0.6, 1.0),
+    BACKGROUND: (0.25, 0.5)
+}
+
+# seconds of history the utilization is worked out over
+DEFAULT_WINDOW = 10.0
+
+
+def airtime(length, baud_rate=BAUD_RATE):
+    """
+    :param length: number of bytes
+    :param baud_rate: bus speed
+    :return: microseconds it takes to put ``length`` bytes on the bus
+    """
+    return length * BITS_PER_BYTE * 1e6 / baud_rate
+
+
+class BudgetExceeded(Exception):
+    """
+    Raised when a frame would have to wait longer than its priority allows.
+    """
+    pass
+
+
+class TokenBucket(object):
+    """
+    :param rate: microseconds of bus time added every microsecond
+    :param capacity: most microseconds the bucket holds
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = timers.micros()
+
+    def _refill(self, now):
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def delay(self, cost, now=None):
+        """
+        :param cost: microseconds of bus time
+        :param now: current time in microseconds
+        :return: microseconds until the bucket holds ``cost``
+        """
+        if now is None:
+            now = timers.micros()
+
+        self._refill(now)
+
+        # a frame larger than the bucket is let through once it is full
+        missing = min(cost, self.capacity) - self.tokens
+        if missing <= 0:
+            return 0
+
+        return missing / self.rate
+
+    def consume(self, cost, now=None):
+        """
+        Takes bus time out of the bucket, it can go negative.
+
+        :param cost: microseconds of bus time
+        :param now: current time in microseconds
+        :return:
+        """
+        if now is None:
+            now = timers.micros()
+
+        self._refill(now)
+        self.tokens -= cost
+
+
+class AirtimeBudget(object):
+    """
+    Token buckets of every priority and the record of what was sent.
+    """
+
+    def __init__(
+        self,
+        gap,
+        baud_rate=BAUD_RATE,
+        shares=None,
+        max_delay=None,
+        window=DEFAULT_WINDOW
+    ):
+        """
+        :param gap: inter packet gap in microseconds
+        :param baud_rate: bus speed
+        :param shares: dict of priority to (share, burst), see
+            :data:`DEFAULT_SHARES`
+        :param max_delay: dict of priority to the most seconds a frame may
+            be deferred, a frame that would wait longer is rejected with
+            :class:`BudgetExceeded`. Priorities that are left out are
+            never rejected.
+        :param window: seconds the utilization is measured over
+        """
+        self.gap = gap
+        self.baud_rate = baud_rate
+        self.max_delay = dict(max_delay or {})
+        self.window = window
+        self._buckets = {}
+        self._history = deque()
+        self._used = dict((priority, 0) for priority in PRIORITIES)
+        self._lock = threading.Lock()
+
+        merged = dict(DEFAULT_SHARES)
+        merged.update(shares or {})
+
+        for priority, (share, burst) in merged.items():
+            self._buckets[priority] = TokenBucket(share, burst * 1e6)
+
+    def cost(self, length):
+        """
+        :param length: frame size in bytes
+        :return: microseconds the frame takes up the bus including the gap
+        """
+        return airtime(length, self.baud_rate) + self.gap
+
+    def delay(self, length, priority, queued=0):
+        """
+        :param length: frame size in bytes
+        :param priority: one of :data:`PRIORITIES`
+        :param queued: bytes of frames of the same priority that go first
+        :return: microseconds until the frame may be sent
+        """
+        with self._lock:
+            bucket = self._buckets[priority]
+            delay = bucket.delay(self.cost(length))
+
+        if queued:
+            # the queued frames are sent first at the rate the bucket
+            # fills. Each of them pays its own gap, close enough to count
+            # them as one.
+            delay += self.cost(queued) / bucket.rate
+
+        return delay
+
+    def admit(self, length, priority, queued=0):
+        """
+        Checks a frame before it is queued.
+
+        :param length: frame size in bytes
+        :param priority: one of :data:`PRIORITIES`
+        :param queued: bytes of frames of the same priority already queued
+        :return:
+        :raises BudgetExceeded: the frame would be deferred longer than
+            ``max_delay`` allows for its priority
+        """
+        max_delay = self.max_delay.get(priority)
+        if max_delay is None:
+            return
+
+        delay = self.delay(length, priority, queued)
+        if delay > max_delay * 1e6:
+            raise BudgetExceeded(
+                'priority {0} is over budget for {1:.2f} seconds'.format(
+                    priority,
+                    delay / 1e6
+                )
+            )
+
+    def charge(self, length, priority):
+        """
+        Records a frame that was sent.
+
+        :param length: frame size in bytes
+        :param priority: one of :data:`PRIORITIES`
+        :return:
+        """
+        cost = self.cost(length)
+        now = timers.micros()
+
+        with self._lock:
+            self._buckets[priority].consume(cost, now)
+            self._history.append((now, priority, cost))
+            self._used[priority] += cost
+            self._trim(now)
+
+    def _trim(self, now):
+        start = now - self.window * 1e6
+
+        while self._history and self._history[0][0] < start:
+            _, priority, cost = self._history.popleft()
+            self._used[priority] -= cost
+
+    def utilization(self, priority=None):
+        """
+        :param priority: only count frames of this priority, ``None``
+            counts all of them
+        :return: fraction of the bus time used over the last ``window``
+            seconds
+        """
+        with self._lock:
+            self._trim(timers.micros())
+
+            if priority is None:
+                used = sum(self._used.values())
+            else:
+                used = self._used[priority]
+
+        return used / (self.window * 1e6)
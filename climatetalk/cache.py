@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import threading
+import logging
+from concurrent.futures import Future
+
+from . import timers
+
+logger = logging.getLogger(__name__)
+
+# seconds a snapshot is served from the cache before it is fetched again
+DEFAULT_TTL = 5.0
+
+CONFIGURATION = 'configuration'
+STATUS = 'status'
+SENSOR = 'sensor'
+
+
+class SnapshotCache(object):
+    """
+    Keeps the last configuration and status payload of every node.
+
+    The MDI properties each read a byte or two out of one of these payloads.
+    With the cache the payload is fetched once and every property read
+    within ``ttl`` seconds is served from it, instead of each property
+    sending its own request over the bus.
+
+    Entries are keyed on (address, subnet, kind).
+
+    Fetches are single flight. When several threads ask for the same
+    payload while it is being fetched they all wait for that one request
+    and get its result, only one request goes out on the bus.
+
+    Keys can be watched, every payload that is stored for a watched key is
+    compared to the last one and the watchers are only called when it is
+    different.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        """
+        :param ttl: seconds a snapshot stays fresh, 0 disables the cache
+        """
+        self.ttl = ttl
+        self._entries = {}
+        self._inflight = {}
+        # bumped by invalidate and patch so a fetch that was started before
+        # a command went through does not store the old payload
+        self._generation = 0
+        self._watchers = {}
+        # last payload seen for every watched key, kept apart from the
+        # entries so it outlives expiry and invalidation
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, fetch):
+        """
+        :param key: (address, subnet, kind)
+        :param fetch: called with no arguments to get the payload when the
+            cache has no fresh copy
+        :return: the payload as a bytearray, do not modify it
+        """
+        now = timers.micros()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[1] > now:
+                return entry[0]
+
+            pending = self._inflight.get(key)
+            leader = pending is None
+
+            if leader:
+                pending = self._inflight[key] = Future()
+                pending.set_running_or_notify_cancel()
+                generation = self._generation
+
+        if not leader:
+            return pending.result()
+
+        try:
+            data = bytearray(fetch())
+        except BaseException as err:
+            with self._lock:
+                del self._inflight[key]
+
+            pending.set_exception(err)
+            raise
+
+        expires = timers.micros() + self.ttl * 1e6
+
+        with self._lock:
+            del self._inflight[key]
+
+            if self.ttl and generation == self._generation:
+                self._entries[key] = (data, expires)
+
+        pending.set_result(data)
+        self._changed(key, data)
+        return data
+
+    def peek(self, key):
+        """
+        :param key: (address, subnet, kind)
+        :return: the payload if the cache has a fresh copy, else ``None``
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is not None and entry[1] > timers.micros():
+            return entry[0]
+
+    def put(self, key, data):
+        """
+        :param key: (address, subnet, kind)
+        :param data: payload to store
+        :return:
+        """
+        # a copy, the payload of a received packet is a view into the
+        # receive buffer
+        data = bytearray(data)
+
+        if self.ttl:
+            expires = timers.micros() + self.ttl * 1e6
+
+            with self._lock:
+                self._entries[key] = (data, expires)
+
+        self._changed(key, data)
+
+    def patch(self, key, offset, data):
+        """
+        Writes bytes into a cached payload, used when it is known what a
+        command changed on the node.
+
+        :param key: (address, subnet, kind)
+        :param offset: position in the payload
+        :param data: new bytes
+        :return: ``True`` if there was a payload to patch
+        """
+        with self._lock:
+            self._generation += 1
+
+            entry = self._entries.get(key)
+            if entry is None or len(entry[0]) < offset + len(data):
+                return False
+
+            payload = bytearray(entry[0])
+            payload[offset:offset + len(data)] = data
+            self._entries[key] = (payload, entry[1])
+
+        self._changed(key, payload)
+        return True
+
+    def invalidate(self, address=None, subnet=None, kind=None):
+        """
+        Drops snapshots, ``None`` matches any value.
+
+        :param address: node address
+        :param subnet: node subnet
+        :param kind: :data:`CONFIGURATION`, :data:`STATUS` or
+            :data:`SENSOR`
+        :return:
+        """
+        with self._lock:
+            self._generation += 1
+
+            for key in list(self._entries):
+                if (
+                    (address is None or key[0] == address) and
+                    (subnet is None or key[1] == subnet) and
+                    (kind is None or key[2] == kind)
+                ):
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def watch(self, key, callback):
+        """
+        :param key: (address, subnet, kind)
+        :param callback: called as ``callback(key, old, new)`` when a
+            payload is stored for the key that differs from the previous
+            one. ``old`` is ``None`` the first time. It is called on the
+            thread that stored the payload, which can be the thread reading
+            the bus, so it must not wait on a request.
+        :return:
+        """
+        with self._lock:
+            self._watchers.setdefault(key, []).append(callback)
+
+    def unwatch(self, key, callback):
+        """
+        :param key: key given to :meth:`watch`
+        :param callback: callback given to :meth:`watch`
+        :return:
+        """
+        with self._lock:
+            callbacks = self._watchers.get(key, [])
+
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+            if not callbacks:
+                self._watchers.pop(key, None)
+                self._last.pop(key, None)
+
+    def _changed(self, key, data):
+        with self._lock:
+            callbacks = self._watchers.get(key)
+            if not callbacks:
+                return
+
+            old = self._last.get(key)
+            if old == data:
+                return
+
+            self._last[key] = data
+            callbacks = list(callbacks)
+
+        for callback in callbacks:
+            try:
+                callback(key, old, data)
+            except Exception:  # NOQA
+                logger.exception('snapshot watcher %r failed', callback)
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+"""
+Bulk decoding of recorded bus traffic into NumPy structured arrays.
+
+NumPy is only needed by this module, the rest of the library does not use
+it.
+
+    records = capture.decode(data)
+    status = records[
+        (records['message_type'] == GET_STATUS_RESPONSE) &
+        (records['source'] == 0x19)
+    ]
+"""
+
+import numpy as np
+
+from .framing import (
+    HEADER_SIZE,
+    CHECKSUM_SIZE,
+    LENGTH_OFFSET,
+    MIN_FRAME_SIZE,
+    MAX_PAYLOAD_LENGTH
+)
+
+CAPTURE_DTYPE = np.dtype([
+    ('offset', np.uint32),
+    ('size', np.uint16),
+    ('destination', np.uint8),
+    ('source', np.uint8),
+    ('subnet', np.uint8),
+    ('send_method', np.uint8),
+    ('send_parameters', np.uint16),
+    ('source_node_type', np.uint8),
+    ('message_type', np.uint8),
+    ('packet_number', np.uint8),
+    ('length', np.uint8),
+    ('payload_offset', np.uint32),
+    ('valid', np.bool_)
+])
+
+
+def _as_array(data):
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+def _running_totals(data):
+    # running totals of the bytes and of those totals, both reduced modulo
+    # 255 so they can not overflow on long captures
+    totals = np.zeros(len(data) + 1, dtype=np.int64)
+    np.cumsum(data, out=totals[1:])
+    totals %= 0xFF
+
+    totals2 = np.zeros(len(data) + 1, dtype=np.int64)
+    np.cumsum(totals[1:], out=totals2[1:])
+    totals2 %= 0xFF
+
+    totals = totals.astype(np.int32)
+    totals2 = totals2.astype(np.int32)
+
+    return totals, totals2
+
+
+def _checksums_valid(data, totals, totals2, starts, sizes):
+    # sums of data[start:end] from the running totals, see
+    # climatetalk.checksum.validate_frames
+    ends = starts + sizes - CHECKSUM_SIZE
+    first = totals[starts]
+
+    # the sums are only reduced at the end, they stay well inside int32
+    sum1 = totals[ends] - first
+    sum2 = totals2[ends] - totals2[starts] - (sizes - CHECKSUM_SIZE) * first
+
+    check1 = (sum1 + sum2) % 0xFF
+    check2 = (sum1 + check1) % 0xFF
+
+    return (data[ends] == check1) & (data[ends + 1] == check2)
+
+
+def locate_frames(data):
+    """
+    Vectorized version of :func:`climatetalk.framing.find_frames`.
+
+    Every offset of the capture is checked as a possible frame start at
+    once, what is left is following the chain of good frames from the
+    start of the capture. A capture does not grow, so unlike
+    :func:`~climatetalk.framing.find_frames` an incomplete frame at the end
+    of the capture is left out instead of waited on.
+
+    :param data: bytes like object holding the capture
+    :return: (offsets, sizes) arrays
+    """
+    data = _as_array(data)
+    length = len(data)
+
+    if length < MIN_FRAME_SIZE:
+        empty = np.zeros(0, dtype=np.int32)
+        return empty, empty
+
+    # int32 keeps the temporary arrays small, a capture would need to be
+    # over 2 GB to overflow it
+    starts = np.arange(length - MIN_FRAME_SIZE + 1, dtype=np.int32)
+    sizes = data[LENGTH_OFFSET:length - MIN_FRAME_SIZE + 1 + LENGTH_OFFSET]
+    sizes = sizes.astype(np.int32) + MIN_FRAME_SIZE
+
+    candidate = (
+        (sizes <= MAX_PAYLOAD_LENGTH + MIN_FRAME_SIZE) &
+        (starts + sizes <= length)
+    )
+    starts = starts[candidate]
+    sizes = sizes[candidate]
+
+    totals, totals2 = _running_totals(data)
+    good = _checksums_valid(data, totals, totals2, starts, sizes)
+    starts = starts[good]
+    sizes = sizes[good]
+
+    if not len(starts):
+        return starts, sizes
+
+    # a bad candidate makes find_frames slide a byte at a time, so after a
+    # frame the next frame is the first good candidate at or after its end
+    following = np.searchsorted(starts, starts + sizes).tolist()
+    count = len(following)
+    chain = []
+    index = 0
+
+    while index < count:
+        chain.append(index)
+        index = following[index]
+
+    chain = np.array(chain, dtype=np.int64)
+    return starts[chain], sizes[chain]
+
+
+def decode_frames(data, offsets, sizes, validate=True):
+    """
+    :param data: bytes like object holding the capture
+    :param offsets: offset of every frame
+    :param sizes: size of every frame including the checksum
+    :param validate: check the checksums, when ``False`` every record is
+        marked valid
+    :return: structured array with the :data:`CAPTURE_DTYPE` layout, the
+        ``valid`` column holds the result of checking the checksum
+    """
+    data = _as_array(data)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    sizes = np.asarray(sizes, dtype=np.int64)
+
+    records = np.zeros(len(offsets), dtype=CAPTURE_DTYPE)
+
+    if not len(offsets):
+        return records
+
+    if ((offsets < 0) | (offsets + sizes > len(data))).any():
+        raise ValueError('frame extends past the end of the capture')
+
+    # anything shorter than a header and checksum is never valid, the
+    # header columns of those records are whatever follows in the capture
+    complete = sizes >= MIN_FRAME_SIZE
+
+    if not complete.all():
+        data = np.concatenate((data, np.zeros(MIN_FRAME_SIZE, np.uint8)))
+
+    records['offset'] = offsets
+    records['size'] = sizes
+    records['destination'] = data[offsets]
+    records['source'] = data[offsets + 1]
+    records['subnet'] = data[offsets + 2]
+    records['send_method'] = data[offsets + 3]
+    records['send_parameters'] = (
+        data[offsets + 4].astype(np.uint16) << 8 | data[offsets + 5]
+    )
+    records['source_node_type'] = data[offsets + 6]
+    records['message_type'] = data[offsets + 7]
+    records['packet_number'] = data[offsets + 8]
+    records['length'] = data[offsets + LENGTH_OFFSET]
+    records['payload_offset'] = offsets + HEADER_SIZE
+
+    if not validate:
+        records['valid'] = True
+        return records
+
+    totals, totals2 = _running_totals(data)
+    records['valid'] = (
+        complete &
+        (sizes == records['length'].astype(np.int64) + MIN_FRAME_SIZE) &
+        _checksums_valid(
+            data,
+            totals,
+            totals2,
+            offsets,
+            np.where(complete, sizes, MIN_FRAME_SIZE)
+        )
+    )
+
+    return records
+
+
+def decode(data, frames=None):
+    """
+    Decodes a capture into a structured array, one record per frame.
+
+    :param data: bytes like object holding the capture
+    :param frames: (offset, size) pairs of frames that were already
+        delimited, for instance by the gaps between them. If left out the
+        frames are located using the header and checksum and every record
+        is valid.
+    :return: structured array with the :data:`CAPTURE_DTYPE` layout
+    """
+    if frames is None:
+        offsets, sizes = locate_frames(data)
+        return decode_frames(data, offsets, sizes, validate=False)
+
+    frames = np.asarray(frames, dtype=np.int64).reshape(-1, 2)
+    return decode_frames(data, frames[:, 0], frames[:, 1])
+
+
+def payload(data, record):
+    """
+    :param data: the capture the record was decoded from
+    :param record: a single record
+    :return: memoryview of the payload of the record
+    """
+    start = int(record['payload_offset'])
+    return memoryview(data)[start:start + int(record['length'])]
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+from itertools import accumulate
+
+CHECKSUM_SIZE = 2
+
+
+def _digest(sum1, sum2):
+    check1 = (sum1 + sum2) % 0xFF
+    check2 = (sum1 + check1) % 0xFF
+
+    return check1, check2
+
+
+def fletcher(data, start=0, end=None):
+    """
+    ClimateTalk Fletcher checksum.
+
+    :param data: bytes like object holding the data to checksum
+    :param start: offset of the first byte
+    :param end: offset one past the last byte
+    :return: (check1, check2)
+    """
+    view = memoryview(data)[start:end]
+
+    # both sums are computed by C level loops, sum2 is the sum of all of
+    # the running totals of sum1
+    sum1 = sum(view)
+    sum2 = sum(accumulate(view))
+
+    return _digest(sum1, sum2)
+
+
+class FletcherChecksum(object):
+    """
+    Fletcher checksum that is updated as data arrives.
+
+    Data can be added a byte or a chunk at a time. The last two bytes added
+    are held back because they are the checksum of everything in front of
+    them, so as soon as the final byte of a frame has been added
+    :attr:`is_valid` says whether the frame is good. There is no second
+    pass over the frame.
+    """
+
+    def __init__(self):
+        self.sum1 = 0
+        self.sum2 = 0
+        self.count = 0
+        self._tail = bytearray()
+
+    def reset(self):
+        self.sum1 = 0
+        self.sum2 = 0
+        self.count = 0
+        del self._tail[:]
+
+    def _add(self, view):
+        # adding n bytes moves every later running total of sum1 up by the
+        # current sum1, so sum2 gains sum1 * n plus the running totals of
+        # the new bytes. Both sums are kept reduced, only their value
+        # modulo 255 is used.
+        self.sum2 = (
+            self.sum2 +
+            self.sum1 * len(view) +
+            sum(accumulate(view))
+        ) % 0xFF
+        self.sum1 = (self.sum1 + sum(view)) % 0xFF
+
+    def update(self, data):
+        """
+        :param data: bytes like object or a single byte as an int
+        :return:
+        """
+        if isinstance(data, int):
+            data = bytearray((data,))
+
+        view = memoryview(data)
+
+        self.count += len(view)
+
+        if len(view) >= CHECKSUM_SIZE:
+            if self._tail:
+                self._add(self._tail)
+
+            self._add(view[:-CHECKSUM_SIZE])
+            self._tail[:] = view[-CHECKSUM_SIZE:]
+        else:
+            self._tail.extend(view)
+
+            if len(self._tail) > CHECKSUM_SIZE:
+                extra = len(self._tail) - CHECKSUM_SIZE
+                self._add(self._tail[:extra])
+                del self._tail[:extra]
+
+    def digest(self):
+        """
+        :return: (check1, check2) of the data added so far, not counting
+            the two held back bytes
+        """
+        return _digest(self.sum1, self.sum2)
+
+    @property
+    def is_valid(self):
+        if len(self._tail) != CHECKSUM_SIZE:
+            return False
+
+        return tuple(self._tail) == self.digest()
+
+
+def validate_frames(data, frames):
+    """
+    Checks the checksums of many frames from one capture at once.
+
+    The running totals of the capture are built once, after that the two
+    sums of any frame come from the difference of four totals, so the cost
+    per frame does not depend on its length.
+
+    :param data: bytes like object holding the capture
+    :param frames: iterable of (offset, size) tuples, size includes the
+        two checksum bytes
+    :return: list of bools, one per frame
+    """
+    frames = list(frames)
+    if not frames:
+        return []
+
+    view = memoryview(data)
+    first = min(offset for offset, _ in frames)
+    last = max(offset + size for offset, size in frames)
+    view = view[first:last]
+
+    # totals[i] is the sum of the first i bytes and totals2[i] is the sum
+    # of totals[1] through totals[i]
+    totals = [0]
+    totals.extend(accumulate(view))
+    totals2 = list(accumulate(totals))
+
+    results = []
+
+    for offset, size in frames:
+        start = offset - first
+        end = start + size - CHECKSUM_SIZE
+
+        if end < start or end + CHECKSUM_SIZE > len(view):
+            results.append(False)
+            continue
+
+        sum1 = totals[end] - totals[start]
+        sum2 = totals2[end] - totals2[start] - (end - start) * totals[start]
+
+        results.append(
+            _digest(sum1, sum2) == (view[end], view[end + 1])
+        )
+
+    return results
@@ -2,6 +2,8 @@
 # Copyright 2020 Kevin Schlosser
 
 import datetime
+from .airtime import CONTROL
+from .fields import Field
 from .packet import SetControlCommandRequest
 from .utils import (
     TwosCompliment,
@@ -103,6 +105,9 @@ SET_BLOWER_COEFFICIENT_10 = 0x8E
 PUBLISH_PRICE = 0xE0
 WATER_HEATER_MODIFY = 0xF0
 
+# index of the first command data byte in a command packet
+COMMAND_DATA_OFFSET = 13
+
 
 class ControlCommandRefreshTimer(bytearray):
 
@@ -145,8 +150,16 @@ class ControlCommandRefreshTimer(bytearray):
         self.pop(0)
         self.append(value)
 
+    @property
+    def duration(self):
+        """
+        :return: seconds until the equipment drops the command
+        """
+        return self.minutes * 60 + self.seconds
+
 
 class CommandPacketBase(SetControlCommandRequest):
+    priority = CONTROL
     _command_code = 0x00
     _payload_length = 0
     _packet_number = 0x00
@@ -155,8 +168,25 @@ class CommandPacketBase(SetControlCommandRequest):
     def __init__(self, *args, **kwargs):
         SetControlCommandRequest.__init__(self, *args, **kwargs)
 
-        if len(self) <= 11:
+        if not args and not kwargs:
             self.payload_command_code = self._command_code
+            self._reserve(self._payload_length)
+
+    def _reserve(self, size):
+        """
+        Makes room for ``size`` bytes of command data ahead of the
+        checksum and sets the packet length to match.
+
+        The command code takes bytes 10 and 11 and byte 12 is reserved,
+        the command data starts at :data:`COMMAND_DATA_OFFSET`.
+
+        :param size: number of command data bytes
+        :return:
+        """
+        while len(self) < COMMAND_DATA_OFFSET + size + 2:
+            self.append(0x00)
+
+        self[9] = len(self) - 12
 
     @property
     def payload_command_data(self):
@@ -178,13 +208,23 @@ class CommandPacketBase(SetControlCommandRequest):
             self[12] = value
 
 
+class RefreshedCommandBase(CommandPacketBase):
+    """
+    Command the equipment drops once its refresh timer runs out unless it
+    is sent again, see :class:`climatetalk.demand.DemandRefresher`.
+    """
+
+    @property
+    def refresh_timer(self):
+        return ControlCommandRefreshTimer(self[13:14])
+
+
 class HeatSetPointTemperatureModify(CommandPacketBase):
     _command_code = HEAT_SET_POINT_TEMPERATURE_MODIFY
     _payload_length = 1
     
     def set_command_data(self, value):
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -194,8 +234,7 @@ class CoolSetPointTemperatureModify(CommandPacketBase):
     _payload_length = 1
     
     def set_command_data(self, value):
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -229,8 +268,7 @@ class HeatProfileChange(CommandPacketBase):
         control = _set_bit(control, 2, _get_bit(mode, 0))
         control = _set_bit(control, 3, _get_bit(mode, 1))
 
-        while len(self) < 14 + len(data):
-            self.append(0x00)
+        self._reserve(1 + len(data))
 
         self[13] = control
 
@@ -269,8 +307,7 @@ class CoolProfileChange(CommandPacketBase):
         control = _set_bit(control, 2, _get_bit(mode, 0))
         control = _set_bit(control, 3, _get_bit(mode, 1))
 
-        while len(self) < 14 + len(data):
-            self.append(0x00)
+        self._reserve(1 + len(data))
 
         self[13] = control
 
@@ -296,8 +333,7 @@ class SystemSwitchModify(CommandPacketBase):
         :param value: one of SYSTEM_SWITCH_MODIFY_* constants
         :return:
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -307,8 +343,7 @@ class PermanentSetPointTempHoldModify(CommandPacketBase):
     _payload_length = 1
 
     def set_command_data(self, value):
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -328,14 +363,12 @@ class FanKeySelection(CommandPacketBase):
         :return:
         """
 
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = state
 
         if state == FAN_KEY_SELECTION_MANUAL:
-            while len(self) < 15:
-                self.append(0x00)
+            self._reserve(2)
 
             self[14] = demand
             self._payload_length = 2
@@ -354,8 +387,7 @@ class HoldOverride(CommandPacketBase):
         :param value: one of HOLD_OVERRIDE_* constants
         :return:
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -373,8 +405,7 @@ class BeeperEnable(CommandPacketBase):
         :param value: one of BEEPER_ENABLE_* constants
         :return:
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -392,8 +423,7 @@ class FahrenheitCelsiusDisplay(CommandPacketBase):
         :param value: one of FAHRENHEIT_CELSIUS_DISPLAY_* constants
         :return:
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -417,8 +447,7 @@ class ComfortRecoveryModify(CommandPacketBase):
         config = _set_bit(config, 0, bool(state))
         config = _set_bit(config, 7, capable)
 
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = config
 
@@ -434,8 +463,7 @@ class RealTimeDayOverride(CommandPacketBase):
         :return:
         """
 
-        while len(self) < 19:
-            self.append(0x00)
+        self._reserve(6)
 
         year = value.year - 2000
         month = value.month - 1
@@ -457,8 +485,7 @@ class ChangeFilterTimeRemaining(CommandPacketBase):
     _payload_length = 0
 
     def set_command_data(self, reset, hours=None):
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = reset
         self._payload_length = 1
@@ -467,8 +494,7 @@ class ChangeFilterTimeRemaining(CommandPacketBase):
             high_byte = hours >> 8 & 0xFF
             low_byte = hours & 0xFF
 
-            while len(self) < 16:
-                self.append(0x00)
+            self._reserve(3)
 
             self[14] = low_byte
             self[15] = high_byte
@@ -491,14 +517,12 @@ class VacationMode(CommandPacketBase):
         :param cool_setpoint:
         :return:
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = state
 
         if None not in (heat_setpoint, cool_setpoint):
-            while len(self) < 16:
-                self.append(0x00)
+            self._reserve(3)
 
             self[14] = heat_setpoint
             self[15] = cool_setpoint
@@ -509,8 +533,7 @@ class HighAlarmLimitChange(CommandPacketBase):
     _payload_length = 1
 
     def set_command_data(self, value):
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -520,8 +543,7 @@ class LowAlarmLimitChange(CommandPacketBase):
     _payload_length = 1
 
     def set_command_data(self, value):
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -531,8 +553,7 @@ class HighOutdoorAlarmLimitChange(CommandPacketBase):
     _payload_length = 1
 
     def set_command_data(self, value):
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -542,8 +563,7 @@ class LowOutdoorAlarmLimitChange(CommandPacketBase):
     _payload_length = 1
 
     def set_command_data(self, value):
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -557,8 +577,7 @@ class TempDisplayAdjFactorChange(CommandPacketBase):
         :param value: one of COMPRESSOR_LOCKOUT_* constants
         :return:
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = TwosCompliment.encode(value, 8)
 
@@ -586,8 +605,7 @@ class CompressorLockout(CommandPacketBase):
         :param value: one of COMPRESSOR_LOCKOUT_* constants
         :return:
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -611,8 +629,7 @@ class ProgramIntervalTypeModification(CommandPacketBase):
         :param value: one of PROGRAM_INTERVAL_TYPE_MODIFICATION_* constants
         :return:
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -630,8 +647,7 @@ class CommunicationsReceiverOnOff(CommandPacketBase):
         :param value: COMMUNICATIONS_RECEIVER_ON or COMMUNICATIONS_RECEIVER_OFF
         :return:
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -649,8 +665,7 @@ class ForcePhoneNumberDisplay(CommandPacketBase):
         :param value: one of FORCE_PHONE_NUMBER_DISPLAY_* constants
         :return:
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -660,8 +675,7 @@ class RestoreFactoryDefaults(CommandPacketBase):
     _payload_length = 1
 
     def set_command_data(self):
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
 
 class CustomMessageAreaDisplayData(CommandPacketBase):
@@ -683,8 +697,7 @@ class CustomMessageAreaDisplayData(CommandPacketBase):
         config = int(duration * 2)
         config |= area_id >> 4
 
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = config
         self[14] = active_id
@@ -703,8 +716,7 @@ class CustomMessageAreaDisplayData(CommandPacketBase):
                 else:
                     data.append(ord(char))
 
-            while len(self) < 16 + len(data):
-                self.append(0x00)
+            self._reserve(3 + len(data))
 
             self[15] = mod_index
             for i, item in enumerate(data):
@@ -718,8 +730,7 @@ class SetPointTempAndTemporaryHold(CommandPacketBase):
     _payload_length = 1
 
     def set_command_data(self, value):
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -737,8 +748,7 @@ class ContinuousDisplayLight(CommandPacketBase):
         :param value: one of CONTINUOUS_DISPLAY_LIGHT_* constants
         :return:
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -774,8 +784,7 @@ class AdvanceRealTimeDayOverride(CommandPacketBase):
             seconds & 0xFF
         ]
 
-        while len(self) < 23:
-            self.append(0x00)
+        self._reserve(10)
 
         self[13] = control
         self[14] = gmt_offset
@@ -814,8 +823,7 @@ class KeypadLockout(CommandPacketBase):
         high_byte = password >> 8 & 0xFF
         low_byte = password & 0xFF
 
-        while len(self) < 17:
-            self.append(0x00)
+        self._reserve(4)
 
         self[13] = state
         self[14] = lockout_type
@@ -840,8 +848,7 @@ class TestMode(CommandPacketBase):
         :param code: one of TEST_MODE_* constants
         :return:
         """
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = mfg_id
         self[14] = code
@@ -860,8 +867,7 @@ class SubsystemInstallationTest(CommandPacketBase):
         :param value: one of SUBSYSTEM_INSTALLATION_TEST_* constants
         :return:
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -881,8 +887,7 @@ class SetPointTempTimeHold(CommandPacketBase):
     _payload_length = 2
 
     def set_command_data(self, temp, minutes):
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = temp
         self[14] = minutes
@@ -901,8 +906,7 @@ class ComfortModeModification(CommandPacketBase):
         :param value: one of COMFORT_MODE_MODIFICATION_* constants
         :return:
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -912,8 +916,7 @@ class LimitedHeatAndCoolRange(CommandPacketBase):
     _payload_length = 2
 
     def set_command_data(self, min_temp, max_temp):
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = min_temp
         self[14] = max_temp
@@ -938,8 +941,7 @@ class AutoPairingRequest2(CommandPacketBase):
         :param action_code: one of AUTO_PAIRING_REQUEST_ACTION_* constants
         :return:
         """
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = status_code
         self[14] = action_code
@@ -955,8 +957,7 @@ class PairingOwnershipRequest2(CommandPacketBase):
         :return:
         """
 
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -974,8 +975,7 @@ class ReversingValveConfig(CommandPacketBase):
         :param value: on of REVERSING_VALVE_CONFIG_* constants
         :return:
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -985,8 +985,7 @@ class HumDehumConfig(CommandPacketBase):
     _payload_length = 0
 
     def set_command_data(self, h_ind, h_mode, d_ind, d_mode):
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         h_config = 0
         d_config = 0
@@ -1006,8 +1005,7 @@ class ChangeUvLightMaintenanceTimer(CommandPacketBase):
     _payload_length = 0
 
     def set_command_data(self, reset, hours=None):
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = reset
         self._payload_length = 1
@@ -1016,8 +1014,7 @@ class ChangeUvLightMaintenanceTimer(CommandPacketBase):
             high_byte = hours >> 8 & 0xFF
             low_byte = hours & 0xFF
 
-            while len(self) < 16:
-                self.append(0x00)
+            self._reserve(3)
 
             self[14] = low_byte
             self[15] = high_byte
@@ -1030,8 +1027,7 @@ class ChangeHumidifierPadMaintTimerall(CommandPacketBase):
     _payload_length = 0
 
     def set_command_data(self, reset, hours=None):
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = reset
         self._payload_length = 1
@@ -1040,8 +1036,7 @@ class ChangeHumidifierPadMaintTimerall(CommandPacketBase):
             high_byte = hours >> 8 & 0xFF
             low_byte = hours & 0xFF
 
-            while len(self) < 16:
-                self.append(0x00)
+            self._reserve(3)
 
             self[14] = low_byte
             self[15] = high_byte
@@ -1059,7 +1054,7 @@ class HumidificationSetPointModify(CommandPacketBase):
     _payload_length = 0
 
 
-class DamperPositionDemand(CommandPacketBase):
+class DamperPositionDemand(RefreshedCommandBase):
     _command_code = DAMPER_POSITION_DEMAND
     _payload_length = 2
 
@@ -1074,8 +1069,7 @@ class DamperPositionDemand(CommandPacketBase):
 
         value = timer + bytearray([int(value * 2)])
 
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = value[0]
         self[14] = value[1]
@@ -1085,7 +1079,7 @@ SUBSYSTEM_BUSY_STATUS_BUSY = 0x01
 SUBSYSTEM_BUSY_STATUS_READY = 0x00
 
 
-class SubsystemBusyStatus(CommandPacketBase):
+class SubsystemBusyStatus(RefreshedCommandBase):
     _command_code = SUBSYSTEM_BUSY_STATUS
     _payload_length = 2
 
@@ -1105,17 +1099,21 @@ class SubsystemBusyStatus(CommandPacketBase):
 
         value = timer + bytearray([value])
 
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = value[0]
         self[14] = value[1]
 
 
-class DemandBase(CommandPacketBase):
+class DemandBase(RefreshedCommandBase):
     _command_code = 0x0
     _payload_length = 2
 
+    # the refresh timer comes first
+    fields = (
+        Field('demand', COMMAND_DATA_OFFSET + 1),
+    )
+
     def set_command_data(self, refresh_timer, value):
         minute = refresh_timer.minute
         second = refresh_timer.second
@@ -1127,8 +1125,7 @@ class DemandBase(CommandPacketBase):
 
         value = timer + bytearray([int(value * 2)])
 
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = value[0]
         self[14] = value[1]
@@ -1158,10 +1155,15 @@ FAN_DEMAND_EMERGENCY_HEAT = 0x04
 FAN_DEMAND_DEFROST = 0x05
 
 
-class FanDemand(CommandPacketBase):
+class FanDemand(RefreshedCommandBase):
     _command_code = FAN_DEMAND
     _payload_length = 3
 
+    fields = (
+        Field('mode', COMMAND_DATA_OFFSET + 1),
+        Field('demand', COMMAND_DATA_OFFSET + 2)
+    )
+
     def set_command_data(self, refresh_timer, mode, value):
         """
 
@@ -1171,8 +1173,7 @@ class FanDemand(CommandPacketBase):
         :return:
         """
 
-        while len(self) < 16:
-            self.append(0x00)
+        self._reserve(3)
 
         minute = refresh_timer.minute
         second = refresh_timer.second
@@ -1210,8 +1211,7 @@ class SetMotorSpeed(CommandPacketBase):
 
         high_byte = value >> 8 & 0xFF
         low_byte = value & 0xFF
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = low_byte
         self[14] = high_byte
@@ -1226,8 +1226,7 @@ class SetMotorTorque(CommandPacketBase):
 
         high_byte = value >> 8 & 0xFF
         low_byte = value & 0xFF
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = low_byte
         self[14] = high_byte
@@ -1242,8 +1241,7 @@ class SetAirflowDemand(CommandPacketBase):
 
         high_byte = value >> 8 & 0xFF
         low_byte = value & 0xFF
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = low_byte
         self[14] = high_byte
@@ -1263,8 +1261,7 @@ class SetControlMode(CommandPacketBase):
         :param value: on of SET_CONTROL_MODE_* constants
         :return:
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -1274,8 +1271,7 @@ class SetDemandRampRate(CommandPacketBase):
     _payload_length = 1
 
     def set_command_data(self, value):
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -1293,8 +1289,7 @@ class SetMotorDirection(CommandPacketBase):
         :param value: on of SET_MOTOR_DIRECTION_* constants
         :return:
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -1309,8 +1304,7 @@ class SetMotorTorquePercent(CommandPacketBase):
 
         high_byte = value >> 8 & 0xFF
         low_byte = value & 0xFF
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = low_byte
         self[14] = high_byte
@@ -1323,8 +1317,7 @@ class SetMotorPositionDemand(CommandPacketBase):
     def set_command_data(self, value):
         high_byte = value >> 8 & 0xFF
         low_byte = value & 0xFF
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = low_byte
         self[14] = high_byte
@@ -1337,8 +1330,7 @@ class SetBlowerCoefficientBase(CommandPacketBase):
     def set_command_data(self, value):
         high_byte = value >> 8 & 0xFF
         low_byte = value & 0xFF
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = low_byte
         self[14] = high_byte
@@ -1371,8 +1363,7 @@ class SetBlowerIdentificationBase(CommandPacketBase):
     def set_command_data(self, value):
         high_byte = value >> 8 & 0xFF
         low_byte = value & 0xFF
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = low_byte
         self[14] = high_byte
@@ -1411,8 +1402,7 @@ class SetSpeedLimit(CommandPacketBase):
 
         high_byte = value >> 8 & 0xFF
         low_byte = value & 0xFF
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = low_byte
         self[14] = high_byte
@@ -1427,8 +1417,7 @@ class SetTorqueLimit(CommandPacketBase):
 
         high_byte = value >> 8 & 0xFF
         low_byte = value & 0xFF
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = low_byte
         self[14] = high_byte
@@ -1443,8 +1432,7 @@ class SetAirflowLimit(CommandPacketBase):
 
         high_byte = value >> 8 & 0xFF
         low_byte = value & 0xFF
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = low_byte
         self[14] = high_byte
@@ -1459,8 +1447,7 @@ class SetPowerOutputLimit(CommandPacketBase):
 
         high_byte = value >> 8 & 0xFF
         low_byte = value & 0xFF
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = low_byte
         self[14] = high_byte
@@ -1476,8 +1463,7 @@ class SetDeviceTemperatureLimit(CommandPacketBase):
 
         high_byte = value >> 8 & 0xFF
         low_byte = value & 0xFF
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = low_byte
         self[14] = high_byte
@@ -1497,8 +1483,7 @@ class StopMotorByBraking(CommandPacketBase):
         :param seconds: time to wait before applying brakes
         :return:
         """
-        while len(self) < 15:
-            self.append(0x00)
+        self._reserve(2)
 
         self[13] = braking
         self[14] = seconds
@@ -1516,8 +1501,7 @@ class RunStopMotor(CommandPacketBase):
         """
         :param value: one if RUN_STOP_MOTOR_COMMAND_* constants
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -1530,8 +1514,7 @@ class SetDemandRampTime(CommandPacketBase):
         """
         :param value: seconds
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -1547,8 +1530,7 @@ class SetInducerRampRate(CommandPacketBase):
             0x01-0x7F: Objective Ramp Rate = value RPM/Sec
             0x80: Slew the demand as fast as possible0x81-0xFFObjective speed slew rate = (10*value) RPM/sec
         """
-        while len(self) < 14:
-            self.append(0x00)
+        self._reserve(1)
 
         self[13] = value
 
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError as _TimeoutError
+
+from . import timers
+from .airtime import INTERACTIVE, BudgetExceeded
+from .message_types import SET_CONTROL_COMMAND_RESPONSE
+from .packet_view import PacketView
+
+logger = logging.getLogger(__name__)
+
+# seconds to wait for a response before sending the request again
+DEFAULT_TIMEOUT = 2.0
+# number of times a request is sent again before giving up
+DEFAULT_RETRIES = 2
+
+
+class RequestTimeout(_TimeoutError):
+    pass
+
+
+def response_db_id(packet):
+    """
+    :param packet: received packet
+    :return: the DB ID the response carries, the command code for the
+        response to a control command, else ``None``
+    """
+    if packet.message_type == SET_CONTROL_COMMAND_RESPONSE:
+        # commands to the same node are told apart by their code
+        if len(packet) < 14:
+            return None
+
+        return packet.payload_command_code
+
+    return getattr(packet, 'db_id_tag', None)
+
+
+class PendingRequest(Future):
+    """
+    Future for a request that is waiting for its response.
+
+    The result is the response packet. If no response arrives after all of
+    the retries the future fails with :class:`RequestTimeout`.
+    """
+
+    def __init__(
+        self,
+        correlator,
+        key,
+        packet,
+        timeout,
+        retries,
+        priority=INTERACTIVE
+    ):
+        Future.__init__(self)
+        self._correlator = correlator
+        self.key = key
+        self.packet = packet
+        self.timeout = timeout
+        self.retries = retries
+        self.priority = priority
+        self.attempts = 0
+        self.timer = None
+
+    def cancel(self):
+        if Future.cancel(self):
+            self._correlator.discard(self)
+            return True
+
+        return False
+
+
+class Correlator(object):
+    """
+    Matches responses to the requests that were sent.
+
+    Outstanding requests are keyed on (address, subnet, response type,
+    DB ID) so any number of requests to different nodes can be waiting at
+    the same time. Requests with the same key are answered in the order
+    they were sent. The deadlines of the outstanding requests are kept on a
+    timing wheel, which resends or fails them when they expire.
+
+    A request that is identical to one that is still waiting is not sent
+    again, it shares the response of the one already on the bus.
+    """
+
+    def __init__(self, send, wheel=None):
+        """
+        :param send: callable that puts a packet on the bus, it is called
+            with the packet and a ``priority`` keyword and returns a future
+            that completes once the packet has been written
+        :param wheel: :class:`climatetalk.timers.TimingWheel` the deadlines
+            are kept on, the shared one when ``None``
+        """
+        self._send = send
+        self._wheel = wheel or timers.shared_wheel()
+        self._pending = {}
+        self._shared = {}
+        self._condition = threading.Condition()
+
+    def request(
+        self,
+        packet,
+        response_type,
+        db_id=None,
+        timeout=DEFAULT_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        priority=INTERACTIVE
+    ):
+        """
+        Sends a request and returns a future for its response.
+
+        :param packet: request packet, the destination and subnet must be set
+        :param response_type: message type of the expected response
+        :param db_id: DB ID the response must carry, ``None`` matches any
+        :param timeout: seconds to wait for each attempt
+        :param retries: number of times the request is sent again
+        :param priority: one of :data:`climatetalk.airtime.PRIORITIES`
+        :return: :class:`PendingRequest`, it fails with
+            :class:`climatetalk.airtime.BudgetExceeded` when the bus has no
+            time left for the priority
+        """
+        key = (packet.destination, packet.subnet, response_type, db_id)
+        # the checksum bytes are left out, they are filled in when sent
+        shared_key = (key, bytes(packet[:-2]))
+
+        with self._condition:
+            leader = self._shared.get(shared_key)
+
+            if leader is None or leader.done():
+                leader = None
+                pending = PendingRequest(
+                    self,
+                    key,
+                    packet,
+                    timeout,
+                    retries,
+                    priority
+                )
+                self._pending.setdefault(key, deque()).append(pending)
+                self._shared[shared_key] = pending
+                pending.add_done_callback(
+                    lambda _: self._unshare(shared_key, pending)
+                )
+
+        if leader is not None:
+            return self._follow(leader)
+
+        self._transmit(pending)
+        return pending
+
+    def _unshare(self, shared_key, pending):
+        with self._condition:
+            if self._shared.get(shared_key) is pending:
+                del self._shared[shared_key]
+
+    @staticmethod
+    def _follow(leader):
+        # a future of its own so cancelling it leaves the leader alone. It
+        # stays pending until the leader is done so a cancelled leader can
+        # cancel it too.
+        follower = Future()
+
+        def copy(future):
+            if follower.done():
+                return
+            if future.cancelled():
+                follower.cancel()
+            elif future.exception() is not None:
+                follower.set_exception(future.exception())
+            else:
+                follower.set_result(future.result())
+
+        leader.add_done_callback(copy)
+        return follower
+
+    def _transmit(self, pending):
+        if pending.done():
+            # answered by a late response to an earlier request
+            return
+
+        pending.attempts += 1
+
+        try:
+            sent = self._send(pending.packet, priority=pending.priority)
+        except Exception as err:  # NOQA
+            if not isinstance(err, BudgetExceeded):
+                logger.exception('sending %r failed', pending.key)
+
+            self._fail(pending, err)
+            return
+
+        sent.add_done_callback(lambda future: self._sent(pending, future))
+
+    def _sent(self, pending, future):
+        # the deadline runs from the moment the request is on the bus, time
+        # spent queued behind other frames does not use up attempts
+        if future.cancelled():
+            pending.cancel()
+            return
+
+        err = future.exception()
+        if err is not None:
+            self._fail(pending, err)
+            return
+
+        if not pending.done():
+            pending.timer = self._wheel.schedule(
+                pending.timeout,
+                self._expire,
+                pending
+            )
+
+    def _fail(self, pending, err):
+        # nothing is on its way, nothing is going to answer it
+        if self.discard(pending) and pending.set_running_or_notify_cancel():
+            pending.set_exception(err)
+
+    def dispatch(self, packet):
+        """
+        Hands a received packet to the request waiting for it.
+
+        :param packet: received packet
+        :return: ``True`` if the packet answered a request
+        """
+        address = packet.source
+        subnet = packet.subnet
+        message_type = packet.message_type
+
+        keys = ((address, subnet, message_type, None),)
+        db_id = response_db_id(packet)
+
+        if db_id is not None:
+            keys = ((address, subnet, message_type, db_id),) + keys
+
+        with self._condition:
+            for key in keys:
+                queue = self._pending.get(key)
+                if queue:
+                    pending = queue.popleft()
+                    if not queue:
+                        del self._pending[key]
+                    break
+            else:
+                return False
+
+        # the response can beat the end of the write
+        if pending.timer is not None:
+            pending.timer.cancel()
+
+        # the caller can keep the response around, a view would keep the
+        # whole receive buffer it points into alive with it
+        if isinstance(packet, PacketView):
+            packet = packet.to_packet()
+
+        if pending.set_running_or_notify_cancel():
+            pending.set_result(packet)
+
+        return True
+
+    def discard(self, pending):
+        """
+        :param pending: request to stop waiting for
+        :return: ``True`` if the request was still waiting
+        """
+        with self._condition:
+            queue = self._pending.get(pending.key)
+
+            if queue and pending in queue:
+                queue.remove(pending)
+                if not queue:
+                    del self._pending[pending.key]
+
+                if pending.timer is not None:
+                    pending.timer.cancel()
+
+                return True
+
+        return False
+
+    def stop(self):
+        with self._condition:
+            pending = [p for queue in self._pending.values() for p in queue]
+            self._pending.clear()
+            self._shared.clear()
+
+        for item in pending:
+            if item.timer is not None:
+                item.timer.cancel()
+
+            Future.cancel(item)
+
+    def _expire(self, pending):
+        if pending.done():
+            return
+
+        if pending.attempts <= pending.retries:
+            logger.debug('no response to %r, sending again', pending.key)
+            self._transmit(pending)
+            return
+
+        # the response may have arrived in the meantime
+        if not self.discard(pending):
+            return
+
+        if pending.set_running_or_notify_cancel():
+            pending.set_exception(
+                RequestTimeout(
+                    'no response to {0!r} after {1} attempts'.format(
+                        pending.key,
+                        pending.attempts
+                    )
+                )
+            )
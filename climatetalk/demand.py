@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import threading
+
+from .writebehind import command_key
+
+# seconds before the refresh timer runs out that a demand is sent again
+DEFAULT_MARGIN = 15.0
+# a demand is never sent again sooner than this many seconds
+MIN_REFRESH_INTERVAL = 1.0
+
+
+class HeldDemand(object):
+    """
+    A demand that is kept alive, see :meth:`DemandRefresher.hold`.
+    """
+
+    def __init__(self, key, packet, interval):
+        self.key = key
+        self.packet = packet
+        self.interval = interval
+        self.timer = None
+        self.refreshes = 0
+
+
+class DemandRefresher(object):
+    """
+    Keeps demands alive.
+
+    Demands carry a refresh timer after which the equipment drops them.
+    Every demand that is held is sent again a little before its timer runs
+    out until it is released. The refreshes are scheduled on a
+    :class:`climatetalk.timers.TimingWheel` so any number of demands share
+    one thread.
+
+    Demands are keyed on (address, subnet, command code), holding a new
+    demand for a key replaces the one that was held.
+    """
+
+    def __init__(self, send, wheel, margin=DEFAULT_MARGIN):
+        """
+        :param send: callable that sends a packet, returns a future
+        :param wheel: :class:`climatetalk.timers.TimingWheel` the refreshes
+            are scheduled on
+        :param margin: seconds before the refresh timer runs out that the
+            demand is sent again
+        """
+        self._send = send
+        self._wheel = wheel
+        self.margin = margin
+        self._held = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._held)
+
+    def interval(self, duration):
+        """
+        :param duration: seconds of the refresh timer
+        :return: seconds between refreshes
+        """
+        if duration > self.margin * 2:
+            interval = duration - self.margin
+        else:
+            # short timers are refreshed halfway so the margin does not
+            # eat the whole timer
+            interval = duration / 2.0
+
+        return max(MIN_REFRESH_INTERVAL, interval)
+
+    def hold(self, packet, duration=None):
+        """
+        Sends a demand and keeps sending it until it is released.
+
+        :param packet: demand command, destination and subnet must be set
+        :param duration: seconds of the refresh timer, read from the packet
+            when ``None``
+        :return: :class:`concurrent.futures.Future` of the first send
+        """
+        key = command_key(packet)
+        if key is None:
+            raise ValueError('{0!r} is not a control command'.format(packet))
+
+        if duration is None:
+            duration = packet.refresh_timer.duration
+
+        future = self._send(packet)
+
+        if not duration:
+            # no refresh timer, the equipment keeps the demand on its own
+            self.cancel(*key)
+            return future
+
+        # every refresh is sent from this copy, changes the caller makes to
+        # its packet later do not reach the equipment
+        held = HeldDemand(
+            key,
+            packet.__class__(packet),
+            self.interval(duration)
+        )
+
+        with self._lock:
+            previous = self._held.get(key)
+            if previous is not None:
+                previous.timer.cancel()
+
+            self._held[key] = held
+            held.timer = self._wheel.schedule(
+                held.interval,
+                self._refresh,
+                held
+            )
+
+        return future
+
+    def release(self, packet):
+        """
+        Stops refreshing a demand and sends the command that ends it.
+
+        :param packet: demand command that turns the demand off
+        :return: :class:`concurrent.futures.Future` of the send
+        """
+        self.cancel(*command_key(packet))
+        return self._send(packet)
+
+    def cancel(self, address, subnet, command_code):
+        """
+        Stops refreshing a demand, nothing is sent.
+
+        :return: ``True`` if the demand was held
+        """
+        with self._lock:
+            held = self._held.pop((address, subnet, command_code), None)
+
+            if held is None:
+                return False
+
+            held.timer.cancel()
+
+        return True
+
+    def clear(self):
+        with self._lock:
+            for held in self._held.values():
+                held.timer.cancel()
+
+            self._held.clear()
+
+    def _refresh(self, held):
+        with self._lock:
+            if self._held.get(held.key) is not held:
+                return
+
+            held.refreshes += 1
+            held.timer = self._wheel.schedule(
+                held.interval,
+                self._refresh,
+                held
+            )
+
+        # the template itself is never handed out
+        self._send(held.packet.__class__(held.packet))
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import threading
+import logging
+from collections import deque
+
+from . import signal as _signal
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 64
+
+# what happens when a subscriber's queue for a node is full
+DROP_OLDEST = 'drop_oldest'  # the oldest packet is thrown away
+BLOCK = 'block'  # the reader waits until there is room
+COALESCE = 'coalesce'  # only the latest packet is kept
+
+OVERFLOW_POLICIES = (DROP_OLDEST, BLOCK, COALESCE)
+
+
+class Mailbox(object):
+    """
+    Packets waiting for one subscriber from one node.
+
+    A mailbox is handed to at most one worker at a time, which is what
+    keeps the packets from a node in order.
+    """
+
+    def __init__(self, key, subscription, size, policy):
+        self.key = key
+        self.subscription = subscription
+        self.size = size
+        self.policy = policy
+        self.queue = deque()
+        self.scheduled = False
+
+
+class Dispatcher(object):
+    """
+    Runs subscriber callbacks on a fixed pool of worker threads.
+
+    Every subscriber gets a bounded queue per (address, subnet). Packets
+    from the same node reach a subscriber in the order they were received,
+    packets from different nodes are handled in parallel. Workers take one
+    packet from a queue and put the queue back at the end of the line, so
+    a busy node does not starve the others.
+    """
+
+    def __init__(
+        self,
+        route=_signal.route,
+        workers=DEFAULT_WORKERS,
+        queue_size=DEFAULT_QUEUE_SIZE,
+        policy=DROP_OLDEST
+    ):
+        """
+        :param route: callable that takes the message type and the packet
+            and returns the subscriptions it goes to
+        :param workers: number of worker threads
+        :param queue_size: default size of the per node subscriber queues
+        :param policy: default overflow policy, one of
+            :data:`OVERFLOW_POLICIES`
+        """
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError('unknown overflow policy {0!r}'.format(policy))
+
+        self._route = route
+        self.workers = workers
+        self.queue_size = queue_size
+        self.policy = policy
+        self.dropped = 0
+        self._overrides = {}
+        self._mailboxes = {}
+        self._ready = deque()
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)
+        self._space = threading.Condition(self._lock)
+        self._event = threading.Event()
+        self._threads = []
+
+    def configure(self, subscription, queue_size=None, policy=None):
+        """
+        Overrides the queue size and overflow policy for one subscriber.
+
+        :param subscription: :class:`climatetalk.signal.Subscription`
+        :param queue_size: size of the per node queues, ``None`` for the
+            default
+        :param policy: overflow policy, ``None`` for the default
+        :return:
+        """
+        if policy is not None and policy not in OVERFLOW_POLICIES:
+            raise ValueError('unknown overflow policy {0!r}'.format(policy))
+
+        with self._lock:
+            self._overrides[subscription] = (queue_size, policy)
+
+    def dispatch(self, message_type, packet):
+        """
+        Queues a packet for every subscriber it is routed to.
+
+        :param message_type: message type of the packet
+        :param packet: received packet
+        :return:
+        """
+        node = (packet.source, packet.subnet)
+
+        for subscription in self._route(message_type, packet):
+            self._put(subscription, node, packet)
+
+    def submit(self, callback, node, item):
+        """
+        Queues a call of ``callback(item)`` on the workers. Calls for the
+        same callback and node run in the order they were queued, the
+        queue size and overflow policy apply like they do to subscribers.
+
+        :param callback: hashable callable, for example a bound method
+        :param node: (address, subnet) the item is about
+        :param item: passed to the callback
+        :return:
+        """
+        self._put(callback, node, item)
+
+    def _mailbox(self, subscription, node):
+        key = (subscription, node)
+        mailbox = self._mailboxes.get(key)
+
+        if mailbox is None:
+            size, policy = self._overrides.get(subscription, (None, None))
+            mailbox = Mailbox(
+                key,
+                subscription,
+                size or self.queue_size,
+                policy or self.policy
+            )
+            self._mailboxes[key] = mailbox
+
+        return mailbox
+
+    def _put(self, subscription, node, packet):
+        with self._lock:
+            if self._event.is_set():
+                return
+
+            mailbox = self._mailbox(subscription, node)
+            queue = mailbox.queue
+
+            if mailbox.policy == COALESCE:
+                if queue:
+                    queue.clear()
+                    self.dropped += 1
+
+            elif mailbox.policy == BLOCK:
+                while len(queue) >= mailbox.size:
+                    self._space.wait()
+                    if self._event.is_set():
+                        return
+
+                # the mailbox may have been emptied and removed while
+                # waiting
+                mailbox = self._mailbox(subscription, node)
+                queue = mailbox.queue
+
+            elif len(queue) >= mailbox.size:
+                queue.popleft()
+                self.dropped += 1
+
+            queue.append(packet)
+
+            if not mailbox.scheduled:
+                mailbox.scheduled = True
+                self._ready.append(mailbox)
+                self._work.notify()
+
+    def start(self):
+        if self._threads:
+            return
+
+        self._event.clear()
+
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._run,
+                name='climatetalk-dispatch-{0}'.format(i)
+            )
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        with self._lock:
+            self._event.set()
+            self._work.notify_all()
+            self._space.notify_all()
+
+        for thread in self._threads:
+            thread.join()
+
+        del self._threads[:]
+
+        with self._lock:
+            self._mailboxes.clear()
+            self._ready.clear()
+
+    def _next(self):
+        with self._lock:
+            while not self._ready and not self._event.is_set():
+                self._work.wait()
+
+            if self._event.is_set():
+                return None, None
+
+            mailbox = self._ready.popleft()
+            packet = mailbox.queue.popleft()
+            self._space.notify_all()
+
+            return mailbox, packet
+
+    def _done(self, mailbox):
+        with self._lock:
+            if mailbox.queue:
+                self._ready.append(mailbox)
+                self._work.notify()
+            else:
+                mailbox.scheduled = False
+                if self._mailboxes.get(mailbox.key) is mailbox:
+                    del self._mailboxes[mailbox.key]
+
+    def _run(self):
+        while True:
+            mailbox, packet = self._next()
+            if mailbox is None:
+                break
+
+            try:
+                mailbox.subscription(packet)
+            except Exception:  # NOQA
+                logger.exception(
+                    'signal callback %r failed',
+                    getattr(
+                        mailbox.subscription,
+                        'callback',
+                        mailbox.subscription
+                    )
+                )
+
+            self._done(mailbox)
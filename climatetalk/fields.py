@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import struct
+
+# byte order characters understood by struct
+_BYTE_ORDERS = '@=<>!'
+
+
+class Field(object):
+    """
+    Field at a fixed position in a packet.
+
+    The field is a descriptor, reading it unpacks the value straight out of
+    the packet with a precompiled :class:`struct.Struct` and setting it packs
+    the value back in. If the packet is too short to hold the field it is
+    padded with 0x00 first.
+
+    :param name: attribute name of the field
+    :param offset: byte position of the field in the packet
+    :param fmt: struct format of the field, big endian unless the format
+        starts with a byte order character
+    :param factory: called with the unpacked value, used to wrap byte strings
+        in types like :class:`climatetalk.mac_address.MACAddress`
+    """
+
+    def __init__(self, name, offset, fmt='B', factory=None):
+        if fmt[0] not in _BYTE_ORDERS:
+            fmt = '>' + fmt
+
+        self.name = name
+        self.offset = offset
+        self.fmt = fmt
+        self.factory = factory
+        self.struct = struct.Struct(fmt)
+        self.size = self.struct.size
+        self.end = offset + self.size
+
+    def __repr__(self):
+        return '<{0} {1} {2} {3!r}>'.format(
+            self.__class__.__name__,
+            self.name,
+            self.offset,
+            self.fmt
+        )
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        return self.get(instance)
+
+    def __set__(self, instance, value):
+        self.set(instance, value)
+
+    def convert(self, value):
+        if self.factory is not None:
+            value = self.factory(value)
+
+        return value
+
+    def get(self, data):
+        """
+        :param data: bytes like object holding the packet
+        :return: value of the field
+        """
+        return self.convert(self.struct.unpack_from(data, self.offset)[0])
+
+    def set(self, data, value):
+        """
+        :param data: bytearray holding the packet
+        :param value: new value of the field
+        :return:
+        """
+        if len(data) < self.end:
+            data.extend(bytearray(self.end - len(data)))
+
+        if self.fmt.endswith('s'):
+            value = bytes(bytearray(value))
+
+        self.struct.pack_into(data, self.offset, value)
+
+
+class BitField(Field):
+    """
+    Group of bits inside a single byte.
+
+    :param name: attribute name of the field
+    :param offset: byte position of the byte holding the bits
+    :param bit: position of the lowest bit, 0 is the least significant bit
+    :param width: number of bits
+    """
+
+    def __init__(self, name, offset, bit, width=1, factory=None):
+        Field.__init__(self, name, offset, 'B', factory)
+        self.bit = bit
+        self.width = width
+        self.mask = ((1 << width) - 1) << bit
+
+    def get(self, data):
+        return self.convert((data[self.offset] & self.mask) >> self.bit)
+
+    def set(self, data, value):
+        if len(data) < self.end:
+            data.extend(bytearray(self.end - len(data)))
+
+        data[self.offset] = (
+            (data[self.offset] & ~self.mask) |
+            (int(value) << self.bit & self.mask)
+        )
+
+
+class Schema(object):
+    """
+    The fields of a packet class.
+
+    :meth:`unpack` decodes every field at once. When the whole byte fields
+    share a byte order they are decoded with a single call to a struct
+    that covers all of them, bit fields are picked out of the packet
+    afterwards.
+    """
+
+    def __init__(self, fields=()):
+        self.fields = tuple(sorted(fields, key=lambda item: item.offset))
+        self.names = tuple(field.name for field in self.fields)
+        self.offset = 0
+        self.struct = None
+        self._packed = ()
+        self._simple = False
+        self._factories = None
+
+        packed = [
+            field for field in self.fields if type(field) is Field
+        ]
+
+        if not packed:
+            return
+
+        byte_orders = set(field.fmt[0] for field in packed)
+        overlaps = any(
+            prev.end > field.offset for prev, field in zip(packed, packed[1:])
+        )
+
+        if len(byte_orders) != 1 or overlaps:
+            return
+
+        fmt = [byte_orders.pop()]
+        position = packed[0].offset
+
+        for field in packed:
+            fmt.append('x' * (field.offset - position))
+            fmt.append(field.fmt[1:])
+            position = field.end
+
+        self.offset = packed[0].offset
+        self.struct = struct.Struct(''.join(fmt))
+        self._packed = tuple(field in packed for field in self.fields)
+        self._simple = (
+            all(self._packed) and
+            not any(field.factory for field in self.fields)
+        )
+
+        if all(self._packed):
+            # position and factory of each value that gets wrapped
+            self._factories = tuple(
+                (index, field.factory)
+                for index, field in enumerate(self.fields)
+                if field.factory is not None
+            )
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def unpack(self, data):
+        """
+        :param data: bytes like object holding the packet
+        :return: tuple of the field values in offset order, see
+            :attr:`names`
+        """
+        if self.struct is None:
+            return tuple(field.get(data) for field in self.fields)
+
+        values = self.struct.unpack_from(data, self.offset)
+
+        if self._simple:
+            return values
+
+        if self._factories is not None:
+            values = list(values)
+
+            for index, factory in self._factories:
+                values[index] = factory(values[index])
+
+            return tuple(values)
+
+        values = iter(values)
+
+        return tuple(
+            field.convert(next(values)) if packed else field.get(data)
+            for field, packed in zip(self.fields, self._packed)
+        )
+
+    def unpack_dict(self, data):
+        """
+        :param data: bytes like object holding the packet
+        :return: dict of field name to value
+        """
+        return dict(zip(self.names, self.unpack(data)))
+
+    def pack(self, data, *args, **kwargs):
+        """
+        Sets fields by position (in offset order) or by name.
+
+        :param data: bytearray holding the packet
+        :return:
+        """
+        values = dict(zip(self.names, args))
+        values.update(kwargs)
+
+        unknown = set(values) - set(self.names)
+        if unknown:
+            raise AttributeError(
+                'unknown fields: {0}'.format(', '.join(sorted(unknown)))
+            )
+
+        for field in self.fields:
+            if field.name in values:
+                field.set(data, values[field.name])
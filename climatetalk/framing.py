@@ -0,0 +1,399 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+from .checksum import fletcher, FletcherChecksum
+
+RECEIVE_BUFFER_SIZE = 4096
+
+# compact the buffer once less than this many bytes are free at its end
+MIN_READ_SIZE = 512
+
+# frame layout, see the packet breakdown in packet.py
+HEADER_SIZE = 10
+CHECKSUM_SIZE = 2
+LENGTH_OFFSET = 9
+MIN_FRAME_SIZE = HEADER_SIZE + CHECKSUM_SIZE
+MAX_PAYLOAD_LENGTH = 240
+
+
+def find_frames(data, start=0, end=None):
+    """
+    Locates frames using only the header layout and the checksum.
+
+    The payload length in byte 9 gives the size of a candidate frame. If the
+    checksum at the end of the candidate matches, the frame is accepted and
+    the search continues after it. If it does not match the search slides
+    forward a single byte and tries again, which resynchronizes the stream
+    after corruption. A candidate that runs past the end of the data is
+    waited for unless a complete good frame starts inside it, then the
+    bytes up to that frame are skipped. No timing information is used.
+
+    :param data: bytes like object to search
+    :param start: offset to start searching at
+    :param end: offset to stop searching at
+    :return: (frames, position, skipped)
+        frames is a list of (offset, size) tuples, position is the offset
+        of the first byte that has not been processed (the start of an
+        incomplete frame) and skipped is the number of bytes that were
+        thrown away while resynchronizing.
+    """
+    view = memoryview(data)
+    if end is None:
+        end = len(view)
+
+    frames = []
+    skipped = 0
+    position = start
+
+    while end - position >= MIN_FRAME_SIZE:
+        length = view[position + LENGTH_OFFSET]
+
+        if length > MAX_PAYLOAD_LENGTH:
+            position += 1
+            skipped += 1
+            continue
+
+        size = length + MIN_FRAME_SIZE
+        if end - position < size:
+            # the length byte may be garbage. If a whole good frame follows
+            # it, waiting for the rest of this one would hold that frame
+            # back until more data arrives.
+            following = _next_frame(view, position + 1, end)
+            if following is None:
+                break
+
+            skipped += following - position
+            position = following
+            continue
+
+        checksum_offset = position + size - CHECKSUM_SIZE
+        check1, check2 = fletcher(view, position, checksum_offset)
+
+        if (
+            view[checksum_offset] == check1 and
+            view[checksum_offset + 1] == check2
+        ):
+            frames.append((position, size))
+            position += size
+        else:
+            position += 1
+            skipped += 1
+
+    return frames, position, skipped
+
+
+def _next_frame(view, start, end):
+    """
+    :return: offset of the first complete frame with a good checksum
+        between ``start`` and ``end`` or ``None``
+    """
+    for position in range(start, end - MIN_FRAME_SIZE + 1):
+        length = view[position + LENGTH_OFFSET]
+        size = length + MIN_FRAME_SIZE
+
+        if length > MAX_PAYLOAD_LENGTH or end - position < size:
+            continue
+
+        checksum_offset = position + size - CHECKSUM_SIZE
+        check1, check2 = fletcher(view, position, checksum_offset)
+
+        if (
+            view[checksum_offset] == check1 and
+            view[checksum_offset + 1] == check2
+        ):
+            return position
+
+    return None
+
+
+class ReceiveBuffer(object):
+    """
+    Preallocated receive buffer.
+
+    Data is read straight into the free space at the end of the buffer using
+    ``recv_into`` and frames are sliced back out of it, so the receive path
+    does not allocate for every byte that comes in. Consumed data is dropped
+    by moving the unread remainder back to the front of the buffer, this
+    keeps every frame contiguous.
+
+    With ``recycle`` set to ``False`` memory that has been read into is
+    never written again. The unread remainder moves to a new buffer instead
+    and the old one is left to the views that still point into it, so
+    those views stay valid for as long as they are kept.
+    """
+
+    def __init__(self, size=RECEIVE_BUFFER_SIZE, recycle=True):
+        self._buffer = bytearray(size)
+        self._view = memoryview(self._buffer)
+        self.size = size
+        self.recycle = recycle
+        self.start = 0
+        self.end = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def writable(self):
+        """
+        :return: memoryview over the free space at the end of the buffer
+        """
+        if self.size - self.end < MIN_READ_SIZE:
+            self.compact()
+
+            if self.end == self.size:
+                # nothing has been consumed and the buffer is full, no frame
+                # is this large so it is garbage on the line. Drop it.
+                self.clear()
+
+        return self._view[self.end:]
+
+    def commit(self, count):
+        """
+        :param count: number of bytes written into :meth:`writable`
+        :return:
+        """
+        self.end += count
+
+    def write(self, data):
+        data = memoryview(data)
+
+        while data:
+            view = self.writable()
+            count = min(len(view), len(data))
+            view[:count] = data[:count]
+            self.commit(count)
+            data = data[count:]
+
+    def view(self, start=None, end=None):
+        """
+        :return: memoryview over the unread data
+        """
+        if start is None:
+            start = self.start
+        if end is None:
+            end = self.end
+
+        return self._view[start:end]
+
+    def consume(self, count):
+        self.start += count
+        if self.start >= self.end and self.recycle:
+            self.start = self.end = 0
+
+    def compact(self):
+        length = self.end - self.start
+
+        if not self.recycle:
+            buffer = bytearray(self.size)
+            buffer[:length] = self._view[self.start:self.end]
+            self._buffer = buffer
+            self._view = memoryview(buffer)
+        elif length and self.start:
+            self._view[:length] = self._view[self.start:self.end]
+
+        self.start = 0
+        self.end = length
+
+    def clear(self):
+        self.start = self.end
+        self.compact()
+
+
+class FrameDelimiter(object):
+    """
+    Splits a received byte stream into frames using the inter character gap.
+
+    Only a single deadline is kept, the one for the frame that is currently
+    being received. Every time data arrives the deadline is pushed out by
+    ``threshold`` microseconds. The reading thread uses :meth:`timeout` as
+    the timeout for its next read, if that read comes back empty the
+    deadline has passed and :meth:`expire` hands back the finished frame.
+
+    Data is collected in a :class:`ReceiveBuffer`. A reader can either pass
+    received bytes to :meth:`feed` or read straight into
+    ``delimiter.buffer.writable()`` and report the count with
+    :meth:`commit`.
+
+    The checksum of the frame is updated as the data arrives. When the frame
+    closes it is already known to be good or bad, bad frames are counted in
+    :attr:`dropped` and never handed back. Frames sent back to back leave
+    no gap between them and a TCP read can hold more than one, so data that
+    does not check out as a single frame is split on its length bytes with
+    :func:`find_frames`.
+    """
+
+    def __init__(self, threshold, buffer_size=RECEIVE_BUFFER_SIZE):
+        """
+        :param threshold: inter character gap in microseconds
+        :param buffer_size: size of the receive buffer in bytes
+        """
+        self.threshold = threshold
+        self.buffer = ReceiveBuffer(buffer_size)
+        self.checksum = FletcherChecksum()
+        self.dropped = 0
+        self._deadline = None
+
+    @property
+    def is_idle(self):
+        return self._deadline is None
+
+    def feed(self, data, now):
+        """
+        :param data: bytes that were just received
+        :param now: timestamp in microseconds (us)
+        :return:
+        """
+        if data:
+            self.buffer.write(data)
+            self.checksum.update(data)
+            self._deadline = now + self.threshold
+
+    def commit(self, count, now):
+        """
+        :param count: number of bytes read into ``buffer.writable()``
+        :param now: timestamp in microseconds (us)
+        :return:
+        """
+        if count:
+            buffer = self.buffer
+            buffer.commit(count)
+            self.checksum.update(buffer.view(buffer.end - count))
+            self._deadline = now + self.threshold
+
+    def timeout(self, now):
+        """
+        :param now: timestamp in microseconds (us)
+        :return: seconds until the current frame closes or ``None`` if idle
+        """
+        if self._deadline is None:
+            return None
+
+        remaining = self._deadline - now
+        if remaining <= 0:
+            return 0.0
+
+        return remaining / 1e6
+
+    def reset(self):
+        """
+        Drops the data received so far.
+        """
+        self.buffer.clear()
+        self.checksum.reset()
+        self._deadline = None
+
+    def expire(self, now):
+        """
+        :param now: timestamp in microseconds (us)
+        :return: list of the frames that completed, empty if the current
+            frame is still being received
+        """
+        if self._deadline is None or now < self._deadline:
+            return []
+
+        return self.flush()
+
+    def flush(self):
+        """
+        :return: list of the frames received so far, corrupt ones are left
+            out
+        """
+        buffer = self.buffer
+        checksum = self.checksum
+        self._deadline = None
+
+        if not len(buffer):
+            checksum.reset()
+            return []
+
+        view = buffer.view()
+
+        if (
+            len(view) >= MIN_FRAME_SIZE and
+            checksum.is_valid and
+            len(view) == view[LENGTH_OFFSET] + MIN_FRAME_SIZE
+        ):
+            frames = [bytearray(view)]
+        else:
+            # frames sent back to back can arrive without a gap between
+            # them, they are split on their length bytes
+            found, position, skipped = find_frames(view)
+            frames = [
+                bytearray(view[offset:offset + size])
+                for offset, size in found
+            ]
+
+            if not frames or skipped or position != len(view):
+                self.dropped += 1
+
+        buffer.consume(len(view))
+        checksum.reset()
+
+        return frames
+
+
+class ChecksumFramer(object):
+    """
+    Splits a received byte stream into frames using :func:`find_frames`.
+
+    This does not rely on timing at all, so it works over an RS485 to IP
+    bridge where TCP merges and splits the data and the gaps between
+    characters and packets are lost.
+
+    With ``copy`` set to ``False`` the frames are memoryviews into the
+    receive buffer instead of copies. The buffer does not recycle its
+    memory then, see :class:`ReceiveBuffer`, so the views stay valid after
+    more data is read.
+    """
+
+    def __init__(self, buffer_size=RECEIVE_BUFFER_SIZE, copy=True):
+        self.buffer = ReceiveBuffer(buffer_size, recycle=copy)
+        self.copy = copy
+        self.skipped = 0
+
+    def feed(self, data):
+        """
+        :param data: bytes that were just received
+        :return: list of completed frames
+        """
+        frames = []
+        data = memoryview(data)
+
+        while data:
+            view = self.buffer.writable()
+            count = min(len(view), len(data))
+            view[:count] = data[:count]
+            frames.extend(self.commit(count))
+            data = data[count:]
+
+        return frames
+
+    def commit(self, count):
+        """
+        :param count: number of bytes read into ``buffer.writable()``
+        :return: list of completed frames
+        """
+        buffer = self.buffer
+        buffer.commit(count)
+
+        found, position, skipped = find_frames(
+            buffer.view(0),
+            buffer.start,
+            buffer.end
+        )
+
+        self.skipped += skipped
+        frames = [buffer.view(offset, offset + size) for offset, size in found]
+
+        if self.copy:
+            frames = [bytearray(frame) for frame in frames]
+
+        buffer.consume(position - buffer.start)
+
+        return frames
+
+    def reset(self):
+        """
+        Drops the data received so far.
+        """
+        self.buffer.clear()
@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import threading
+from concurrent.futures import Future
+
+from ..airtime import CONTROL, INTERACTIVE
+from ..cache import CONFIGURATION, STATUS, SENSOR
+from ..packet import (
+    GetConfigurationRequest,
+    GetConfigurationResponse,
+    GetStatusRequest,
+    GetStatusResponse,
+    GetSensorDataRequest,
+    GetSensorDataResponse
+)
+
+# large enough for any payload, stands in for the real one while read works
+# out which snapshots a property uses
+_BLANK_PAYLOAD = bytearray(256)
+
+
+class _Recording(Exception):
+    pass
+
+
+class MDIBase(object):
+    # snapshot kind -> (request class, response class)
+    _snapshot_types = {
+        CONFIGURATION: (GetConfigurationRequest, GetConfigurationResponse),
+        STATUS: (GetStatusRequest, GetStatusResponse),
+        SENSOR: (GetSensorDataRequest, GetSensorDataResponse)
+    }
+
+    def __init__(self, network, address, subnet, mac_address, session_id):
+        self.network = network
+        self.address = address
+        self.subnet = subnet
+        self.mac_address = mac_address
+        self.session_id = session_id
+        # per thread state used by read
+        self._local = threading.local()
+
+    def _send(self, packet, patch=None):
+        """
+        Sends a command to the node.
+
+        A command changes what the node reports, so the cached snapshots of
+        the node are dropped. When it is known which bytes the command
+        changes pass them in ``patch`` and the cached snapshots are
+        updated in place instead, once the command went through. A command
+        that fails drops the snapshots.
+
+        Commands go through the write behind queue of the network, when
+        the same command is set again before it was sent only the last
+        value goes out.
+
+        :type packet: .. py:class:: climatetalk.packet.Packet
+        :param patch: iterable of (kind, byte_num, data)
+        :return: :class:`concurrent.futures.Future`
+        """
+        packet.destination = self.address
+        packet.subnet = self.subnet
+        packet.packet_number = 0x00
+        future = self.network.writer.submit(packet, priority=CONTROL)
+
+        snapshots = self.network.snapshots
+        address = self.address
+        subnet = self.subnet
+
+        def done(sent):
+            if (
+                patch is None or
+                sent.cancelled() or
+                sent.exception() is not None
+            ):
+                # also drops anything that was read again before the
+                # command went out
+                snapshots.invalidate(address, subnet)
+                return
+
+            for kind, byte_num, data in patch:
+                snapshots.patch(
+                    (address, subnet, kind),
+                    byte_num,
+                    bytearray(data)
+                )
+
+        if patch is None:
+            snapshots.invalidate(address, subnet)
+
+        future.add_done_callback(done)
+        return future
+
+    def flush(self, timeout=None):
+        """
+        Waits for the commands sent to the node to complete, with
+        ``ack_commands`` set on the network that is once the node has
+        acknowledged the last of them.
+
+        :param timeout: seconds to wait, ``None`` waits until they are done
+        :return: ``True`` if all of them completed
+        """
+        return self.network.writer.flush(self.address, self.subnet, timeout)
+
+    def _request(self, packet, response_type, db_id=None):
+        """
+        Sends a request to the node and waits for the response.
+
+        :type packet: .. py:class:: climatetalk.packet.Packet
+        :param response_type: message type of the expected response
+        :param db_id: DB ID the response must carry
+        :return: the response packet
+        :raises climatetalk.correlator.RequestTimeout: no response arrived
+        """
+        if getattr(self._local, 'ranges', None) is not None:
+            # a property that talks to the node directly can not be
+            # batched, read calls it again for real afterwards
+            raise _Recording
+
+        return self._submit(packet, response_type, db_id).result()
+
+    def _submit(self, packet, response_type, db_id=None, priority=INTERACTIVE):
+        packet.destination = self.address
+        packet.subnet = self.subnet
+        packet.packet_number = 0x00
+        return self.network.request(
+            packet,
+            response_type,
+            db_id,
+            priority=priority
+        )
+
+    def _fetch_snapshot(self, kind):
+        request_class, response_class = self._snapshot_types[kind]
+        response = self._request(request_class(), response_class.message_type)
+        return response.payload_data
+
+    def _snapshot(self, kind):
+        """
+        :param kind: :data:`climatetalk.cache.CONFIGURATION`,
+            :data:`climatetalk.cache.STATUS` or
+            :data:`climatetalk.cache.SENSOR`
+        :return: the whole payload, from the cache when it is fresh
+        """
+        local = self._local
+
+        if getattr(local, 'ranges', None) is not None:
+            # the whole payload is used
+            local.ranges.add((kind, 0, None))
+            return _BLANK_PAYLOAD
+
+        pinned = getattr(local, 'pinned', None)
+        if pinned is not None and kind in pinned:
+            return pinned[kind]
+
+        return self.network.snapshots.get(
+            (self.address, self.subnet, kind),
+            lambda: self._fetch_snapshot(kind)
+        )
+
+    def _slice(self, kind, byte_num, num_bytes):
+        start = byte_num
+        end = byte_num + num_bytes + 1
+        ranges = getattr(self._local, 'ranges', None)
+
+        if ranges is not None:
+            ranges.add((kind, start, end))
+            return _BLANK_PAYLOAD[start:end]
+
+        return self._snapshot(kind)[start:end]
+
+    def _get_status_mdi(self, byte_num, num_bytes):
+        return self._slice(STATUS, byte_num, num_bytes)
+
+    def _get_mdi(self, byte_num, num_bytes):
+        return self._slice(CONFIGURATION, byte_num, num_bytes)
+
+    def _record(self, names):
+        # evaluates the properties against blank payloads to find out
+        # which bytes of which snapshots they read
+        local = self._local
+        fields = {}
+
+        try:
+            for name in names:
+                local.ranges = set()
+
+                try:
+                    getattr(self, name)
+                except Exception:  # NOQA
+                    pass
+
+                fields[name] = local.ranges
+        finally:
+            local.ranges = None
+
+        return fields
+
+    def refresh(self, kinds=(STATUS,), priority=INTERACTIVE):
+        """
+        Requests snapshots of the node without waiting for them. They are
+        requested at the same time and stored in the snapshot cache as the
+        responses come in.
+
+        :param kinds: snapshot kinds
+        :param priority: one of :data:`climatetalk.airtime.PRIORITIES`
+        :return: :class:`concurrent.futures.Future`, the result is a dict
+            of kind to payload
+        """
+        snapshots = self.network.snapshots
+        result = Future()
+        payloads = {}
+        pending = []
+        lock = threading.Lock()
+
+        for kind in kinds:
+            request_class, response_class = self._snapshot_types[kind]
+            pending.append((
+                kind,
+                self._submit(
+                    request_class(),
+                    response_class.message_type,
+                    priority=priority
+                )
+            ))
+
+        def done(kind, future):
+            failed = future.cancelled() or future.exception() is not None
+
+            if not failed:
+                data = bytearray(future.result().payload_data)
+                snapshots.put((self.address, self.subnet, kind), data)
+
+            with lock:
+                if result.done():
+                    return
+
+                if future.cancelled():
+                    result.cancel()
+                elif failed:
+                    result.set_exception(future.exception())
+                else:
+                    payloads[kind] = data
+                    if len(payloads) == len(pending):
+                        result.set_result(payloads)
+
+        if not pending:
+            result.set_result(payloads)
+
+        for kind, future in pending:
+            future.add_done_callback(
+                lambda f, kind=kind: done(kind, f)
+            )
+
+        return result
+
+    def _fetch_snapshots(self, kinds, cached=True, priority=INTERACTIVE):
+        snapshots = self.network.snapshots
+        result = {}
+        missing = []
+
+        for kind in kinds:
+            key = (self.address, self.subnet, kind)
+            data = snapshots.peek(key) if cached else None
+
+            if data is None:
+                missing.append(kind)
+            else:
+                result[kind] = data
+
+        if missing:
+            result.update(self.refresh(missing, priority).result())
+
+        return result
+
+    def _decode(self, names, pinned):
+        self._local.pinned = pinned
+
+        try:
+            return dict((name, getattr(self, name)) for name in names)
+        finally:
+            self._local.pinned = None
+
+    def read(self, names):
+        """
+        Reads several properties at once.
+
+        The snapshots the properties are decoded from are worked out first
+        and every one of them that is not in the cache is requested at the
+        same time, so reading any number of properties costs at most one
+        round trip per snapshot kind. All of the values are decoded from
+        the same set of snapshots.
+
+            values = thermostat.read(['heat_setpoint', 'cool_setpoint'])
+
+        :param names: iterable of property names
+        :return: dict of property name to value
+        :raises climatetalk.correlator.RequestTimeout: a snapshot could not
+            be read
+        """
+        names = list(names)
+        kinds = set(
+            kind
+            for ranges in self._record(names).values()
+            for kind, _, _ in ranges
+        )
+        return self._decode(names, self._fetch_snapshots(kinds))
+
+    def watch(self, names, callback):
+        """
+        Watches properties for changes.
+
+        The bytes every property is decoded from are worked out once. Each
+        time a new snapshot of the node is stored, because it was read or
+        because a response to another master was seen on the bus, only
+        those bytes are compared and only the properties whose bytes
+        changed are decoded.
+
+        :param names: iterable of property names
+        :param callback: called as ``callback(mdi, changes)`` where
+            ``changes`` is a dict of property name to new value
+        :return: :class:`Watch`
+        """
+        return Watch(self, names, callback)
+
+
+class Watch(object):
+    """
+    Properties of a node that are being watched, see :meth:`MDIBase.watch`.
+
+    The first snapshot that is seen is the baseline and does not call the
+    callback. The changes are decoded and the callback is called on the
+    workers of the :class:`climatetalk.dispatch.Dispatcher` of the
+    network, in the order the snapshots were stored, so a slow callback
+    does not hold up reading the bus.
+    """
+
+    def __init__(self, mdi, names, callback):
+        self.mdi = mdi
+        self.callback = callback
+        self._fields = mdi._record(names)
+        self._keys = set(
+            (mdi.address, mdi.subnet, kind)
+            for ranges in self._fields.values()
+            for kind, _, _ in ranges
+        )
+
+        for key in self._keys:
+            mdi.network.snapshots.watch(key, self._changed)
+
+    @property
+    def kinds(self):
+        return set(key[2] for key in self._keys)
+
+    def poll(self):
+        """
+        Reads the watched snapshots from the node, bypassing the cache.
+        If anything changed the callback is queued before this returns.
+
+        :return:
+        """
+        self.mdi.refresh(self.kinds).result()
+
+    def cancel(self):
+        for key in self._keys:
+            self.mdi.network.snapshots.unwatch(key, self._changed)
+
+    def _changed(self, key, old, new):
+        # called on the thread that stored the snapshot
+        if old is not None:
+            self.mdi.network.dispatcher.submit(
+                self._notify,
+                key[:2],
+                (key, old, new)
+            )
+
+    def _notify(self, change):
+        key, old, new = change
+        kind = key[2]
+        snapshots = self.mdi.network.snapshots
+        pinned = {kind: new}
+        names = []
+
+        for name, ranges in self._fields.items():
+            if not any(
+                k == kind and old[start:end] != new[start:end]
+                for k, start, end in ranges
+            ):
+                continue
+
+            # a property that also reads another snapshot is only decoded
+            # when that one is cached, fetching it here would hold up the
+            # other callbacks for the node
+            for k, _, _ in ranges:
+                if k not in pinned:
+                    pinned[k] = snapshots.peek(key[:2] + (k,))
+
+            if all(pinned[k] is not None for k, _, _ in ranges):
+                names.append(name)
+
+        if names:
+            self.callback(self.mdi, self.mdi._decode(names, pinned))
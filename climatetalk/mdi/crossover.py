@@ -2,17 +2,11 @@
 # Copyright 2020 Kevin Schlosser
 
 import datetime
-import threading
 from ..utils import (
     get_bit as _get_bit,
     set_bit as _set_bit
 )
 
-from ..packet import (
-    GetConfigurationRequest,
-    GetStatusRequest
-)
-
 from ..commands import (
     FanKeySelection,
     DefrostDemand,
@@ -30,6 +24,7 @@ from ..commands import (
     FAN_DEMAND_EMERGENCY_HEAT as _FAN_DEMAND_EMERGENCY_HEAT,
     FAN_DEMAND_DEFROST as _FAN_DEMAND_DEFROST
 )
+from .base import MDIBase
 
 
 CROSSOVER_CAPABLE = 0x01
@@ -62,87 +57,7 @@ CROSSOVER_FAN_STATUS_ALWAYS_ON = 0x01
 CROSSOVER_FAN_STATUS_OCCUPIED_ON = 0x02
 
 
-class CrossoverMDI(object):
-    def __init__(self, network, address, subnet, mac_address, session_id):
-        self.network = network
-        self.address = address
-        self.subnet = subnet
-        self.mac_address = mac_address
-        self.session_id = session_id
-
-    def _send(self, packet):
-        """
-        :type packet: .. py:class:: climatetalk.packet.Packet
-        :return:
-        """
-        packet.destination = self.address
-        packet.subnet = self.subnet
-        packet.packet_number = 0x00
-        self.network.send(packet)
-
-    def _get_status_mdi(self, byte_num, num_bytes):
-        num_bytes += 1
-
-        packet = GetStatusRequest()
-        packet.destination = self.address
-        packet.subnet = self.subnet
-        packet.packet_number = 0x00
-
-        event = threading.Event()
-
-        data = bytearray()
-
-        def callback(response):
-            data.extend(
-                response.payload_data[byte_num:byte_num + num_bytes]
-            )
-            GetConfigurationRequest.message_type.disconnect(
-                self.address,
-                self.subnet
-            )
-            event.set()
-
-        GetConfigurationRequest.message_type.connect(
-            self.address,
-            self.subnet,
-            callback
-        )
-
-        self.network.send(packet)
-        event.wait()
-        return data
-
-    def _get_mdi(self, byte_num, num_bytes):
-        num_bytes += 1
-
-        packet = GetConfigurationRequest()
-        packet.destination = self.address
-        packet.subnet = self.subnet
-        packet.packet_number = 0x00
-
-        event = threading.Event()
-
-        data = bytearray()
-
-        def callback(response):
-            data.extend(
-                response.payload_data[byte_num:byte_num + num_bytes]
-            )
-            GetConfigurationRequest.message_type.disconnect(
-                self.address,
-                self.subnet
-            )
-            event.set()
-
-        GetConfigurationRequest.message_type.connect(
-            self.address,
-            self.subnet,
-            callback
-        )
-
-        self.network.send(packet)
-        event.wait()
-        return data
+class CrossoverMDI(MDIBase):
 
     @property
     def fan_speeds(self):
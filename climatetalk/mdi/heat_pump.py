@@ -2,17 +2,11 @@
 # Copyright 2020 Kevin Schlosser
 
 import datetime
-import threading
 from ..utils import (
     get_bit as _get_bit,
     set_bit as _set_bit
 )
 
-from ..packet import (
-    GetConfigurationRequest,
-    GetStatusRequest
-)
-
 from ..commands import (
     DefrostDemand,
     HeatDemand,
@@ -26,6 +20,7 @@ from ..commands import (
     FAN_DEMAND_EMERGENCY_HEAT as _FAN_DEMAND_EMERGENCY_HEAT,
     FAN_DEMAND_DEFROST as _FAN_DEMAND_DEFROST
 )
+from .base import MDIBase
 
 HEAT_PUMP_CAPABLE = 0x01
 HEAT_PUMP_NOT_CAPABLE = 0x00
@@ -44,91 +39,10 @@ HEAT_PUMP_FAN_MOTOR_SIZE_ONE_HP = 0x0C  # 1/3 HP
 HEAT_PUMP_FAN_MOTOR_SIZE_TWO_HP = 0x18  # 1/3 HP
 
 
-class HeatPumpMDI(object):
-
-    def __init__(self, network, address, subnet, mac_address, session_id):
-        self.network = network
-        self.address = address
-        self.subnet = subnet
-        self.mac_address = mac_address
-        self.session_id = session_id
+class HeatPumpMDI(MDIBase):
 
-    def _send(self, packet):
-        """
-        :type packet: .. py:class:: climatetalk.packet.Packet
-        :return:
-        """
-        packet.destination = self.address
-        packet.subnet = self.subnet
-        packet.packet_number = 0x00
-        self.network.send(packet)
-
-    def _get_status_mdi(self, byte_num, num_bytes):
-        num_bytes += 1
-
-        packet = GetStatusRequest()
-        packet.destination = self.address
-        packet.subnet = self.subnet
-        packet.packet_number = 0x00
-
-        event = threading.Event()
-
-        data = bytearray()
-
-        def callback(response):
-            data.extend(
-                response.payload_data[byte_num:byte_num + num_bytes]
-            )
-            GetConfigurationRequest.message_type.disconnect(
-                self.address,
-                self.subnet
-            )
-            event.set()
-
-        GetConfigurationRequest.message_type.connect(
-            self.address,
-            self.subnet,
-            callback
-        )
-
-        self.network.send(packet)
-        event.wait()
-        return data
-
-    def _get_mdi(self, byte_num, num_bytes):
-        num_bytes += 1
-
-        packet = GetConfigurationRequest()
-        packet.destination = self.address
-        packet.subnet = self.subnet
-        packet.packet_number = 0x00
-
-        event = threading.Event()
-
-        data = bytearray()
-
-        def callback(response):
-            data.extend(
-                response.payload_data[byte_num:byte_num + num_bytes]
-            )
-            GetConfigurationRequest.message_type.disconnect(
-                self.address,
-                self.subnet
-            )
-            event.set()
-
-        GetConfigurationRequest.message_type.connect(
-            self.address,
-            self.subnet,
-            callback
-        )
-
-        self.network.send(packet)
-        event.wait()
-        return data
-
-    _get_mdi_1 = _get_mdi
-    _get_mdi_2 = _get_mdi
+    _get_mdi_1 = MDIBase._get_mdi
+    _get_mdi_2 = MDIBase._get_mdi
 
     @property
     def fan_speeds(self):
@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 # Copyright 2020 Kevin Schlosser
 
-import threading
 from ..utils import (
     TwosCompliment,
     get_bit as _get_bit,
@@ -52,6 +51,7 @@ from ..commands import (
     SetDemandRampTime,
     SetInducerRampRate
 )
+from .base import MDIBase
 
 
 from ..commands import (
@@ -124,18 +124,7 @@ MOTOR_DIRECTION_CLOCKWISE = 0x01
 MOTOR_DIRECTION_COUNTER_CLOCKWISE = 0x00
 
 
-class MotorMDI(object):
-
-    def __init__(self, network, address, subnet, mac_address, session_id):
-        self.network = network
-        self.address = address
-        self.subnet = subnet
-        self.mac_address = mac_address
-        self.session_id = session_id
-
-    def _send(self, packet):
-        packet.destination = self.address
-        packet.subnet = self.subnet
+class MotorMDI(MDIBase):
 
     def _get_ident_mdi(self, byte_num, num_bytes):
         return self._get_mdi(DMA_READ_MDI_TYPE_IDENTIFICATION, byte_num, num_bytes)
@@ -148,28 +137,16 @@ class MotorMDI(object):
 
     def _get_mdi(self, mdi_type, byte_num, num_bytes):
         packet = DirectMemoryAccessReadRequest()
-        packet.destination = self.address
-        packet.subnet = self.subnet
-        packet.packet_number = 0x00
         packet.payload_mdi = mdi_type
         packet.payload_packet_number = 0x00
         packet.payload_start_byte = byte_num
         packet.payload_byte_count = num_bytes
 
-        event = threading.Event()
-
-        data = bytearray()
-
-        def callback(response):
-            data.extend(response.payload_data)
-            DirectMemoryAccessReadResponseMotor.message_type.disconnect(self.address, self.subnet)
-            event.set()
-
-        DirectMemoryAccessReadResponseMotor.message_type.connect(self.address, self.subnet, callback)
-
-        self.network.send(packet)
-        event.wait()
-        return data
+        response = self._request(
+            packet,
+            DirectMemoryAccessReadResponseMotor.message_type
+        )
+        return response.payload_data
 
     @property
     def speed(self):
@@ -1,8 +1,6 @@
 # -*- coding: utf-8 -*-
 # Copyright 2020 Kevin Schlosser
 
-import threading
-
 from ..packet import GetSensorDataRequest, GetSensorDataResponse
 from ..utils import (
     get_bit as _get_bit,
@@ -25,30 +23,18 @@ class SensorBase(object):
         packet.subnet = self.subnet
         packet.packet_number = 0x00
 
-        event = threading.Event()
+        response = self.network.request(
+            packet,
+            GetSensorDataResponse.message_type
+        ).result()
 
         data = bytearray()
 
-        def callback(response):
-            for sensor_data in response:
-                if sensor_data.id == self.mdi_id:
-                    data.append(sensor_data.data[0] << 8 | sensor_data.data[0])
-                    break
-
-            GetSensorDataResponse.message_type.disconnect(
-                self.address,
-                self.subnet
-            )
-            event.set()
-
-        GetSensorDataResponse.message_type.connect(
-            self.address,
-            self.subnet,
-            callback
-        )
-
-        self.network.send(packet)
-        event.wait()
+        for sensor_data in response:
+            if sensor_data.id == self.mdi_id:
+                data.append(sensor_data.data[0] << 8 | sensor_data.data[0])
+                break
+
         return data
 
     @property
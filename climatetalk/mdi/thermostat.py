@@ -3,18 +3,13 @@
 
 
 import datetime
-import threading
+from ..cache import STATUS
 from ..utils import (
     get_bit as _get_bit,
     set_bit as _set_bit,
     TwosCompliment
 )
 
-from ..packet import (
-    GetConfigurationRequest,
-    GetStatusRequest
-)
-
 from ..commands import (
     SystemSwitchModify,
     HeatSetPointTemperatureModify,
@@ -64,6 +59,7 @@ from ..commands import (
     FAN_DEMAND_EMERGENCY_HEAT as _FAN_DEMAND_EMERGENCY_HEAT,
     FAN_DEMAND_DEFROST as _FAN_DEMAND_DEFROST
 )
+from .base import MDIBase
 
 
 THERMOSTAT_SYSTEM_TYPE_UNKNOWN = 0x00
@@ -135,88 +131,7 @@ THERMOSTAT_FAN_STATUS_ALWAYS_ON = 0x01
 THERMOSTAT_FAN_STATUS_OCCUPIED_ON = 0x02
 
 
-class ThermostatMDI(object):
-
-    def __init__(self, network, address, subnet, mac_address, session_id):
-        self.network = network
-        self.address = address
-        self.subnet = subnet
-        self.mac_address = mac_address
-        self.session_id = session_id
-
-    def _send(self, packet):
-        """
-        :type packet: .. py:class:: climatetalk.packet.Packet
-        :return:
-        """
-        packet.destination = self.address
-        packet.subnet = self.subnet
-        packet.packet_number = 0x00
-        self.network.send(packet)
-
-    def _get_status_mdi(self, byte_num, num_bytes):
-        num_bytes += 1
-
-        packet = GetStatusRequest()
-        packet.destination = self.address
-        packet.subnet = self.subnet
-        packet.packet_number = 0x00
-
-        event = threading.Event()
-
-        data = bytearray()
-
-        def callback(response):
-            data.extend(
-                response.payload_data[byte_num:byte_num + num_bytes]
-            )
-            GetConfigurationRequest.message_type.disconnect(
-                self.address,
-                self.subnet
-            )
-            event.set()
-
-        GetConfigurationRequest.message_type.connect(
-            self.address,
-            self.subnet,
-            callback
-        )
-
-        self.network.send(packet)
-        event.wait()
-        return data
-
-    def _get_mdi(self, byte_num, num_bytes):
-        num_bytes += 1
-
-        packet = GetConfigurationRequest()
-        packet.destination = self.address
-        packet.subnet = self.subnet
-        packet.packet_number = 0x00
-
-        event = threading.Event()
-
-        data = bytearray()
-
-        def callback(response):
-            data.extend(
-                response.payload_data[byte_num:byte_num + num_bytes]
-            )
-            GetConfigurationRequest.message_type.disconnect(
-                self.address,
-                self.subnet
-            )
-            event.set()
-
-        GetConfigurationRequest.message_type.connect(
-            self.address,
-            self.subnet,
-            callback
-        )
-
-        self.network.send(packet)
-        event.wait()
-        return data
+class ThermostatMDI(MDIBase):
 
     @property
     def system_type(self):
@@ -875,7 +790,7 @@ class ThermostatMDI(object):
     def heat_setpoint(self, value):
         packet = HeatSetPointTemperatureModify()
         packet.set_command_data(value)
-        self._send(packet)
+        self._send(packet, patch=[(STATUS, 9, [value])])
 
     @property
     def cool_setpoint(self):
@@ -886,7 +801,7 @@ class ThermostatMDI(object):
     def cool_setpoint(self, value):
         packet = CoolSetPointTemperatureModify()
         packet.set_command_data(value)
-        self._send(packet)
+        self._send(packet, patch=[(STATUS, 10, [value])])
 
     @property
     def daylight_savings(self):
@@ -14,11 +14,11 @@ class MessageType(int):
         except TypeError:
             int.__init__(self)
     
-    def connect(self, address, subnet, callback):
-        signal.connect(self, address, subnet, callback)
+    def connect(self, address, subnet, callback, filter=None):
+        return signal.connect(self, address, subnet, callback, filter)
         
-    def disconnect(self, address, subnet):
-        signal.disconnect(self, address, subnet)
+    def disconnect(self, address, subnet, callback=None):
+        signal.disconnect(self, address, subnet, callback)
         
     def send(self, packet):
         signal.send(self, packet)
@@ -123,3 +123,7 @@ NETWORK_SHARED_DATA_SECTOR_IMAGE_READ_WRITE_REQUEST_RESPONSE = MessageType(0xFD)
 
 NETWORK_ENCAPSULATION_REQUEST = MessageType(0x7E)
 NETWORK_ENCAPSULATION_REQUEST_RESPONSE = MessageType(0xFE)
+
+# one instance for every byte value, reading the message type of a packet
+# indexes this instead of making a new MessageType each time
+MESSAGE_TYPES = tuple(MessageType(value) for value in range(256))
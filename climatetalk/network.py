@@ -1,44 +1,310 @@
 # -*- coding: utf-8 -*-
 # Copyright 2020 Kevin Schlosser
 
+import logging
+import select
 import socket
 import threading
+import time
 
 from . import rs485
+from . import timers
+from .airtime import INTERACTIVE
+from .cache import SnapshotCache, DEFAULT_TTL, CONFIGURATION, STATUS, SENSOR
+from .correlator import Correlator, DEFAULT_TIMEOUT, DEFAULT_RETRIES
+from .demand import DemandRefresher
+from .dispatch import Dispatcher
+from .poller import Poller, DEFAULT_BUDGET
+from .writebehind import WriteBehind
+from .packet import (
+    GetConfigurationResponse,
+    GetStatusResponse,
+    GetSensorDataResponse
+)
 
+logger = logging.getLogger(__name__)
 
+# seconds to wait before the first attempt to reconnect to the bridge, it
+# doubles after every failed attempt up to MAX_RECONNECT_DELAY
+RECONNECT_DELAY = 0.5
+MAX_RECONNECT_DELAY = 30.0
 
-
+# responses that carry a whole snapshot of the node that sent them
+_SNAPSHOT_RESPONSES = {
+    GetConfigurationResponse.message_type: CONFIGURATION,
+    GetStatusResponse.message_type: STATUS,
+    GetSensorDataResponse.message_type: SENSOR
+}
 
 
 class Network(object):
 
-    def __init__(self, ip, port):
+    def __init__(
+        self,
+        ip,
+        port,
+        snapshot_ttl=DEFAULT_TTL,
+        poll_budget=DEFAULT_BUDGET,
+        ack_commands=False,
+        checksum_framing=True,
+        sock=None
+    ):
+        """
+        :param ip: address of the RS485 to IP bridge
+        :param port: port of the RS485 to IP bridge
+        :param snapshot_ttl: seconds the configuration and status of a
+            node are served from the cache, 0 turns the cache off
+        :param poll_budget: fraction of the bus time :attr:`poller` may
+            use
+        :param ack_commands: commands sent through :attr:`writer` wait for
+            the node to acknowledge them by default
+        :param checksum_framing: find the frames with the header and
+            checksum. TCP does not keep the timing of the bus, set it to
+            ``False`` only for a bridge that does, the frames are then
+            split on the gaps between them.
+        :param sock: connected socket to use instead of connecting to
+            ``ip`` and ``port``, for example the one of a
+            :class:`climatetalk.simulator.SimulatedBus`. The connection is
+            not made again when it is lost.
+        """
         self.ip = ip
         self.port = port
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.sock.connect((ip, port))
-        self.rs485 = rs485.RS485(self)
+        self.snapshots = SnapshotCache(snapshot_ttl)
+        # number of times the connection to the bridge was made again
+        self.reconnects = 0
+        self._can_reconnect = sock is None
+        self._connect_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+        if sock is None:
+            sock = self._connect()
+
+        self.sock = sock
+        self.rs485 = rs485.RS485(self, checksum_framing=checksum_framing)
         self.rs485.start()
+        self.correlator = Correlator(self.send, timers.shared_wheel())
+        # control commands from the MDI classes go through this so only
+        # the latest value of a command reaches the bus
+        self.writer = WriteBehind(self.send, self.request, ack_commands)
+        # keeps held demands from timing out on the equipment
+        self.demands = DemandRefresher(
+            self.writer.submit,
+            timers.shared_wheel()
+        )
+        # subscriber callbacks run on a pool so a slow one does not hold
+        # up reading the bus
+        self.dispatcher = Dispatcher()
+        self.dispatcher.start()
+        # nodes are polled once they are added to it
+        self.poller = Poller(poll_budget)
+        self.poller.start()
         self._read_event = threading.Event()
         self._read_thread = threading.Thread(target=self._read_loop)
         self._read_thread.daemon = True
         self._read_thread.start()
 
-    def recv(self):
-        pass
+    def _connect(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+        try:
+            sock.connect((self.ip, self.port))
+        except EnvironmentError:
+            sock.close()
+            raise
+
+        return sock
+
+    def _reconnect(self, sock, timeout):
+        """
+        Makes the connection to the bridge again, waiting longer after
+        every attempt that fails.
+
+        :param sock: the socket that failed
+        :param timeout: seconds the caller was willing to wait for data
+        """
+        with self._connect_lock:
+            if self.sock is not sock:
+                # another thread already reconnected
+                return
+
+            if self._stopped.is_set():
+                # wait out the read like an idle bus while stop catches up
+                time.sleep(timeout or 0)
+                return
+
+            logger.warning(
+                'lost the connection to the RS485 bridge at %s:%s',
+                self.ip,
+                self.port
+            )
+            delay = RECONNECT_DELAY
+
+            while not self._stopped.wait(delay):
+                try:
+                    self.sock = self._connect()
+                except EnvironmentError as err:
+                    logger.debug('reconnecting failed: %s', err)
+                    delay = min(delay * 2, MAX_RECONNECT_DELAY)
+                    continue
+
+                # closed only now, the other threads keep a valid socket
+                # to fail on until then
+                sock.close()
+                self.rs485.reset()
+                self.reconnects += 1
+                logger.info('reconnected to the RS485 bridge')
+                return
+
+    def recv(self, size=1, timeout=None):
+        """
+        :param size: maximum number of bytes to read
+        :param timeout: seconds to wait for data, ``None`` waits forever
+        :return: the bytes read, empty when the timeout expired or the
+            connection was made again
+        """
+        sock = self.sock
+
+        try:
+            readable = select.select([sock], [], [], timeout)[0]
+            if not readable:
+                return b''
+
+            data = sock.recv(size)
+            if not data:
+                raise socket.error('connection closed by the RS485 bridge')
+        except EnvironmentError:
+            if not self._can_reconnect:
+                raise
 
-    def send(self):
-        pass
+            self._reconnect(sock, timeout)
+            return b''
+
+        return data
+
+    def recv_into(self, buffer, timeout=None):
+        """
+        :param buffer: writable buffer (memoryview) to read into
+        :param timeout: seconds to wait for data, ``None`` waits forever
+        :return: number of bytes read, 0 when the timeout expired or the
+            connection was made again
+        """
+        sock = self.sock
+
+        try:
+            readable = select.select([sock], [], [], timeout)[0]
+            if not readable:
+                return 0
+
+            count = sock.recv_into(buffer)
+            if not count:
+                raise socket.error('connection closed by the RS485 bridge')
+        except EnvironmentError:
+            if not self._can_reconnect:
+                raise
+
+            self._reconnect(sock, timeout)
+            return 0
+
+        return count
+
+    def send(self, packet, callback=None, priority=None):
+        """
+        :param packet: .. py:class:: climatetalk.packet.Packet
+        :param callback: called with the future once the packet is sent
+        :param priority: one of :data:`climatetalk.airtime.PRIORITIES`,
+            ``None`` uses the priority of the packet class
+        :return: :class:`concurrent.futures.Future`
+        :raises climatetalk.airtime.BudgetExceeded: the priority is out of
+            bus time
+        """
+        future = self.rs485.write(packet, callback, priority)
+        # our own demands speed up polling like the ones seen on the bus
+        self.poller.observe(packet)
+        return future
+
+    def utilization(self, priority=None):
+        """
+        :param priority: only count frames of this priority
+        :return: fraction of the bus time our frames used recently
+        """
+        return self.rs485.budget.utilization(priority)
+
+    def latency(self, priority):
+        """
+        :param priority: one of :data:`climatetalk.airtime.PRIORITIES`
+        :return: :class:`climatetalk.transmit.LatencyStats` of the frames
+            sent with that priority
+        """
+        return self.rs485.latency[priority]
+
+    def request(
+        self,
+        packet,
+        response_type,
+        db_id=None,
+        timeout=DEFAULT_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        priority=INTERACTIVE
+    ):
+        """
+        Sends a request and returns a future for the response.
+
+        :param packet: .. py:class:: climatetalk.packet.Packet
+        :param response_type: message type of the expected response
+        :param db_id: DB ID the response must carry, ``None`` matches any
+        :param timeout: seconds to wait for each attempt
+        :param retries: number of times the request is sent again
+        :param priority: one of :data:`climatetalk.airtime.PRIORITIES`
+        :return: :class:`climatetalk.correlator.PendingRequest`
+        """
+        return self.correlator.request(
+            packet,
+            response_type,
+            db_id,
+            timeout,
+            retries,
+            priority
+        )
 
     def _read_loop(self):
         # this will actually loop forever or until the program is stopped.
         # a packet is always returned.
         for packet in self.rs485:
-            packet.message_type.send(packet)
+            kind = _SNAPSHOT_RESPONSES.get(packet.message_type)
+            if kind is not None:
+                # this also picks up the responses to other masters
+                self.snapshots.put(
+                    (packet.source, packet.subnet, kind),
+                    packet.payload_data
+                )
 
-    def write(self, packet):
-        self.rs485.write(packet)
+            self.correlator.dispatch(packet)
+            self.poller.observe(packet)
+            self.dispatcher.dispatch(packet.message_type, packet)
+
+    def write(self, data):
+        sock = self.sock
+
+        try:
+            sock.sendall(data)
+        except EnvironmentError:
+            if self._can_reconnect:
+                # the reading thread sees the connection close and makes
+                # it again
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except EnvironmentError:
+                    pass
+            raise
 
     def stop(self):
+        self._stopped.set()
+        self.demands.clear()
+        self.poller.stop()
+        self.writer.stop()
+        self.dispatcher.stop()
+        self.correlator.stop()
         self.rs485.stop()
+
+        with self._connect_lock:
+            self.sock.close()
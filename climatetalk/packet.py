@@ -5,6 +5,9 @@ import six
 from .message_types import *
 from . import mac_address
 from . import session_id
+from .airtime import INTERACTIVE
+from .checksum import fletcher
+from .fields import Field, Schema
 from .utils import get_bit as _get_bit, set_bit as _set_bit
 
 
@@ -32,28 +35,28 @@ class PacketNumber(int):
 
 class PacketMeta(type):
 
-    def __call__(cls, *args, **kwargs):
-        if cls != Packet:
-            return super(PacketMeta, cls).__call__(*args, **kwargs)
+    def __init__(cls, name, bases, dct):
+        super(PacketMeta, cls).__init__(name, bases, dct)
 
-        data = args[0]
+        # fields declared by a subclass are added to the ones it inherits
+        fields = dict(
+            (field.name, field) for field in getattr(cls, 'schema', ())
+        )
 
-        for cl in PACKET_CLASSES:
-            # noinspection PyProtectedMember
-            if cl.message_type == data[7]:
-                break
+        for field in dct.get('fields', ()):
+            fields[field.name] = field
+            setattr(cls, field.name, field)
 
-        else:
+        cls.schema = Schema(fields.values())
+
+    def __call__(cls, *args, **kwargs):
+        if cls != Packet:
             return super(PacketMeta, cls).__call__(*args, **kwargs)
 
-        namespace = dict(
-            _packet_number=data[8],
-            _payload_length=data[9],
-            _payload_data=data[11:-2]
-        )
-        cl = type('DynamicPacket', (cl,), namespace)
-        instance = cl(*args, **kwargs)
-        return instance
+        # decode straight into the class registered for the message type,
+        # unknown message types stay a plain Packet
+        cl = PACKET_TYPES.get(args[0][7], cls)
+        return super(PacketMeta, cl).__call__(*args, **kwargs)
 
 
 # Packet breakdown
@@ -77,6 +80,8 @@ class PacketMeta(type):
 @six.add_metaclass(PacketMeta)
 class Packet(bytearray):
     message_type = 0x00
+    # transmit priority, see climatetalk.airtime
+    priority = INTERACTIVE
     _packet_number = PacketNumber(0x00)
     _payload_length = 0x00
     _payload_data = bytearray()
@@ -170,7 +175,7 @@ class Packet(bytearray):
 
     @property
     def message_type(self):
-        return self[7]  # byte 7
+        return MESSAGE_TYPES[self[7]]  # byte 7
 
     @message_type.setter
     def message_type(self, value):
@@ -216,16 +221,26 @@ class Packet(bytearray):
         self.append(CT_ISUM1)
         self.append(CT_ISUM2)
 
-    def calc_checksum(self):
-        sum1 = 0
-        sum2 = 0
+    def unpack(self):
+        """
+        :return: tuple of every field value, see ``schema.names``
+        """
+        return self.schema.unpack(self)
+
+    def unpack_dict(self):
+        """
+        :return: dict of field name to value
+        """
+        return self.schema.unpack_dict(self)
 
-        for i in range(len(self)[:-2]):
-            sum1 += self[i]
-            sum2 += sum1
+    def pack(self, *args, **kwargs):
+        """
+        Sets several fields at once, by position or by name.
+        """
+        self.schema.pack(self, *args, **kwargs)
 
-        check1 = (sum1 + sum2) % 0xFF
-        check2 = (sum1 + check1) % 0xFF
+    def calc_checksum(self):
+        check1, check2 = fletcher(self, 0, len(self) - 2)
 
         if self[-2] == CT_ISUM1:
             self[len(self) - 2] = check1
@@ -235,7 +250,7 @@ class Packet(bytearray):
 
     @property
     def is_valid(self):
-        check1, check2 = self.cacl_checksum()
+        check1, check2 = fletcher(self, 0, len(self) - 2)
         data1, data2 = self[-2:]
 
         return check1 == data1 and check2 == data2
@@ -250,27 +265,10 @@ class GetConfigurationRequest(Packet):
 class GetConfigurationResponse(Packet):
     message_type = GET_CONFIGURATION_RESPONSE
 
-    @property
-    def db_id_tag(self):
-        return self[10]
-
-    @db_id_tag.setter
-    def db_id_tag(self, value):
-        while len(self) < 11:
-            self.append(0x00)
-
-        self[10] = value
-
-    @property
-    def db_length(self):
-        return self[11]
-
-    @db_length.setter
-    def db_length(self, value):
-        while len(self) < 12:
-            self.append(0x00)
-
-        self[11] = value
+    fields = (
+        Field('db_id_tag', 10),
+        Field('db_length', 11)
+    )
 
     @property
     def payload_data(self):
@@ -312,47 +310,27 @@ class GetStatusResponse(Packet):
 class SetControlCommandRequest(Packet):
     message_type = SET_CONTROL_COMMAND
 
-    @property
-    def payload_command_code(self):
-        return self[10] | self[11] << 8
-    
-    @payload_command_code.setter
-    def payload_command_code(self, value):
-        while len(self) < 12:
-            self.append(0x00)
-
-        self[10] = value & 0xFF
-        self[11] = value >> 8 & 0xFF
+    fields = (
+        Field('payload_command_code', 10, '<H'),
+    )
 
 
 class SetControlCommandResponse(SetControlCommandRequest):
     message_type = SET_CONTROL_COMMAND_RESPONSE
 
+    fields = (
+        # ACK or NAK code, see climatetalk.protocol
+        Field('payload_response_code', 12),
+    )
+
 
 class SetDisplayMessageRequest(Packet):
     message_type = SET_DISPLAY_MESSAGE
 
-    @property
-    def payload_node_type(self):
-        return self[10]
-
-    @payload_node_type.setter
-    def payload_node_type(self, value):
-        while len(self) < 11:
-            self.append(0x00)
-        self[10] = value
-
-    @property
-    def payload_message_length(self):
-        # 0-30
-        return self[11]
-
-    @payload_message_length.setter
-    def payload_message_length(self, value):
-        while len(self) < 12:
-            self.append(0x00)
-
-        self[11] = value
+    fields = (
+        Field('payload_node_type', 10),
+        Field('payload_message_length', 11)
+    )
 
     @property
     def payload_message(self):
@@ -374,60 +352,20 @@ class SetDisplayMessageResponse(Packet):
     _payload_length = 2
     _payload_data = bytearray(b'\xAC\x06')
 
-    @property
-    def result(self):
-        return self[12]
-
-    @result.setter
-    def result(self, value):
-        # ACK or NAK
-        self[12] = value
+    fields = (
+        Field('result', 12),
+    )
 
 
 class SetDisgnosticsRequest(Packet):
     message_type = SET_DISGNOSTICS
 
-    @property
-    def payload_node_type(self):
-        return self[10]
-
-    @payload_node_type.setter
-    def payload_node_type(self, value):
-        while len(self) < 11:
-            self.append(0x00)
-        self[10] = value
-
-    @property
-    def payload_major_code(self):
-        return self[11]
-
-    @payload_major_code.setter
-    def payload_major_code(self, value):
-        while len(self) < 12:
-            self.append(0x00)
-        self[11] = value
-
-    @property
-    def payload_minor_code(self):
-        return self[12]
-
-    @payload_minor_code.setter
-    def payload_minor_code(self, value):
-        while len(self) < 13:
-            self.append(0x00)
-        self[12] = value
-
-    @property
-    def payload_message_length(self):
-        # 0-15
-        return self[13]
-
-    @payload_message_length.setter
-    def payload_message_length(self, value):
-        while len(self) < 14:
-            self.append(0x00)
-
-        self[13] = value
+    fields = (
+        Field('payload_node_type', 10),
+        Field('payload_major_code', 11),
+        Field('payload_minor_code', 12),
+        Field('payload_message_length', 13)
+    )
 
     @property
     def payload_fault_message(self):
@@ -449,14 +387,9 @@ class SetDisgnosticsResponse(Packet):
     _payload_length = 2
     _payload_data = bytearray(b'\xAC\x06')
 
-    @property
-    def result(self):
-        return self[12]
-
-    @result.setter
-    def result(self, value):
-        # ACK or NAK
-        self[12] = value
+    fields = (
+        Field('result', 12),
+    )
 
 
 class GetDiagnosticsRequest(Packet):
@@ -464,21 +397,10 @@ class GetDiagnosticsRequest(Packet):
     _payload_length = 2
     _payload_data = bytearray(b'\x00\x00')
 
-    @property
-    def payload_fault_type(self):
-        return self[10]
-
-    @payload_fault_type.setter
-    def payload_fault_type(self, value):
-        self[10] = value
-
-    @property
-    def payload_fault_index(self):
-        return self[11]
-
-    @payload_fault_index.setter
-    def payload_fault_index(self, value):
-        self[11] = value
+    fields = (
+        Field('payload_fault_type', 10),
+        Field('payload_fault_index', 11)
+    )
 
 
 class GetDiagnosticsResponse(Packet):
@@ -552,14 +474,9 @@ class SetIdentificationDataResponse(Packet):
     _payload_length = 2
     _payload_data = bytearray(b'\xAC\x06')
 
-    @property
-    def payload_result(self):
-        # ACK or NAK
-        return self[11]
-
-    @payload_result.setter
-    def payload_result(self, value):
-        self[11] = value
+    fields = (
+        Field('payload_result', 11),
+    )
 
 
 class GetIdentificationDataRequest(Packet):
@@ -587,62 +504,13 @@ class GetIdentificationDataResponse(Packet):
 class SetApplicationSharedDataToNetworkRequest(Packet):
     message_type = SET_APPLICATION_SHARED_DATA_TO_NETWORK
 
-    @property
-    def payload_sector_node_type(self):
-        return self[10]
-
-    @payload_sector_node_type.setter
-    def payload_sector_node_type(self, value):
-        while len(self) < 11:
-            self.append(0x00)
-
-        self[10] = value
-
-    @property
-    def payload_shared_data_length(self):
-        return self[11]
-
-    @payload_shared_data_length.setter
-    def payload_shared_data_length(self, value):
-        while len(self) < 12:
-            self.append(0x00)
-
-        self[11] = value
-
-    @property
-    def payload_control_id(self):
-        return self[12] >> 8 | self[13]
-
-    @payload_control_id.setter
-    def payload_control_id(self, value):
-        while len(self) < 14:
-            self.append(0x00)
-
-        self[12] = value << 8 & 0xFF
-        self[13] = value & 0xFF
-
-    @property
-    def payload_manufacturer_id(self):
-        return self[14] >> 8 | self[15]
-
-    @payload_manufacturer_id.setter
-    def payload_manufacturer_id(self, value):
-        while len(self) < 16:
-            self.append(0x00)
-
-        self[14] = value << 8 & 0xFF
-        self[15] = value & 0xFF
-
-    @property
-    def payload_app_node_type(self):
-        return self[16]
-
-    @payload_app_node_type.setter
-    def payload_app_node_type(self, value):
-        while len(self) < 17:
-            self.append(0x00)
-
-        self[16] = value
+    fields = (
+        Field('payload_sector_node_type', 10),
+        Field('payload_shared_data_length', 11),
+        Field('payload_control_id', 12, 'H'),
+        Field('payload_manufacturer_id', 14, 'H'),
+        Field('payload_app_node_type', 16)
+    )
 
     @property
     def payload_application_data(self):
@@ -668,63 +536,20 @@ class GetApplicationSharedDataToNetworkRequest(Packet):
     _payload_length = 1
     _payload_data = bytearray(b'\x00')
 
-    @property
-    def payload_sector_node_type(self):
-        return self[10]
-
-    @payload_sector_node_type.setter
-    def payload_sector_node_type(self, value):
-        self[10] = value
+    fields = (
+        Field('payload_sector_node_type', 10),
+    )
 
 
 class GetApplicationSharedDataToNetworkResponse(GetApplicationSharedDataToNetworkRequest):
     message_type = GET_APPLICATION_SHARED_DATA_TO_NETWORK_RESPONSE
 
-    @property
-    def payload_shared_data_length(self):
-        return self[11]
-
-    @payload_shared_data_length.setter
-    def payload_shared_data_length(self, value):
-        while len(self) < 12:
-            self.append(0x00)
-
-        self[11] = value
-
-    @property
-    def payload_control_id(self):
-        return self[12] >> 8 | self[13]
-
-    @payload_control_id.setter
-    def payload_control_id(self, value):
-        while len(self) < 14:
-            self.append(0x00)
-
-        self[12] = value << 8 & 0xFF
-        self[13] = value & 0xFF
-
-    @property
-    def payload_manufacturer_id(self):
-        return self[14] >> 8 | self[15]
-
-    @payload_manufacturer_id.setter
-    def payload_manufacturer_id(self, value):
-        while len(self) < 16:
-            self.append(0x00)
-
-        self[14] = value << 8 & 0xFF
-        self[15] = value & 0xFF
-
-    @property
-    def payload_app_node_type(self):
-        return self[16]
-
-    @payload_app_node_type.setter
-    def payload_app_node_type(self, value):
-        while len(self) < 17:
-            self.append(0x00)
-
-        self[16] = value
+    fields = (
+        Field('payload_shared_data_length', 11),
+        Field('payload_control_id', 12, 'H'),
+        Field('payload_manufacturer_id', 14, 'H'),
+        Field('payload_app_node_type', 16)
+    )
 
     @property
     def payload_application_data(self):
@@ -786,16 +611,9 @@ class GetManufacturerDeviceDataResponse(Packet):
 class SetNetworkNodeListRequest(Packet):
     message_type = SET_NETWORK_NODE_LIST
 
-    @property
-    def payload_coordinator_type(self):
-        return self[10]
-
-    @payload_coordinator_type.setter
-    def payload_coordinator_type(self, value):
-        while len(self) < 11:
-            self.append(0x00)
-
-        self[10] = value
+    fields = (
+        Field('payload_coordinator_type', 10),
+    )
 
     def get_node_type(self, index):
         return self[10 + index]
@@ -864,38 +682,12 @@ class DirectMemoryAccessReadRequest(Packet):
     _payload_length = 4
     _payload_data = bytearray(b'\x00' * 4)
 
-    @property
-    def payload_mdi(self):
-        return self[10]
-
-    @payload_mdi.setter
-    def payload_mdi(self, value):
-        self[10] = value
-
-    @property
-    def payload_packet_number(self):
-        # should always be 0x00
-        return self[11]
-
-    @payload_packet_number.setter
-    def payload_packet_number(self, value):
-        self[11] = value
-
-    @property
-    def payload_start_byte(self):
-        return self[12]
-
-    @payload_start_byte.setter
-    def payload_start_byte(self, value):
-        self[12] = value
-
-    @property
-    def payload_byte_count(self):
-        return self[13]
-
-    @payload_byte_count.setter
-    def payload_byte_count(self, value):
-        self[13] = value
+    fields = (
+        Field('payload_mdi', 10),
+        Field('payload_packet_number', 11),
+        Field('payload_start_byte', 12),
+        Field('payload_byte_count', 13)
+    )
 
 
 class DirectMemoryAccessReadResponse(Packet):
@@ -925,17 +717,9 @@ class DirectMemoryAccessReadResponseMotor(DirectMemoryAccessReadResponse):
 class SetManufacturerGenericDataRequest(Packet):
     message_type = SET_MANUFACTURER_GENERIC_DATA
 
-    @property
-    def payload_manufacturer_id(self):
-        return self[10] >> 8 | self[11]
-
-    @payload_manufacturer_id.setter
-    def payload_manufacturer_id(self, value):
-        while len(self) < 13:
-            self.append(0x00)
-
-        self[10] = value << 8 & 0xFF
-        self[11] = value & 0xFF
+    fields = (
+        Field('payload_manufacturer_id', 10, 'H'),
+    )
 
     @property
     def payload_data(self):
@@ -957,17 +741,9 @@ class SetManufacturerGenericDataResponse(SetManufacturerGenericDataRequest):
 class GetManufacturerGenericDataRequest(Packet):
     message_type = GET_MANUFACTURER_GENERIC_DATA
 
-    @property
-    def payload_manufacturer_id(self):
-        return self[10] >> 8 | self[11]
-
-    @payload_manufacturer_id.setter
-    def payload_manufacturer_id(self, value):
-        while len(self) < 13:
-            self.append(0x00)
-
-        self[10] = value << 8 & 0xFF
-        self[11] = value & 0xFF
+    fields = (
+        Field('payload_manufacturer_id', 10, 'H'),
+    )
 
     @property
     def payload_data(self):
@@ -995,51 +771,12 @@ class GetUserMenuRequest(Packet):
     # payload_len = 6 + n
     # bytes 13 and 14 = 0x00
 
-    @property
-    def payload_menu_file(self):
-        # should always be 0x01
-        return self[10]
-
-    @payload_menu_file.setter
-    def payload_menu_file(self, value):
-        while len(self) < 11:
-            self.append(0x00)
-
-        self[10] = value
-
-    @property
-    def payload_main_menu(self):
-        # 0x00 - 0x0A
-        return self[11]
-
-    @payload_main_menu.setter
-    def payload_main_menu(self, value):
-        while len(self) < 12:
-            self.append(0x00)
-
-        self[11] = value
-
-    @property
-    def payload_sub_level(self):
-        # 0x00 - 0x0A
-        return self[12]
-
-    @payload_sub_level.setter
-    def payload_sub_level(self, value):
-        while len(self) < 13:
-            self.append(0x00)
-
-        self[12] = value
-
-    @property
-    def payload_maximum_return_size(self):
-        return self[15]
-
-    @payload_maximum_return_size.setter
-    def payload_maximum_return_size(self, value):
-        while len(self) < 16:
-            self.append(0x00)
-        self[15] = value
+    fields = (
+        Field('payload_menu_file', 10),
+        Field('payload_main_menu', 11),
+        Field('payload_sub_level', 12),
+        Field('payload_maximum_return_size', 15)
+    )
 
 
 class GetUserMenuResponse(GetUserMenuRequest):
@@ -1067,54 +804,14 @@ class SetUserMenuRequest(Packet):
     _payload_data[3] = 0x55
     _payload_data[6] = 0xAA
 
-    @property
-    def payload_menu_file(self):
-        return self[10]
-
-    @payload_menu_file.setter
-    def payload_menu_file(self, value):
-        self[10] = value
-
-    @property
-    def payload_main_menu(self):
-        return self[11]
-
-    @payload_main_menu.setter
-    def payload_main_menu(self, value):
-        self[11] = value
-
-    @property
-    def payload_sub_level(self):
-        return self[12]
-
-    @payload_sub_level.setter
-    def payload_sub_level(self, value):
-        self[12] = value
-
-    @property
-    def payload_file_security_code_1(self):
-        return self[13]
-
-    @payload_file_security_code_1.setter
-    def payload_file_security_code_1(self, value):
-        self[13] = value
-
-    @property
-    def payload_update_value(self):
-        return self[14] >> 8 | self[15]
-
-    @payload_update_value.setter
-    def payload_update_value(self, value):
-        self[14] = value << 8 & 0xFF
-        self[15] = value & 0xFF
-
-    @property
-    def payload_file_security_code_2(self):
-        return self[16]
-
-    @payload_file_security_code_2.setter
-    def payload_file_security_code_2(self, value):
-        self[16] = value
+    fields = (
+        Field('payload_menu_file', 10),
+        Field('payload_main_menu', 11),
+        Field('payload_sub_level', 12),
+        Field('payload_file_security_code_1', 13),
+        Field('payload_update_value', 14, 'H'),
+        Field('payload_file_security_code_2', 16)
+    )
 
 
 class SetUserMenuResponse(SetUserMenuRequest):
@@ -1124,65 +821,20 @@ class SetUserMenuResponse(SetUserMenuRequest):
     _payload_data[3] = 0x55
     _payload_data[6] = 0xAA
 
-    @property
-    def payload_result(self):
-        # ACK or NAK
-        return self[17]
-
-    @payload_result.setter
-    def payload_result(self, value):
-        self[17] = value
+    fields = (
+        Field('payload_result', 17),
+    )
 
 
 class SetFactorySharedDataToApplicationRequest(Packet):
     message_type = SET_FACTORY_SHARED_DATA_TO_APPLICATION
 
-    @property
-    def payload_shared_data_len(self):
-        # 6 to 200
-        return self[10]
-
-    @payload_shared_data_len.setter
-    def payload_shared_data_len(self, value):
-        while len(self) != 11:
-            self.append(0x00)
-
-        self[10] = value
-
-    @property
-    def payload_control_id(self):
-        return self[11] >> 8 | self[12]
-
-    @payload_control_id.setter
-    def payload_control_id(self, value):
-        while len(self) != 13:
-            self.append(0x00)
-
-        self[11] = value << 8 & 0xFF
-        self[12] = value & 0xFF
-
-    @property
-    def payload_manufacturer_id(self):
-        return self[13] >> 8 | self[14]
-
-    @payload_manufacturer_id.setter
-    def payload_manufacturer_id(self, value):
-        while len(self) != 15:
-            self.append(0x00)
-
-        self[13] = value << 8 & 0xFF
-        self[14] = value & 0xFF
-
-    @property
-    def payload_app_node_type(self):
-        return self[15]
-
-    @payload_app_node_type.setter
-    def payload_app_node_type(self, value):
-        while len(self) != 16:
-            self.append(0x00)
-
-        self[15] = value
+    fields = (
+        Field('payload_shared_data_len', 10),
+        Field('payload_control_id', 11, 'H'),
+        Field('payload_manufacturer_id', 13, 'H'),
+        Field('payload_app_node_type', 15)
+    )
 
     @property
     def payload_application_data(self):
@@ -1212,63 +864,13 @@ class GetSharedDataFromApplicationRequest(Packet):
 class GetSharedDataFromApplicationResponse(Packet):
     message_type = GET_SHARED_DATA_FROM_APPLICATION_RESPONSE
 
-    @property
-    def payload_app_node_type_1(self):
-        return self[10]
-
-    @payload_app_node_type_1.setter
-    def payload_app_node_type_1(self, value):
-        while len(self) != 11:
-            self.append(0x00)
-
-        self[10] = value
-
-    @property
-    def payload_shared_data_len(self):
-        # 6 to 200
-        return self[11]
-
-    @payload_shared_data_len.setter
-    def payload_shared_data_len(self, value):
-        while len(self) != 12:
-            self.append(0x00)
-
-        self[11] = value
-
-    @property
-    def payload_control_id(self):
-        return self[12] >> 8 | self[13]
-
-    @payload_control_id.setter
-    def payload_control_id(self, value):
-        while len(self) != 14:
-            self.append(0x00)
-
-        self[12] = value << 8 & 0xFF
-        self[13] = value & 0xFF
-
-    @property
-    def payload_manufacturer_id(self):
-        return self[14] >> 8 | self[15]
-
-    @payload_manufacturer_id.setter
-    def payload_manufacturer_id(self, value):
-        while len(self) != 16:
-            self.append(0x00)
-
-        self[14] = value << 8 & 0xFF
-        self[15] = value & 0xFF
-
-    @property
-    def payload_app_node_type_2(self):
-        return self[16]
-
-    @payload_app_node_type_2.setter
-    def payload_app_node_type_2(self, value):
-        while len(self) != 17:
-            self.append(0x00)
-
-        self[16] = value
+    fields = (
+        Field('payload_app_node_type_1', 10),
+        Field('payload_shared_data_len', 11),
+        Field('payload_control_id', 12, 'H'),
+        Field('payload_manufacturer_id', 14, 'H'),
+        Field('payload_app_node_type_2', 16)
+    )
 
     @property
     def payload_application_data(self):
@@ -1298,33 +900,11 @@ class RequestToReceiveRequest(Packet):
     _payload_length = 17
     _payload_data = bytearray(b'\x00' * 17)
 
-    @property
-    def payload_r2r_code(self):
-        return self[10]
-
-    @payload_r2r_code.setter
-    def payload_r2r_code(self, value):
-        self[10] = value
-
-    @property
-    def payload_mac_address(self):
-        return mac_address.MACAddress(self[11:19])
-
-    @payload_mac_address.setter
-    def payload_mac_address(self, value):
-        mac = mac_address.MACAddress(value)
-        for i, item in enumerate(mac):
-            self[i + 11] = item
-
-    @property
-    def payload_session_id(self):
-        return session_id.SessionId(self[19:27])
-
-    @payload_session_id.setter
-    def payload_session_id(self, value):
-        mac = session_id.SessionId(value)
-        for i, item in enumerate(mac):
-            self[i + 19] = item
+    fields = (
+        Field('payload_r2r_code', 10),
+        Field('payload_mac_address', 11, '8s', mac_address.MACAddress),
+        Field('payload_session_id', 19, '8s', session_id.SessionId)
+    )
 
 
 class RequestToReceiveResponse(RequestToReceiveRequest):
@@ -1343,13 +923,9 @@ class NetworkStateRequest(Packet):
 class NetworkStateResponse(Packet):
     message_type = NETWORK_STATE_REQUEST_RESPONSE
 
-    @property
-    def payload_coord_virtual_node_type(self):
-        return self[10]
-
-    @payload_coord_virtual_node_type.setter
-    def payload_coord_virtual_node_type(self, value):
-        self[10] = value
+    fields = (
+        Field('payload_coord_virtual_node_type', 10),
+    )
 
     def get_node_type(self, index):
         return self[11:][index]
@@ -1366,13 +942,9 @@ class NetworkStateResponse(Packet):
 class AddressConfirmationRequest(Packet):
     message_type = ADDRESS_CONFIRMATION
 
-    @property
-    def payload_coord_virtual_node_type(self):
-        return self[10]
-
-    @payload_coord_virtual_node_type.setter
-    def payload_coord_virtual_node_type(self, value):
-        self[10] = value
+    fields = (
+        Field('payload_coord_virtual_node_type', 10),
+    )
 
     def get_node_type(self, index):
         return self[11:][index]
@@ -1389,13 +961,9 @@ class AddressConfirmationRequest(Packet):
 class AddressConfirmationResponse(Packet):
     message_type = ADDRESS_CONFIRMATION_RESPONSE
 
-    @property
-    def payload_coord_virtual_node_type(self):
-        return self[10]
-
-    @payload_coord_virtual_node_type.setter
-    def payload_coord_virtual_node_type(self, value):
-        self[10] = value
+    fields = (
+        Field('payload_coord_virtual_node_type', 10),
+    )
 
     def get_node_type(self, index):
         return self[11:][index]
@@ -1414,13 +982,9 @@ class TokenOffer(Packet):
     _payload_length = 1
     _payload_data = bytearray(b'\x00')
 
-    @property
-    def payload_node_type_filter(self):
-        return self[10]
-
-    @payload_node_type_filter.setter
-    def payload_node_type_filter(self, value):
-        self[10] = value
+    fields = (
+        Field('payload_node_type_filter', 10),
+    )
 
 
 class TokenOfferResponse(Packet):
@@ -1428,41 +992,12 @@ class TokenOfferResponse(Packet):
     _payload_length = 18
     _payload_data = bytearray(b'\x00' * 18)
 
-    @property
-    def payload_address(self):
-        return self[10]
-
-    @payload_address.setter
-    def payload_address(self, value):
-        self[10] = value
-
-    @property
-    def payload_subnet(self):
-        return self[11]
-
-    @payload_subnet.setter
-    def payload_subnet(self, value):
-        self[11] = value
-
-    @property
-    def payload_mac_address(self):
-        return mac_address.MACAddress(self[12:20])
-
-    @payload_mac_address.setter
-    def payload_mac_address(self, value):
-        mac = mac_address.MACAddress(value)
-        for i, item in enumerate(mac):
-            self[i + 12] = item
-
-    @property
-    def payload_session_id(self):
-        return session_id.SessionId(self[20:28])
-
-    @payload_session_id.setter
-    def payload_session_id(self, value):
-        mac = session_id.SessionId(value)
-        for i, item in enumerate(mac):
-            self[i + 20] = item
+    fields = (
+        Field('payload_address', 10),
+        Field('payload_subnet', 11),
+        Field('payload_mac_address', 12, '8s', mac_address.MACAddress),
+        Field('payload_session_id', 20, '8s', session_id.SessionId)
+    )
 
 
 class VersionAnnouncement(Packet):
@@ -1471,31 +1006,11 @@ class VersionAnnouncement(Packet):
     _payload_length = 5
     _payload_data = bytearray(b'\x00' * 5)
 
-    @property
-    def payload_ct_485_version(self):
-        return self[10] << 8 | self[11]
-
-    @payload_ct_485_version.setter
-    def payload_ct_485_version(self, value):
-        self[10] = value >> 8 & 0xFF
-        self[11] = value & 0xFF
-
-    @property
-    def payload_ct_485_revision(self):
-        return self[12] << 8 | self[13]
-
-    @payload_ct_485_revision.setter
-    def payload_ct_485_revision(self, value):
-        self[12] = value >> 8 & 0xFF
-        self[13] = value & 0xFF
-
-    @property
-    def payload_ct_485_ffd(self):
-        return self[14]
-
-    @payload_ct_485_ffd.setter
-    def payload_ct_485_ffd(self, value):
-        self[14] = value
+    fields = (
+        Field('payload_ct_485_version', 10, 'H'),
+        Field('payload_ct_485_revision', 12, 'H'),
+        Field('payload_ct_485_ffd', 14)
+    )
 
 
 class NodeDiscoveryRequest(Packet):
@@ -1505,13 +1020,9 @@ class NodeDiscoveryRequest(Packet):
     _payload_length = 1
     _payload_data = bytearray(b'\x00')
 
-    @property
-    def payload_node_type_filter(self):
-        return self[10]
-
-    @payload_node_type_filter.setter
-    def payload_node_type_filter(self, value):
-        self[10] = value
+    fields = (
+        Field('payload_node_type_filter', 10),
+    )
 
 
 class NodeDiscoveryResponse(Packet):
@@ -1520,33 +1031,11 @@ class NodeDiscoveryResponse(Packet):
     _payload_length = 18
     _payload_data = bytearray(b'\x00' * 18)
 
-    @property
-    def payload_node_type(self):
-        return self[10]
-
-    @payload_node_type.setter
-    def payload_node_type(self, value):
-        self[10] = value
-
-    @property
-    def payload_mac_address(self):
-        return mac_address.MACAddress(self[12:20])
-
-    @payload_mac_address.setter
-    def payload_mac_address(self, value):
-        mac = mac_address.MACAddress(value)
-        for i, item in enumerate(mac):
-            self[i + 12] = item
-
-    @property
-    def payload_session_id(self):
-        return session_id.SessionId(self[20:28])
-
-    @payload_session_id.setter
-    def payload_session_id(self, value):
-        mac = session_id.SessionId(value)
-        for i, item in enumerate(mac):
-            self[i + 20] = item
+    fields = (
+        Field('payload_node_type', 10),
+        Field('payload_mac_address', 12, '8s', mac_address.MACAddress),
+        Field('payload_session_id', 20, '8s', session_id.SessionId)
+    )
 
 
 class SetAddressRequest(Packet):
@@ -1555,41 +1044,12 @@ class SetAddressRequest(Packet):
     _payload_length = 19
     _payload_data = bytearray(b'\x00' * 18 + b'\x01')
 
-    @property
-    def payload_address(self):
-        return self[10]
-
-    @payload_address.setter
-    def payload_address(self, value):
-        self[10] = value
-
-    @property
-    def payload_subnet(self):
-        return self[11]
-
-    @payload_subnet.setter
-    def payload_subnet(self, value):
-        self[11] = value
-
-    @property
-    def payload_mac_address(self):
-        return mac_address.MACAddress(self[12:20])
-
-    @payload_mac_address.setter
-    def payload_mac_address(self, value):
-        mac = mac_address.MACAddress(value)
-        for i, item in enumerate(mac):
-            self[i + 12] = item
-
-    @property
-    def payload_session_id(self):
-        return session_id.SessionId(self[20:28])
-
-    @payload_session_id.setter
-    def payload_session_id(self, value):
-        mac = session_id.SessionId(value)
-        for i, item in enumerate(mac):
-            self[i + 20] = item
+    fields = (
+        Field('payload_address', 10),
+        Field('payload_subnet', 11),
+        Field('payload_mac_address', 12, '8s', mac_address.MACAddress),
+        Field('payload_session_id', 20, '8s', session_id.SessionId)
+    )
 
 
 class SetAddressResponse(SetAddressRequest):
@@ -1608,33 +1068,11 @@ class GetNodeIdResponse(Packet):
     _payload_length = 17
     _payload_data = bytearray(b'\x00' * 17)
 
-    @property
-    def payload_node_type(self):
-        return self[11]
-
-    @payload_node_type.setter
-    def payload_node_type(self, value):
-        self[11] = value
-
-    @property
-    def payload_mac_address(self):
-        return mac_address.MACAddress(self[12:20])
-
-    @payload_mac_address.setter
-    def payload_mac_address(self, value):
-        mac = mac_address.MACAddress(value)
-        for i, item in enumerate(mac):
-            self[i + 12] = item
-
-    @property
-    def payload_session_id(self):
-        return session_id.SessionId(self[20:28])
-
-    @payload_session_id.setter
-    def payload_session_id(self, value):
-        mac = session_id.SessionId(value)
-        for i, item in enumerate(mac):
-            self[i + 20] = item
+    fields = (
+        Field('payload_node_type', 11),
+        Field('payload_mac_address', 12, '8s', mac_address.MACAddress),
+        Field('payload_session_id', 20, '8s', session_id.SessionId)
+    )
 
 
 class NetworkSharedDataSectorImageReadWriteRequest(Packet):
@@ -1720,3 +1158,12 @@ PACKET_CLASSES = (
     NetworkEncapsulationRequest,
     NetworkEncapsulationResponse
 )
+
+# message type -> packet class. Request to receive and its response share
+# message type 0x00, the first class listed is the one used for decoding.
+PACKET_TYPES = {}
+
+for _cl in PACKET_CLASSES:
+    PACKET_TYPES.setdefault(int(_cl.message_type), _cl)
+
+del _cl
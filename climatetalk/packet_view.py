@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import six
+
+from .fields import Field
+from .message_types import MESSAGE_TYPES
+from .packet import Packet, PacketNumber, PACKET_TYPES
+from .framing import find_frames
+
+
+class FieldView(object):
+    """
+    Read only version of a :class:`climatetalk.fields.Field` for views.
+    """
+
+    def __init__(self, field):
+        self.field = field
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        return self.field.get(instance._data)
+
+
+class PacketViewMeta(type):
+
+    def __call__(cls, *args, **kwargs):
+        if cls != PacketView:
+            return super(PacketViewMeta, cls).__call__(*args, **kwargs)
+
+        # same dispatch as PacketMeta, unknown message types stay a plain
+        # PacketView
+        cl = VIEW_TYPES.get(args[0][7], cls)
+        return super(PacketViewMeta, cl).__call__(*args, **kwargs)
+
+
+@six.add_metaclass(PacketViewMeta)
+class PacketView(object):
+    """
+    Read only packet that wraps a memoryview instead of owning a copy.
+
+    Indexing and slicing go to the memoryview so the payload properties
+    hand back views into the same memory and nothing is copied until
+    :meth:`copy` or :meth:`to_packet` is called.
+
+    A view into a receive buffer that recycles its memory is only valid
+    until the buffer is read into again, call :meth:`to_packet` to keep a
+    packet around. The RS485 receive path does not recycle, its views can
+    be kept.
+    """
+
+    __slots__ = ('_data',)
+
+    packet_class = Packet
+
+    def __init__(self, data):
+        self._data = memoryview(data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, item):
+        return self._data[item]
+
+    def __repr__(self):
+        return '<{0} {1}>'.format(
+            self.__class__.__name__,
+            ' '.join('{0:02X}'.format(char) for char in self._data)
+        )
+
+    @property
+    def destination(self):
+        return self._data[0]
+
+    @property
+    def source(self):
+        return self._data[1]
+
+    @property
+    def subnet(self):
+        return self._data[2]
+
+    @property
+    def send_method(self):
+        return self._data[3]
+
+    @property
+    def send_parameters(self):
+        return self._data[4] << 8 | self._data[5]
+
+    @property
+    def source_node_type(self):
+        return self._data[6]
+
+    @property
+    def message_type(self):
+        return MESSAGE_TYPES[self._data[7]]
+
+    @property
+    def packet_number(self):
+        return PacketNumber(self._data[8])
+
+    @property
+    def packet_length(self):
+        return self._data[9]
+
+    @property
+    def packet_payload(self):
+        return self._data[10:-2]
+
+    @property
+    def checksum(self):
+        return self._data[-2], self._data[-1]
+
+    def unpack(self):
+        """
+        :return: tuple of every field value, see ``schema.names``
+        """
+        return self.packet_class.schema.unpack(self._data)
+
+    def unpack_dict(self):
+        """
+        :return: dict of field name to value
+        """
+        return self.packet_class.schema.unpack_dict(self._data)
+
+    def tobytes(self):
+        return self._data.tobytes()
+
+    def copy(self):
+        """
+        :return: bytearray copy of the frame
+        """
+        return bytearray(self._data)
+
+    def to_packet(self):
+        """
+        :return: a :class:`climatetalk.packet.Packet` that owns its data
+        """
+        return self.packet_class(self.copy())
+
+    def release(self):
+        self._data.release()
+
+
+def _view_namespace(packet_class):
+    # The getters of the packet classes only index and slice self, so they
+    # work unchanged against the memoryview. Setters are left out, a view
+    # is read only.
+    namespace = dict(__slots__=(), packet_class=packet_class)
+
+    for cl in reversed(packet_class.__mro__):
+        if not issubclass(cl, Packet) or cl is Packet:
+            continue
+
+        for name, value in cl.__dict__.items():
+            if isinstance(value, property):
+                namespace[name] = property(value.fget)
+            elif isinstance(value, Field):
+                namespace[name] = FieldView(value)
+            elif name == '__iter__' or isinstance(value, type):
+                namespace[name] = value
+
+    return namespace
+
+
+# message type -> view class, built once from the packet classes
+VIEW_TYPES = dict(
+    (
+        message_type,
+        type(
+            cl.__name__ + 'View',
+            (PacketView,),
+            _view_namespace(cl)
+        )
+    )
+    for message_type, cl in PACKET_TYPES.items()
+)
+
+
+def iter_packets(data, start=0, end=None):
+    """
+    Decodes every frame in a capture without copying it.
+
+    :param data: bytes like object holding the captured stream
+    :param start: offset to start at
+    :param end: offset to stop at
+    :return: generator of :class:`PacketView`
+    """
+    view = memoryview(data)
+    frames, _, _ = find_frames(view, start, end)
+
+    for offset, size in frames:
+        yield PacketView(view[offset:offset + size])
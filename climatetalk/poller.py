@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import logging
+import threading
+from collections import deque
+
+from . import timers
+from .cache import STATUS
+from .commands import (
+    HEAT_DEMAND,
+    COOL_DEMAND,
+    FAN_DEMAND,
+    HeatDemand,
+    CoolDemand,
+    FanDemand
+)
+from .framing import MIN_FRAME_SIZE
+from .message_types import SET_CONTROL_COMMAND
+from .airtime import airtime, BAUD_RATE, BACKGROUND
+from .rs485 import INTERPACKET_DELAY_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+# seconds between polls of a node that is changing or has a demand
+DEFAULT_MIN_INTERVAL = 2.0
+# seconds between polls of an idle node
+DEFAULT_MAX_INTERVAL = 60.0
+# the interval of an idle node grows by this factor after every poll
+DEFAULT_BACKOFF = 2.0
+# fraction of the bus time the polls may take up
+DEFAULT_BUDGET = 0.2
+
+# command code of the demands that speed up polling -> field of the demand
+DEMANDS = {
+    HEAT_DEMAND: HeatDemand.demand,
+    COOL_DEMAND: CoolDemand.demand,
+    FAN_DEMAND: FanDemand.demand
+}
+
+# payload size assumed for a snapshot that has not been seen yet
+_DEFAULT_PAYLOAD_SIZE = 32
+
+
+class PollTarget(object):
+    """
+    A node that is polled, see :meth:`Poller.add`.
+    """
+
+    def __init__(self, mdi, kinds, min_interval, max_interval):
+        self.mdi = mdi
+        self.kinds = kinds
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.timer = None
+        self.changed = False
+        self.demands = set()
+        self.polls = 0
+        # a poll was sent and its responses are not all in yet
+        self.polling = False
+        self.removed = False
+
+    @property
+    def node(self):
+        return self.mdi.address, self.mdi.subnet
+
+    @property
+    def active(self):
+        """
+        :return: ``True`` while a heat, cool or fan demand for the node is
+            on
+        """
+        return bool(self.demands)
+
+    def _changed(self, key, old, new):
+        if old is not None:
+            self.changed = True
+
+
+class Poller(object):
+    """
+    Polls the status of nodes, each on its own cadence.
+
+    A node is polled every ``min_interval`` seconds while its snapshots
+    keep changing or while a heat, cool or fan demand is on for it. Each
+    poll that finds nothing new multiplies the interval by ``backoff`` up
+    to ``max_interval``.
+
+    The polls are spaced so that they never take up more than ``budget``
+    of the bus time. The bus time of a poll is the air time of the request
+    and the response plus their inter packet gaps. When the nodes ask for
+    more than the budget allows the polls fall behind, in the order they
+    were due.
+
+    A poll does not wait for its responses, the next poll of the node is
+    scheduled once they are in. A node that does not answer does not hold
+    up the polls of the others.
+    """
+
+    def __init__(
+        self,
+        budget=DEFAULT_BUDGET,
+        baud_rate=BAUD_RATE,
+        gap=INTERPACKET_DELAY_THRESHOLD,
+        backoff=DEFAULT_BACKOFF,
+        wheel=None
+    ):
+        """
+        :param budget: fraction of the bus time, between 0 and 1
+        :param baud_rate: bus speed
+        :param gap: inter packet gap in microseconds
+        :param backoff: factor the interval of an idle node grows by
+        :param wheel: :class:`climatetalk.timers.TimingWheel` the polls are
+            scheduled on, the shared one when ``None``
+        """
+        if not 0 < budget <= 1:
+            raise ValueError('budget must be between 0 and 1')
+
+        self.budget = budget
+        self.baud_rate = baud_rate
+        self.gap = gap
+        self.backoff = backoff
+        self._wheel = wheel or timers.shared_wheel()
+        self._targets = {}
+        # targets that are due, in the order they came due
+        self._ready = deque()
+        # time before which the next poll may not start, in microseconds
+        self._allowed_at = 0
+        self._condition = threading.Condition()
+        self._event = threading.Event()
+        self._thread = None
+
+    def add(
+        self,
+        mdi,
+        kinds=(STATUS,),
+        min_interval=DEFAULT_MIN_INTERVAL,
+        max_interval=DEFAULT_MAX_INTERVAL
+    ):
+        """
+        :param mdi: :class:`climatetalk.mdi.base.MDIBase` of the node
+        :param kinds: snapshot kinds to poll
+        :param min_interval: seconds between polls while the node is busy
+        :param max_interval: seconds between polls while it is idle
+        :return: :class:`PollTarget`
+        """
+        target = PollTarget(mdi, tuple(kinds), min_interval, max_interval)
+
+        with self._condition:
+            if target.node in self._targets:
+                self.remove(mdi)
+
+            self._targets[target.node] = target
+
+            for kind in target.kinds:
+                mdi.network.snapshots.watch(
+                    target.node + (kind,),
+                    target._changed
+                )
+
+            self._schedule(target, 0)
+
+        return target
+
+    def remove(self, mdi):
+        """
+        :param mdi: node given to :meth:`add`
+        :return:
+        """
+        with self._condition:
+            target = self._targets.pop((mdi.address, mdi.subnet), None)
+            if target is None:
+                return
+
+            target.removed = True
+
+            if target.timer is not None:
+                target.timer.cancel()
+
+            if target in self._ready:
+                self._ready.remove(target)
+
+            for kind in target.kinds:
+                mdi.network.snapshots.unwatch(
+                    target.node + (kind,),
+                    target._changed
+                )
+
+    def observe(self, packet):
+        """
+        Looks for demands in the packets seen on the bus, the ones other
+        masters send as well as the ones the network sends. A node with a
+        demand on is polled right away and then at its fastest rate.
+
+        :param packet: received or sent packet
+        :return:
+        """
+        if packet.message_type != SET_CONTROL_COMMAND:
+            return
+
+        command = packet.payload_command_code
+        field = DEMANDS.get(command)
+
+        # a command too short to hold the demand says nothing about it
+        if field is None or len(packet) < field.end + 2:
+            return
+
+        target = self._targets.get((packet.destination, packet.subnet))
+        if target is None:
+            return
+
+        # received packets are views, a slice of either kind is a buffer
+        if field.get(packet[:field.end]):
+            starting = not target.demands
+            target.demands.add(command)
+        else:
+            starting = False
+            target.demands.discard(command)
+
+        if starting:
+            with self._condition:
+                target.interval = target.min_interval
+
+                # a poll that is out reschedules the node when it is done
+                if not target.polling and target not in self._ready:
+                    self._schedule(target, 0)
+
+    def cost(self, target):
+        """
+        :param target: :class:`PollTarget`
+        :return: microseconds of bus time one poll of the target takes
+        """
+        snapshots = target.mdi.network.snapshots
+        total = 0
+
+        for kind in target.kinds:
+            data = snapshots.peek(target.node + (kind,))
+            size = _DEFAULT_PAYLOAD_SIZE if data is None else len(data) + 1
+
+            total += airtime(
+                MIN_FRAME_SIZE * 2 + size,
+                self.baud_rate
+            ) + self.gap * 2
+
+        return total
+
+    @property
+    def utilization(self):
+        """
+        :return: fraction of the bus time the polls would take up if every
+            node stayed at its current interval
+        """
+        with self._condition:
+            targets = list(self._targets.values())
+
+        return sum(
+            self.cost(target) / (target.interval * 1e6) for target in targets
+        )
+
+    def _schedule(self, target, delay):
+        if target.timer is not None:
+            target.timer.cancel()
+
+        target.timer = self._wheel.schedule(delay, self._due, target)
+
+    def _due(self, target):
+        with self._condition:
+            if not target.removed and target not in self._ready:
+                self._ready.append(target)
+                self._condition.notify()
+
+    def start(self):
+        if self._thread is None:
+            self._event.clear()
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        self._event.set()
+
+        with self._condition:
+            self._condition.notify()
+
+        if self._thread is not None:
+            self._thread.join()
+
+    def _next(self):
+        with self._condition:
+            while not self._event.is_set():
+                if not self._ready:
+                    self._condition.wait()
+                    continue
+
+                remaining = self._allowed_at - timers.micros()
+                if remaining > 0:
+                    timers.wait(self._condition, remaining / 1e6)
+                    continue
+
+                return self._ready.popleft()
+
+        return None
+
+    def _run(self):
+        while not self._event.is_set():
+            target = self._next()
+            if target is None:
+                break
+
+            # charged before the poll so a node that does not answer still
+            # uses up its share of the bus
+            started = timers.micros()
+            self._allowed_at = started + self.cost(target) / self.budget
+            target.changed = False
+            target.polling = True
+
+            try:
+                future = target.mdi.refresh(target.kinds, BACKGROUND)
+            except Exception:  # NOQA
+                logger.exception(
+                    'polling node %02X:%02X failed',
+                    *target.node
+                )
+                self._polled(target, started, None)
+                continue
+
+            future.add_done_callback(
+                lambda f, t=target, s=started: self._polled(t, s, f)
+            )
+
+        self._thread = None
+
+    def _polled(self, target, started, future):
+        if (
+            future is not None and
+            not future.cancelled() and
+            future.exception() is not None
+        ):
+            logger.warning(
+                'polling node %02X:%02X failed: %s',
+                target.node[0],
+                target.node[1],
+                future.exception()
+            )
+
+        target.polls += 1
+        target.polling = False
+
+        if target.changed or target.active:
+            target.interval = target.min_interval
+        else:
+            target.interval = min(
+                target.interval * self.backoff,
+                target.max_interval
+            )
+
+        with self._condition:
+            if not target.removed and not self._event.is_set():
+                elapsed = (timers.micros() - started) / 1e6
+                self._schedule(
+                    target,
+                    max(0, target.interval - elapsed)
+                )
@@ -4,7 +4,11 @@
 import threading
 import logging
 from . import timers
-from .packet import Packet
+from .checksum import fletcher
+from .framing import FrameDelimiter, ChecksumFramer
+from .airtime import INTERACTIVE
+from .packet_view import PacketView
+from .transmit import TransmitQueue
 
 logger = logging.getLogger(__name__)
 
@@ -18,78 +22,181 @@ CT_ISUM2 = 0x00
 
 BROADCAST_SUBNET = 0x00
 
+# how long the reader blocks when no frame is in progress. This only
+# controls how quickly a call to stop is noticed.
+IDLE_READ_TIMEOUT = 0.5
+
 
 class RS485(object):
 
-    def __init__(self, serial):
+    def __init__(self, serial, checksum_framing=False):
+        """
+        :param serial: object providing ``recv_into`` and ``write``, write
+            is handed complete frames as bytes
+        :param checksum_framing: locate frames using the header and checksum
+            instead of the gaps between characters. Use this when the bus
+            is reached through an RS485 to IP bridge, TCP does not keep
+            the timing of the data intact.
+        """
         self.serial = serial
         self._thread = None
         self._event = threading.Event()
         self._lock = threading.Lock()
-        self.packet = bytearray()
-        self.inter_char_timer = timers.BusyTimer(
-            timers.TimerUS(),
-            INTERCHAR_DELAY_THRESHOLD,
-            self._queue_packet
-        )
+        self.checksum_framing = checksum_framing
+        self._delimiter = FrameDelimiter(INTERCHAR_DELAY_THRESHOLD)
+        # the frames are views into the receive buffer, nothing is copied
+        self._framer = ChecksumFramer(copy=False)
         self._recv_queue = []
         self._queue_event = threading.Event()
-        self._send_lock = threading.Lock()
-
-    def write(self, packet):
-        packet.calc_checksum()
-        with self._send_lock:
-            packet_timer = timers.TimerUS()
+        self._transmit = TransmitQueue(
+            serial.write,
+            INTERPACKET_DELAY_THRESHOLD
+        )
 
-            for char in packet:
-                self.serial.write(char)
-            while packet_timer.elapsed() < INTERPACKET_DELAY_THRESHOLD:
-                pass
+    @property
+    def dropped(self):
+        """
+        :return: number of corrupt frames thrown away by the gap framing
+        """
+        return self._delimiter.dropped
+
+    @property
+    def skipped(self):
+        """
+        :return: number of bytes thrown away by the checksum framing while
+            resynchronizing
+        """
+        return self._framer.skipped
+
+    @property
+    def budget(self):
+        """
+        :return: :class:`climatetalk.airtime.AirtimeBudget` of the bus
+        """
+        return self._transmit.budget
+
+    @property
+    def latency(self):
+        """
+        :return: dict of priority to :class:`climatetalk.transmit.LatencyStats`
+        """
+        return self._transmit.latency
+
+    def write(self, packet, callback=None, priority=None):
+        """
+        Queues a packet to be sent.
+
+        :param packet: .. py:class:: climatetalk.packet.Packet
+        :param callback: called with the future once the packet is sent
+        :param priority: one of :data:`climatetalk.airtime.PRIORITIES`,
+            ``None`` uses the priority of the packet class
+        :return: :class:`concurrent.futures.Future` that completes once
+            the packet has been written
+        :raises climatetalk.airtime.BudgetExceeded: the priority is out of
+            bus time
+        """
+        if priority is None:
+            priority = getattr(packet, 'priority', INTERACTIVE)
+
+        # the caller may send the same packet again, it is left untouched
+        frame = bytearray(packet)
+        frame[-2], frame[-1] = fletcher(frame, 0, len(frame) - 2)
+        return self._transmit.put(frame, callback, priority)
 
     def start(self):
+        self._transmit.start()
+
         if self._thread is None:
             self._thread = threading.Thread(target=self._run)
             self._thread.daemon = True
             self._thread.start()
 
-    def _queue_packet(self):
-        packet = self.packet
-        self.packet = bytearray()
-
+    def _queue_packet(self, packet):
         self._recv_queue.append(packet)
         self._queue_event.set()
 
     def __iter__(self):
+        """
+        :return: generator of the received packets, read only
+            :class:`climatetalk.packet_view.PacketView` instances
+        """
         while not self._event.is_set():
             self._queue_event.wait()
             while self._recv_queue:
-                yield Packet(self._recv_queue.pop(0))
+                yield PacketView(self._recv_queue.pop(0))
             self._queue_event.clear()
 
     def _run(self):
-        packet_timer = timers.TimerUS()
         self._queue_event.clear()
         self._event.clear()
         del self._recv_queue[:]
 
-        while not self._event.is_set():
-            char = self.serial.recv(1)
+        if self.checksum_framing:
+            self._run_checksum_framing()
+        else:
+            self._run_gap_framing()
 
-            if char:
-                if self.inter_char_timer.is_running:
-                    self.packet += bytearray(char)
-                    packet_timer.reset()
-                    self.inter_char_timer.start()
+        self._thread = None
 
-                if packet_timer.elapsed() >= INTERPACKET_DELAY_THRESHOLD:
-                    self.packet = bytearray(char)
-                    self.inter_char_timer.start()
-                    packet_timer.reset()
+    def _run_checksum_framing(self):
+        framer = self._framer
 
-        self._thread = None
+        while not self._event.is_set():
+            try:
+                count = self.serial.recv_into(
+                    framer.buffer.writable(),
+                    IDLE_READ_TIMEOUT
+                )
+            except EnvironmentError:
+                logger.exception('RS485 read failed')
+                break
+
+            if count:
+                for packet in framer.commit(count):
+                    self._queue_packet(packet)
+
+    def _run_gap_framing(self):
+        delimiter = self._delimiter
+
+        while not self._event.is_set():
+            timeout = delimiter.timeout(timers.micros())
+
+            if timeout is None:
+                timeout = IDLE_READ_TIMEOUT
+
+            try:
+                count = self.serial.recv_into(
+                    delimiter.buffer.writable(),
+                    timeout
+                )
+            except EnvironmentError:
+                logger.exception('RS485 read failed')
+                break
+
+            now = timers.micros()
+
+            if count:
+                delimiter.commit(count, now)
+            else:
+                for packet in delimiter.expire(now):
+                    self._queue_packet(packet)
+
+        for packet in delimiter.flush():
+            self._queue_packet(packet)
+
+    def reset(self):
+        """
+        Drops the part of a frame received so far, call it from the reading
+        thread when the connection to the bridge was made again. The rest
+        of that frame is never going to arrive.
+        """
+        self._framer.reset()
+        self._delimiter.reset()
 
     def stop(self):
         self._event.set()
         self._queue_event.set()
+        self._transmit.stop()
+
         if self._thread is not None:
             self._thread.join()
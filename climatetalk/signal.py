@@ -2,44 +2,167 @@
 # Copyright 2020 Kevin Schlosser
 
 import threading
+import logging
 
+logger = logging.getLogger(__name__)
 
-class Signal(object):
 
-    def __init__(self):
-        self._callbacks = {}
+class Subscription(object):
+    """
+    A callback that is connected to a signal.
 
-    def send(self, signal, packet):
-        address = packet.address
-        subnet = packet.subnet
+    ``None`` for the signal, address or subnet matches any value.
+
+    :param router: the :class:`Signal` the subscription belongs to
+    :param signal: message type or ``None``
+    :param address: node address or ``None``
+    :param subnet: subnet or ``None``
+    :param callback: called with the packet
+    :param filter: optional callable, the callback is only called when
+        ``filter(packet)`` returns ``True``
+    """
+
+    def __init__(self, router, signal, address, subnet, callback, filter=None):
+        self._router = router
+        self.signal = signal
+        self.address = address
+        self.subnet = subnet
+        self.callback = callback
+        self.filter = filter
+
+    def matches(self, signal, address, subnet):
+        return (
+            (self.signal is None or self.signal == signal) and
+            (self.address is None or self.address == address) and
+            (self.subnet is None or self.subnet == subnet)
+        )
+
+    def disconnect(self):
+        self._router.remove(self)
 
-        try:
-            self._callbacks[signal][(address, subnet)](packet)
-        except KeyError:
-            pass
+    def __call__(self, packet):
+        if self.filter is None or self.filter(packet):
+            self.callback(packet)
 
-    def connect(self, signal, address, subnet, callback):
-        if signal not in self._callbacks:
-            self._callbacks[signal] = {}
 
-        self._callbacks[signal][(address, subnet)] = callback
+class Signal(object):
+    """
+    Routes received packets to any number of subscribers.
+
+    The subscribers for a (signal, address, subnet) key are worked out the
+    first time a packet with that key is sent and kept, so sending costs a
+    single dict lookup however many subscribers there are. The routes are
+    thrown away whenever a subscriber is added or removed.
+    """
 
-    def disconnect(self, signal, address, subnet):
-        try:
-            del self._callbacks[signal][(address, subnet)]
-        except KeyError:
-            pass
+    def __init__(self):
+        self._subscriptions = []
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def _route(self, key):
+        with self._lock:
+            route = tuple(
+                subscription for subscription in self._subscriptions
+                if subscription.matches(*key)
+            )
+            self._routes[key] = route
+
+        return route
+
+    def route(self, signal, packet):
+        """
+        :param signal: message type
+        :param packet: packet that is being sent
+        :return: tuple of the subscriptions the packet goes to
+        """
+        key = (signal, packet.source, packet.subnet)
+
+        route = self._routes.get(key)
+        if route is None:
+            route = self._route(key)
+
+        return route
+
+    def send(self, signal, packet):
+        for subscription in self.route(signal, packet):
+            try:
+                subscription(packet)
+            except Exception:  # NOQA
+                logger.exception(
+                    'signal callback %r failed', subscription.callback
+                )
+
+    def connect(self, signal, address, subnet, callback, filter=None):
+        """
+        :param signal: message type, ``None`` matches all
+        :param address: node address, ``None`` matches all
+        :param subnet: subnet, ``None`` matches all
+        :param callback: called with every matching packet
+        :param filter: optional callable that gets the packet and returns
+            ``True`` if the callback should be called
+        :return: :class:`Subscription`
+        """
+        subscription = Subscription(
+            self,
+            signal,
+            address,
+            subnet,
+            callback,
+            filter
+        )
+
+        with self._lock:
+            self._subscriptions.append(subscription)
+            self._routes = {}
+
+        return subscription
+
+    def remove(self, subscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+                self._routes = {}
+
+    def disconnect(self, signal, address, subnet, callback=None):
+        """
+        :param signal: message type given to :meth:`connect`
+        :param address: node address given to :meth:`connect`
+        :param subnet: subnet given to :meth:`connect`
+        :param callback: only remove this callback, all of the callbacks
+            connected with the same signal, address and subnet are removed
+            when ``None``
+        :return:
+        """
+        with self._lock:
+            subscriptions = [
+                subscription for subscription in self._subscriptions
+                if not (
+                    subscription.signal == signal and
+                    subscription.address == address and
+                    subscription.subnet == subnet and
+                    (callback is None or subscription.callback == callback)
+                )
+            ]
+
+            if len(subscriptions) != len(self._subscriptions):
+                self._subscriptions = subscriptions
+                self._routes = {}
 
 
 _signal = Signal()
 
 
-def connect(signal, address, subnet, callback):
-    _signal.connect(signal, address, subnet, callback)
+def connect(signal, address, subnet, callback, filter=None):
+    return _signal.connect(signal, address, subnet, callback, filter)
+
+
+def disconnect(signal, address, subnet, callback=None):
+    _signal.disconnect(signal, address, subnet, callback)
 
 
-def disconnect(signal, address, subnet):
-    _signal.disconnect(signal, address, subnet)
+def route(signal, packet):
+    return _signal.route(signal, packet)
 
 
 def send(signal, packet):
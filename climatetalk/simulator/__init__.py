@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+"""
+Simulated RS485 bus for running the library without equipment.
+"""
+
+from .bus import SimulatedBus  # NOQA
+from .bridge import BridgeServer  # NOQA
+from .devices import (  # NOQA
+    Device,
+    Thermostat,
+    Furnace,
+    AirHandler,
+    HeatPump,
+    Motor,
+    WaterHeater
+)
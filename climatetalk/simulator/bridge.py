@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import logging
+import random
+import select
+import socket
+import threading
+from collections import deque
+
+from .. import timers
+from ..airtime import airtime, BAUD_RATE
+from ..framing import ChecksumFramer, RECEIVE_BUFFER_SIZE
+from ..rs485 import INTERCHAR_DELAY_THRESHOLD
+from .bus import SimulatedBus, IDLE_READ_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+# bytes the bridge collects from the UART before it sends a TCP segment
+DEFAULT_SEGMENT_SIZE = 64
+# most garbage bytes put in front of a frame by noise injection
+MAX_NOISE = 8
+
+
+class _Pipe(object):
+    """
+    Hands data to ``write`` at the times it was scheduled for, in order.
+    """
+
+    def __init__(self, write, clock, name):
+        self._write = write
+        self._clock = clock
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=name)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def put(self, send_at, data):
+        """
+        :param send_at: time in microseconds the data goes out
+        :param data: bytes
+        :return:
+        """
+        with self._condition:
+            self._queue.append((send_at, data))
+            self._condition.notify()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if not self._queue:
+                        self._condition.wait()
+                        continue
+
+                    remaining = self._queue[0][0] - self._clock.micros()
+                    if remaining <= 0:
+                        break
+
+                    self._condition.wait(remaining / 1e6)
+
+                if self._stopped:
+                    return
+
+                _, data = self._queue.popleft()
+
+            try:
+                self._write(data)
+            except EnvironmentError:
+                return
+
+
+class BridgeServer(object):
+    """
+    Local stand-in for the RS485 to IP bridge with simulated devices behind
+    it, for running the whole transport of
+    :class:`climatetalk.network.Network` against it:
+
+        bridge = BridgeServer([Thermostat(0x01)], latency=0.005)
+        bridge.start()
+        network = Network(*bridge.address)
+
+    The bridge is modelled on an ESP32 with a MAX485. The bytes the client
+    sends are put on the bus at ``baud_rate``, a frame is complete when
+    the client goes quiet for longer than the inter character gap. The
+    bytes the devices send come off the bus at ``baud_rate`` and are sent
+    to the client in segments of ``segment_size`` bytes as they arrive, so
+    the client sees frames split and merged the way a real bridge splits
+    and merges them. ``latency`` and up to ``jitter`` seconds are added
+    in both directions.
+
+    Errors are injected into the frames of the devices, the path the
+    framing of the client has to cope with. Every frame is thrown away
+    with a chance of ``drop_rate``, gets a bit flipped with a chance of
+    ``corrupt_rate`` and gets garbage in front of it with a chance of
+    ``noise_rate``. A ``seed`` makes the errors repeat from run to run.
+
+    The bridge runs on real time, :meth:`disconnect` drops the client to
+    exercise reconnecting.
+    """
+
+    def __init__(
+        self,
+        devices=(),
+        host='127.0.0.1',
+        port=0,
+        baud_rate=BAUD_RATE,
+        segment_size=DEFAULT_SEGMENT_SIZE,
+        latency=0.0,
+        jitter=0.0,
+        drop_rate=0.0,
+        corrupt_rate=0.0,
+        noise_rate=0.0,
+        seed=None,
+        bus=None
+    ):
+        """
+        :param devices: :class:`climatetalk.simulator.devices.Device`
+            instances behind the bridge
+        :param host: address to listen on
+        :param port: port to listen on, 0 picks a free one
+        :param baud_rate: bus speed
+        :param segment_size: most bytes sent to the client in one segment
+        :param latency: seconds added in each direction
+        :param jitter: most seconds added on top of ``latency``
+        :param drop_rate: chance a device frame is lost
+        :param corrupt_rate: chance a device frame has a bit flipped
+        :param noise_rate: chance of garbage in front of a device frame
+        :param seed: seed of the error injection
+        :param bus: :class:`climatetalk.simulator.SimulatedBus` to use,
+            one is made for ``devices`` when ``None``
+        """
+        if bus is None:
+            bus = SimulatedBus(devices)
+        else:
+            for device in devices:
+                bus.add(device)
+
+        self.bus = bus
+        self.baud_rate = baud_rate
+        self.segment_size = segment_size
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.corrupt_rate = corrupt_rate
+        self.noise_rate = noise_rate
+        self._random = random.Random(seed)
+        # the network stack may be on a virtual clock, sockets are not
+        self._clock = timers.MonotonicClock()
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((host, port))
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._threads = []
+        self._client = None
+        self._downstream = None
+        # time in microseconds the bus is free in each direction
+        self._line_free = {True: 0, False: 0}
+        self._last_sent = 0
+        # connections accepted, frames each way and injected errors
+        self.connections = 0
+        self.frames_up = 0
+        self.frames_down = 0
+        self.segments = 0
+        self.dropped = 0
+        self.corrupted = 0
+        self.noise = 0
+
+    @property
+    def address(self):
+        """
+        :return: (host, port) the bridge listens on
+        """
+        return self._server.getsockname()[:2]
+
+    def start(self):
+        if self._threads:
+            return
+
+        self._event.clear()
+        self._server.listen(1)
+        self.bus.start()
+
+        for target, name in (
+            (self._accept, 'climatetalk-bridge-accept'),
+            (self._read_bus, 'climatetalk-bridge-bus')
+        ):
+            thread = threading.Thread(target=target, name=name)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._event.set()
+        self.disconnect()
+
+        for thread in self._threads:
+            thread.join()
+
+        del self._threads[:]
+        self._server.close()
+        self.bus.stop()
+
+    def disconnect(self):
+        """
+        Drops the connection of the client like a bridge that lost its
+        WiFi. The client can connect again right away.
+
+        :return:
+        """
+        with self._lock:
+            client = self._client
+            downstream = self._downstream
+            self._client = None
+            self._downstream = None
+
+        if client is not None:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except EnvironmentError:
+                pass
+
+            client.close()
+
+        if downstream is not None:
+            downstream.stop()
+
+    def _delay(self):
+        delay = self.latency
+
+        if self.jitter:
+            delay += self._random.uniform(0, self.jitter)
+
+        return delay * 1e6
+
+    def _on_line(self, upstream, length, now):
+        # the bus carries one frame at a time in each direction
+        start = max(now, self._line_free[upstream])
+        self._line_free[upstream] = start + airtime(length, self.baud_rate)
+        return start
+
+    def _accept(self):
+        while not self._event.is_set():
+            try:
+                readable = select.select(
+                    [self._server],
+                    [],
+                    [],
+                    IDLE_READ_TIMEOUT
+                )[0]
+
+                if not readable:
+                    continue
+
+                client, _ = self._server.accept()
+            except EnvironmentError:
+                if not self._event.is_set():
+                    logger.exception('bridge accept failed')
+                break
+
+            # one client at a time like the bridge, a new one takes over
+            self.disconnect()
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            with self._lock:
+                self._client = client
+                self._downstream = _Pipe(
+                    client.sendall,
+                    self._clock,
+                    'climatetalk-bridge-downstream'
+                )
+                self.connections += 1
+
+            thread = threading.Thread(
+                target=self._read_client,
+                args=(client,),
+                name='climatetalk-bridge-upstream'
+            )
+            thread.daemon = True
+            thread.start()
+
+    def _read_client(self, client):
+        upstream = _Pipe(
+            self.bus.sock.sendall,
+            self._clock,
+            'climatetalk-bridge-upstream-pipe'
+        )
+        frame = bytearray()
+        gap = INTERCHAR_DELAY_THRESHOLD / 1e6
+
+        try:
+            while not self._event.is_set():
+                timeout = gap if frame else IDLE_READ_TIMEOUT
+
+                try:
+                    readable = select.select([client], [], [], timeout)[0]
+                    data = client.recv(RECEIVE_BUFFER_SIZE) if readable else None
+                except (EnvironmentError, ValueError):
+                    # ValueError when disconnect closed the socket
+                    break
+
+                if data:
+                    frame.extend(data)
+                    continue
+
+                if frame:
+                    # the line went quiet, the frame is complete
+                    now = self._clock.micros()
+                    start = self._on_line(True, len(frame), now)
+                    upstream.put(
+                        start + airtime(len(frame), self.baud_rate) +
+                        self._delay(),
+                        bytes(frame)
+                    )
+                    self.frames_up += 1
+                    frame = bytearray()
+
+                if data is not None:
+                    # closed by the client
+                    break
+        finally:
+            upstream.stop()
+
+    def _read_bus(self):
+        sock = self.bus.sock
+        # the devices answer one frame at a time, on the bus the gaps keep
+        # the frames apart. The stream from the bus has no gaps.
+        framer = ChecksumFramer()
+
+        while not self._event.is_set():
+            try:
+                readable = select.select(
+                    [sock],
+                    [],
+                    [],
+                    IDLE_READ_TIMEOUT
+                )[0]
+
+                if not readable:
+                    continue
+
+                data = sock.recv(RECEIVE_BUFFER_SIZE)
+            except EnvironmentError:
+                if not self._event.is_set():
+                    logger.exception('bridge bus read failed')
+                break
+
+            if not data:
+                break
+
+            for frame in framer.feed(data):
+                self._forward(frame)
+
+    def _forward(self, frame):
+        with self._lock:
+            downstream = self._downstream
+
+        # nobody connected, the frame goes nowhere like on a real bridge
+        if downstream is None:
+            return
+
+        self.frames_down += 1
+        rand = self._random
+
+        if self.drop_rate and rand.random() < self.drop_rate:
+            self.dropped += 1
+            return
+
+        if self.corrupt_rate and rand.random() < self.corrupt_rate:
+            self.corrupted += 1
+            frame[rand.randrange(len(frame))] ^= 1 << rand.randrange(8)
+
+        if self.noise_rate and rand.random() < self.noise_rate:
+            self.noise += 1
+            garbage = bytearray(
+                rand.randrange(256)
+                for _ in range(rand.randint(1, MAX_NOISE))
+            )
+            frame = garbage + frame
+
+        now = self._clock.micros()
+        start = self._on_line(False, len(frame), now)
+        delay = self._delay()
+
+        # a segment goes out once its last byte came off the bus
+        for offset in range(0, len(frame), self.segment_size):
+            segment = frame[offset:offset + self.segment_size]
+            received = start + airtime(offset + len(segment), self.baud_rate)
+            # jitter must not reorder the segments
+            send_at = max(received + delay, self._last_sent)
+            self._last_sent = send_at
+            downstream.put(send_at, bytes(segment))
+            self.segments += 1
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import logging
+import select
+import socket
+import threading
+
+from .. import timers
+from ..framing import ChecksumFramer, RECEIVE_BUFFER_SIZE
+from ..packet import Packet
+
+logger = logging.getLogger(__name__)
+
+# how long the bus thread blocks when nothing is sent, this only controls
+# how quickly a call to stop is noticed
+IDLE_READ_TIMEOUT = 0.5
+
+
+class SimulatedBus(object):
+    """
+    In process RS485 bus with emulated nodes on it.
+
+    It takes the place of the RS485 to IP bridge, hand :attr:`sock` to
+    :class:`climatetalk.network.Network`:
+
+        bus = SimulatedBus([Thermostat(0x01), Furnace(0x02)])
+        bus.start()
+        network = Network(None, None, sock=bus.sock)
+
+    The network and the bus are joined by a byte stream like the one of
+    the bridge, the bus finds the frames in it with the same
+    :class:`climatetalk.framing.ChecksumFramer` the network uses. Bytes
+    that do not make up a frame, because of a wrong length byte or a bad
+    checksum, never reach the devices and are counted in :attr:`skipped`.
+
+    Every frame is handed to the devices it is addressed to and their
+    responses are written back. Responses go out ``turnaround`` seconds
+    after the request, measured on the clock of :mod:`climatetalk.timers`.
+    """
+
+    def __init__(self, devices=(), turnaround=0.0):
+        """
+        :param devices: :class:`climatetalk.simulator.devices.Device`
+            instances on the bus
+        :param turnaround: seconds a device takes to answer
+        """
+        self.devices = list(devices)
+        self.turnaround = turnaround
+        self.sock, self._sock = socket.socketpair()
+        self._framer = ChecksumFramer()
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._thread = None
+        # frames read from the network, that no device answered and
+        # written back
+        self.received = 0
+        self.unanswered = 0
+        self.sent = 0
+
+    @property
+    def skipped(self):
+        """
+        :return: number of bytes from the network that were not part of a
+            good frame
+        """
+        return self._framer.skipped
+
+    def add(self, device):
+        """
+        :param device: :class:`climatetalk.simulator.devices.Device`
+        :return: the device
+        """
+        with self._lock:
+            self.devices.append(device)
+
+        return device
+
+    def remove(self, device):
+        with self._lock:
+            self.devices.remove(device)
+
+    def device(self, address, subnet=None):
+        """
+        :param address: node address
+        :param subnet: node subnet, ``None`` matches any
+        :return: the device or ``None``
+        """
+        with self._lock:
+            for device in self.devices:
+                if device.address == address and (
+                    subnet is None or device.subnet == subnet
+                ):
+                    return device
+
+        return None
+
+    def inject(self, data):
+        """
+        Writes raw bytes to the network as if another node sent them.
+
+        :param data: a frame, part of one or garbage
+        :return:
+        """
+        self._sock.sendall(bytes(data))
+
+    def start(self):
+        if self._thread is None:
+            self._event.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name='climatetalk-simulator'
+            )
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        self._event.set()
+
+        if self._thread is not None:
+            self._thread.join()
+
+        self._sock.close()
+        self.sock.close()
+
+    def _run(self):
+        while not self._event.is_set():
+            try:
+                readable = select.select(
+                    [self._sock],
+                    [],
+                    [],
+                    IDLE_READ_TIMEOUT
+                )[0]
+
+                if not readable:
+                    continue
+
+                data = self._sock.recv(RECEIVE_BUFFER_SIZE)
+            except EnvironmentError:
+                if not self._event.is_set():
+                    logger.exception('simulated bus read failed')
+                break
+
+            if not data:
+                break
+
+            for frame in self._framer.feed(data):
+                self._receive(frame)
+
+        self._thread = None
+
+    def _receive(self, frame):
+        self.received += 1
+        packet = Packet(frame)
+
+        with self._lock:
+            devices = [d for d in self.devices if d.matches(packet)]
+
+        answered = False
+
+        for device in devices:
+            try:
+                response = device.handle(packet)
+            except Exception:  # NOQA
+                logger.exception('%r failed to handle %r', device, packet)
+                continue
+
+            if response is None:
+                continue
+
+            answered = True
+
+            if self.turnaround:
+                timers.shared_wheel().schedule(
+                    self.turnaround,
+                    self._write,
+                    response
+                )
+            else:
+                self._write(response)
+
+        if not answered:
+            self.unanswered += 1
+
+    def _write(self, frame):
+        try:
+            self._sock.sendall(bytes(frame))
+        except EnvironmentError:
+            if not self._event.is_set():
+                logger.exception('simulated bus write failed')
+            return
+
+        self.sent += 1
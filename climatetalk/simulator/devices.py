@@ -0,0 +1,538 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+"""
+Emulated nodes for :class:`climatetalk.simulator.SimulatedBus`.
+
+Every device holds the configuration, status, sensor and identification
+MDI images it reports, laid out the way the classes in
+:mod:`climatetalk.mdi` decode them. The images are plain bytearrays, a
+test changes what a node reports by writing into them.
+"""
+
+from .. import timers
+from ..checksum import fletcher
+from ..commands import (
+    COMMAND_DATA_OFFSET,
+    ControlCommandRefreshTimer,
+    HEAT_SET_POINT_TEMPERATURE_MODIFY,
+    COOL_SET_POINT_TEMPERATURE_MODIFY,
+    SYSTEM_SWITCH_MODIFY,
+    FAN_KEY_SELECTION,
+    DEHUMIDIFICATION_SET_POINT_MODIFY,
+    HUMIDIFICATION_SET_POINT_MODIFY,
+    DEHUMIDIFICATION_DEMAND,
+    HUMIDIFICATION_DEMAND,
+    HEAT_DEMAND,
+    COOL_DEMAND,
+    FAN_DEMAND,
+    BACK_UP_HEAT_DEMAND,
+    DEFROST_DEMAND,
+    AUX_HEAT_DEMAND,
+    SET_MOTOR_SPEED,
+    SET_MOTOR_TORQUE,
+    SET_AIRFLOW_DEMAND,
+    SET_CONTROL_MODE,
+    SET_MOTOR_DIRECTION
+)
+from ..framing import MIN_FRAME_SIZE
+from ..mac_address import MACAddress
+from ..message_types import (
+    GET_CONFIGURATION,
+    GET_CONFIGURATION_RESPONSE,
+    GET_STATUS,
+    GET_STATUS_RESPONSE,
+    GET_SENSOR_DATA,
+    GET_SENSOR_DATA_RESPONSE,
+    SET_CONTROL_COMMAND,
+    SET_CONTROL_COMMAND_RESPONSE,
+    DIRECT_MEMORY_ACCESS_READ,
+    DIRECT_MEMORY_ACCESS_READ_RESPONSE,
+    DIRECT_MEMORY_ACCESS_READ_RESPONSE_MOTOR,
+    NODE_DISCOVERY,
+    NODE_DISCOVERY_RESPONSE
+)
+from ..packet import (
+    DMA_READ_MDI_TYPE_CONFIGURATION,
+    DMA_READ_MDI_TYPE_STATUS,
+    DMA_READ_MDI_TYPE_SENSOR,
+    DMA_READ_MDI_TYPE_IDENTIFICATION
+)
+from ..protocol import ACK1, NAK2, LWP_NODE_TYPE_BLOWER_MOTOR_1
+from ..rs485 import BROADCAST, BROADCAST_SUBNET
+from ..session_id import SessionId
+
+# the DMA read request documents 0x07 for the sensor MDI as well
+_DMA_READ_MDI_TYPE_SENSOR_DATA = 0x07
+
+
+def _image(size, values):
+    """
+    :param size: number of bytes
+    :param values: dict of offset to a byte or a sequence of bytes
+    :return: bytearray
+    """
+    image = bytearray(size)
+
+    for offset, value in values.items():
+        if isinstance(value, int):
+            value = (value,)
+
+        image[offset:offset + len(value)] = bytearray(value)
+
+    return image
+
+
+def _sensor_blocks(*blocks):
+    """
+    :param blocks: (sensor id, temperature in degrees) pairs
+    :return: sensor data blocks as read by :class:`climatetalk.mdi.sensors.SensorBase`
+    """
+    data = bytearray()
+
+    for sensor_id, temp in blocks:
+        value = int(abs(temp)) << 4 | int(abs(temp) * 16) & 0xF
+        # installed
+        value |= 1 << 15
+
+        if temp < 0:
+            value |= 1 << 14
+
+        data.extend((sensor_id, 2, value >> 8 & 0xFF, value & 0xFF))
+
+    return data
+
+
+class Device(object):
+    """
+    A node on the simulated bus.
+
+    ``_settings`` maps a command code to the (offset, size) of the status
+    bytes the command sets, the value is the first ``size`` bytes of the
+    command data. ``_demands`` maps the code of a demand to the status
+    offset of the demand and of the demand the equipment is running, or
+    ``None`` when it does not report one. A demand is dropped when its
+    refresh timer runs out, the timer is measured on the clock of
+    :mod:`climatetalk.timers` so it follows a
+    :class:`climatetalk.timers.VirtualClock`.
+
+    Control commands that are not supported, are too short or whose
+    length byte does not match the frame are answered with a NAK and
+    change nothing.
+    """
+    node_type = 0x00
+    # message type DMA reads are answered with
+    dma_response_type = DIRECT_MEMORY_ACCESS_READ_RESPONSE
+    _configuration = bytearray()
+    _status = bytearray()
+    _sensor = bytearray()
+    _identification = bytearray()
+    _settings = {}
+    _demands = {}
+
+    def __init__(self, address, subnet=0x01, mac_address=None, session_id=None):
+        """
+        :param address: node address
+        :param subnet: node subnet
+        :param mac_address: :class:`climatetalk.mac_address.MACAddress`,
+            a random one when ``None``
+        :param session_id: :class:`climatetalk.session_id.SessionId`, a
+            random one when ``None``
+        """
+        self.address = address
+        self.subnet = subnet
+        self.mac_address = mac_address or MACAddress.create()
+        self.session_id = session_id or SessionId.create()
+        self.configuration = bytearray(self._configuration)
+        self.status = bytearray(self._status)
+        self.sensor = bytearray(self._sensor)
+        self.identification = bytearray(self._identification)
+        # number of requests addressed to the node, of commands applied
+        # and of commands answered with a NAK
+        self.requests = 0
+        self.commands = 0
+        self.rejected = 0
+        # status offset -> time the demand runs out in microseconds
+        self._held = {}
+        self._handlers = {
+            GET_CONFIGURATION: self._get_configuration,
+            GET_STATUS: self._get_status,
+            GET_SENSOR_DATA: self._get_sensor_data,
+            SET_CONTROL_COMMAND: self._set_control_command,
+            DIRECT_MEMORY_ACCESS_READ: self._direct_memory_access_read,
+            NODE_DISCOVERY: self._node_discovery
+        }
+
+    def __repr__(self):
+        return '<{0} {1:02X}:{2:02X}>'.format(
+            self.__class__.__name__,
+            self.address,
+            self.subnet
+        )
+
+    def matches(self, packet):
+        """
+        :param packet: received packet
+        :return: ``True`` if the packet is addressed to the node
+        """
+        return (
+            packet.destination in (self.address, BROADCAST) and
+            packet.subnet in (self.subnet, BROADCAST_SUBNET)
+        )
+
+    def handle(self, packet):
+        """
+        :param packet: packet addressed to the node
+        :return: frame of the response or ``None`` when the node does not
+            answer
+        """
+        self.expire()
+
+        handler = self._handlers.get(packet.message_type)
+        if handler is None:
+            return None
+
+        self.requests += 1
+        return handler(packet)
+
+    def expire(self, now=None):
+        """
+        Drops the demands whose refresh timer ran out.
+
+        :param now: current time in microseconds
+        :return:
+        """
+        if not self._held:
+            return
+
+        if now is None:
+            now = timers.micros()
+
+        for offset, expires in list(self._held.items()):
+            if expires <= now:
+                del self._held[offset]
+                self._set_demand(offset, 0)
+
+    def _set_demand(self, offset, value):
+        for demand, actual in self._demands.values():
+            if demand == offset:
+                self.status[demand] = value
+
+                if actual is not None:
+                    self.status[actual] = value
+
+    def _reply(self, request, message_type, payload):
+        frame = bytearray(10)
+        frame[0] = request.source
+        frame[1] = self.address
+        frame[2] = self.subnet
+        frame[6] = self.node_type
+        frame[7] = message_type
+        frame[8] = request.packet_number
+        frame[9] = len(payload)
+        frame.extend(payload)
+        frame.extend(fletcher(frame))
+        return frame
+
+    def _get_configuration(self, request):
+        # DB ID and DB length go ahead of the MDI
+        payload = bytearray((0x00, len(self.configuration)))
+        return self._reply(
+            request,
+            GET_CONFIGURATION_RESPONSE,
+            payload + self.configuration
+        )
+
+    def _get_status(self, request):
+        return self._reply(
+            request,
+            GET_STATUS_RESPONSE,
+            bytearray(1) + self.status
+        )
+
+    def _get_sensor_data(self, request):
+        return self._reply(
+            request,
+            GET_SENSOR_DATA_RESPONSE,
+            bytearray(1) + self.sensor
+        )
+
+    def _images(self):
+        return {
+            DMA_READ_MDI_TYPE_CONFIGURATION: self.configuration,
+            DMA_READ_MDI_TYPE_STATUS: self.status,
+            DMA_READ_MDI_TYPE_SENSOR: self.sensor,
+            _DMA_READ_MDI_TYPE_SENSOR_DATA: self.sensor,
+            DMA_READ_MDI_TYPE_IDENTIFICATION: self.identification
+        }
+
+    def _direct_memory_access_read(self, request):
+        mdi = request[10]
+        start = request[12]
+        count = request[13]
+
+        image = self._images().get(mdi)
+        if image is None:
+            return None
+
+        # like the snapshot slices, a count of n reads n + 1 bytes
+        data = image[start:start + count + 1]
+
+        if self.dma_response_type == DIRECT_MEMORY_ACCESS_READ_RESPONSE_MOTOR:
+            header = bytearray((mdi, request[11], start))
+        else:
+            header = bytearray((mdi,))
+
+        return self._reply(request, self.dma_response_type, header + data)
+
+    def _node_discovery(self, request):
+        node_type_filter = request[10]
+
+        if node_type_filter not in (0x00, self.node_type):
+            return None
+
+        payload = bytearray((self.node_type, 0x00))
+        payload += self.mac_address
+        payload += self.session_id
+        return self._reply(request, NODE_DISCOVERY_RESPONSE, payload)
+
+    def _set_control_command(self, request):
+        command_code = request[10] | request[11] << 8
+        data = request[COMMAND_DATA_OFFSET:-2]
+
+        if request[9] != len(request) - MIN_FRAME_SIZE:
+            return self._reject(request)
+
+        if command_code in self._settings:
+            offset, size = self._settings[command_code]
+
+            if len(data) < size:
+                return self._reject(request)
+
+            self.status[offset:offset + size] = data[:size]
+        elif command_code in self._demands:
+            # the refresh timer and the demand, a fan demand has its mode
+            # in between
+            if len(data) < 2:
+                return self._reject(request)
+
+            offset = self._demands[command_code][0]
+            value = data[-1]
+            self._set_demand(offset, value)
+
+            duration = ControlCommandRefreshTimer(data[:1]).duration
+
+            if value and duration:
+                self._held[offset] = timers.micros() + duration * 1e6
+            else:
+                self._held.pop(offset, None)
+        else:
+            # equipment that does not support the command
+            return self._reject(request)
+
+        self.commands += 1
+        return self._command_response(request, ACK1)
+
+    def _reject(self, request):
+        self.rejected += 1
+        return self._command_response(request, NAK2)
+
+    def _command_response(self, request, code):
+        # the command code followed by the ACK or NAK code
+        return self._reply(
+            request,
+            SET_CONTROL_COMMAND_RESPONSE,
+            request[10:12] + bytearray((code,))
+        )
+
+
+class Thermostat(Device):
+    node_type = 0x01
+
+    _configuration = _image(33, {
+        0: 0x01,  # system type, conventional
+        1: 0x22,  # 2 heat stages, 2 cool stages
+        3: (0x01, 0x2C),  # filter time, 300 hours
+        8: 90,  # max temp
+        9: 45,  # min temp
+        18: 0x11,  # 1 aux heat stage, 1 fan stage
+        20: 4,  # heat cycle rate
+        21: 3,  # cool cycle rate
+        24: 8,  # display contrast
+        25: (0x00, 0x3C),  # communication timeout
+        28: 0x02,  # indoor unit, gas furnace
+        29: 0x04,  # outdoor unit, air conditioner
+        30: 0x0C,  # humidification and dehumidification capable
+        31: 0x0F,  # every schedule profile
+        32: 0x07  # every schedule interval
+    })
+    _status = _image(31, {
+        2: 0x03,  # system switch, heat
+        4: 40,  # humidification setpoint
+        5: 55,  # dehumidification setpoint
+        6: 68,  # working setpoint
+        7: (0x04, 0x48),  # display temp
+        9: 68,  # heat setpoint
+        10: 76,  # cool setpoint
+        # clock not set
+        11: (0xFF, 0xFF, 0xFF, 0xFF),
+        25: (0xFF, 0xFF, 0xFF)
+    })
+    _sensor = _sensor_blocks((0x00, 69.5), (0x01, 72.0))
+    _settings = {
+        HEAT_SET_POINT_TEMPERATURE_MODIFY: (9, 1),
+        COOL_SET_POINT_TEMPERATURE_MODIFY: (10, 1),
+        SYSTEM_SWITCH_MODIFY: (2, 1),
+        HUMIDIFICATION_SET_POINT_MODIFY: (4, 1),
+        DEHUMIDIFICATION_SET_POINT_MODIFY: (5, 1)
+    }
+    _demands = {
+        DEHUMIDIFICATION_DEMAND: (18, None),
+        HUMIDIFICATION_DEMAND: (19, None),
+        HEAT_DEMAND: (20, None),
+        COOL_DEMAND: (21, None)
+    }
+
+
+class Furnace(Device):
+    node_type = 0x02
+
+    _configuration = _image(9, {
+        0: 0x51,  # 5 fan speeds, 1 inducer stage
+        1: 0x20,  # 2 heat stages
+        2: 0x05,  # transducer, natural gas
+        4: 80,  # 80000 BTU
+        5: 0x01,  # blower manufacturer
+        6: 0x09,  # 3/4 HP blower
+        7: (0x04, 0xB0)  # 1200 cfm
+    })
+    _status = _image(22, {
+        6: 0x00,  # fan rate
+        7: 90,  # fan delay
+        13: (0x00, 0x00)  # air flow
+    })
+    _sensor = _sensor_blocks((0x02, 55.0), (0x03, 70.0))
+    _settings = {
+        FAN_KEY_SELECTION: (4, 1)
+    }
+    _demands = {
+        HEAT_DEMAND: (2, 15),
+        COOL_DEMAND: (3, 16),
+        FAN_DEMAND: (5, 17),
+        DEFROST_DEMAND: (8, None),
+        BACK_UP_HEAT_DEMAND: (9, None),
+        AUX_HEAT_DEMAND: (10, None),
+        HUMIDIFICATION_DEMAND: (11, 20),
+        DEHUMIDIFICATION_DEMAND: (12, 21)
+    }
+
+
+class AirHandler(Device):
+    node_type = 0x03
+
+    _configuration = _image(8, {
+        0: 0x05,  # 5 fan speeds
+        1: 0x02,  # 2 heat stages
+        2: 0x01,  # serial
+        3: 0x03,  # humidification and dehumidification capable
+        4: 0x06,  # 1/2 HP blower
+        5: 0x01,  # blower manufacturer
+        6: (0x03, 0x84)  # 900 cfm
+    })
+    _status = _image(20, {
+        6: 60  # fan delay
+    })
+    _sensor = _sensor_blocks((0x02, 58.0), (0x03, 71.0))
+    _settings = {
+        FAN_KEY_SELECTION: (3, 1)
+    }
+    _demands = {
+        HEAT_DEMAND: (2, 14),
+        FAN_DEMAND: (4, 15),
+        DEFROST_DEMAND: (7, None),
+        BACK_UP_HEAT_DEMAND: (8, None),
+        AUX_HEAT_DEMAND: (9, None),
+        HUMIDIFICATION_DEMAND: (10, 18),
+        DEHUMIDIFICATION_DEMAND: (11, 19)
+    }
+
+
+class HeatPump(Device):
+    node_type = 0x05
+
+    _configuration = _image(5, {
+        0: 0x02,  # 2 fan speeds
+        1: 0x22,  # 2 heat stages, 2 cool stages
+        2: 0x01,  # serial
+        3: 0x01,  # dehumidification capable
+        4: 6  # 3 tons
+    })
+    _status = _image(12, {})
+    _sensor = _sensor_blocks((0x04, 48.0), (0x05, 95.0))
+    _demands = {
+        HEAT_DEMAND: (2, 5),
+        COOL_DEMAND: (3, 6),
+        DEHUMIDIFICATION_DEMAND: (4, 11),
+        DEFROST_DEMAND: (7, None),
+        FAN_DEMAND: (8, None)
+    }
+
+
+class Motor(Device):
+    """
+    ECM blower motor, it is read with direct memory access reads instead
+    of snapshots.
+    """
+    node_type = LWP_NODE_TYPE_BLOWER_MOTOR_1
+    dma_response_type = DIRECT_MEMORY_ACCESS_READ_RESPONSE_MOTOR
+
+    _identification = _image(8, {
+        0: (0x01, 0x00),  # manufacturer
+        2: 0x03,  # 1/3 HP
+        5: (0x01, 0x02)  # firmware revision
+    })
+    _status = _image(32, {
+        8: 0x02,  # airflow control
+        11: 0x01,  # clockwise
+        14: (0xE8, 0x03),  # speed limit
+        16: (0x00, 0x08),  # torque limit
+        18: (0x2C, 0x01),  # airflow limit
+        20: (0xFA, 0x00),  # shaft power limit
+        22: (0xF4, 0x01),  # power in limit
+        24: (0x69, 0x00)  # motor temp limit
+    })
+    _sensor = _sensor_blocks((0x06, 104.0))
+    _settings = {
+        SET_MOTOR_SPEED: (0, 2),
+        SET_MOTOR_TORQUE: (2, 2),
+        SET_AIRFLOW_DEMAND: (4, 2),
+        SET_CONTROL_MODE: (8, 1),
+        SET_MOTOR_DIRECTION: (11, 1)
+    }
+
+
+class WaterHeater(Device):
+    node_type = 0x18
+
+    _configuration = _image(62, {
+        0: 0x01,  # gas
+        1: 0x01,  # residential
+        3: 160,  # OEM max temperature
+        4: 140,  # user max temperature
+        5: 0x01,  # 1 stage
+        6: 10,  # user max differential
+        7: 50,  # gallons
+        8: 0x01,  # natural gas
+        13: 0x12,  # 2 thermistors, hot surface igniter
+        28: 30,  # max lockout time
+        49: (0x00, 0x78),  # max program hold time
+        60: 8  # display contrast
+    })
+    _status = _image(78, {
+        3: 118,  # tank temp
+        4: 120,  # setpoint
+        5: 140,  # max setpoint
+        36: 55,  # inlet water temp
+        37: 121  # heat exchanger outlet temp
+    })
+    _sensor = _sensor_blocks((0x07, 118.0), (0x08, 55.0))
@@ -1,108 +1,235 @@
 # -*- coding: utf-8 -*-
 # Copyright 2020 Kevin Schlosser
 
-import ctypes
+import logging
+import math
 import sys
 import threading
+import time
 
+logger = logging.getLogger(__name__)
 
-# OS-specific low-level timing functions:
-if sys.platform.startswith('win'):  # for Windows:
-    def micros():
-        """return a timestamp in microseconds (us)"""
-        tics = ctypes.c_int64()
-        freq = ctypes.c_int64()
 
-        # get ticks on the internal ~2MHz QPC clock
-        ctypes.windll.Kernel32.QueryPerformanceCounter(ctypes.byref(tics))
-        # get the actual freq. of the internal ~2MHz QPC clock
-        ctypes.windll.Kernel32.QueryPerformanceFrequency(ctypes.byref(freq))
+if sys.platform.startswith('win'):
+    # time.monotonic only moves every 15.6 ms on Windows, the performance
+    # counter is monotonic there as well
+    _clock_ns = getattr(time, 'perf_counter_ns', None)
+    _clock_s = time.perf_counter
+else:
+    _clock_ns = getattr(time, 'monotonic_ns', None)
+    _clock_s = getattr(time, 'monotonic', time.time)
 
-        t_us = tics.value * 1e6 / freq.value
-        return t_us
 
-    def millis():
-        """return a timestamp in milliseconds (ms)"""
-        tics = ctypes.c_int64()
-        freq = ctypes.c_int64()
-
-        # get ticks on the internal ~2MHz QPC clock
-        ctypes.windll.Kernel32.QueryPerformanceCounter(ctypes.byref(tics))
-        # get the actual freq. of the internal ~2MHz QPC clock
-        ctypes.windll.Kernel32.QueryPerformanceFrequency(ctypes.byref(freq))
-
-        t_ms = tics.value * 1e3 / freq.value
-        return t_ms
-
-else:  # for Linux:
-    import os
-
-    # Constants:
-    # see <linux/time.h> here:
-    # https://github.com/torvalds/linux/blob/master/include/uapi/linux/time.h
-    CLOCK_MONOTONIC_RAW = 4
-    # prepare ctype timespec structure of {long, long}
-
-    class timespec(ctypes.Structure):
-        _fields_ = [
-            ('tv_sec', ctypes.c_long),
-            ('tv_nsec', ctypes.c_long)
-        ]
-
-    # Configure Python access to the clock_gettime C library, via ctypes:
-    # Documentation:
-    # -ctypes.CDLL: https://docs.python.org/3.2/library/ctypes.html
-    # -librt.so.1 with clock_gettime:
-    # https://docs.oracle.com/cd/E36784_01/html/E36873/librt-3lib.html
-    # -Linux clock_gettime(): http://linux.die.net/man/3/clock_gettime
-    librt = ctypes.CDLL('librt.so.1', use_errno=True)
-    clock_gettime = librt.clock_gettime
-
-    # specify input arguments and types to the C clock_gettime() function
-    # (int clock_ID, timespec* t)
-    clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(timespec)]
+if _clock_ns is not None:
+    def monotonic_time():
+        """return a timestamp in seconds (sec)"""
+        return _clock_ns() / 1e9
+
+    def _micros():
+        return _clock_ns() / 1e3
+
+    def _millis():
+        return _clock_ns() / 1e6
 
+else:
     def monotonic_time():
         """return a timestamp in seconds (sec)"""
-        t = timespec()
+        return _clock_s()
 
-        # (Note that clock_gettime() returns 0 for success, or -1 for failure, in
-        # which case errno is set appropriately)
-        # -see here: http://linux.die.net/man/3/clock_gettime
-        if clock_gettime(CLOCK_MONOTONIC_RAW , ctypes.pointer(t)) != 0:
-            # if clock_gettime() returns an error
-            errno_ = ctypes.get_errno()
+    def _micros():
+        return _clock_s() * 1e6
 
-            raise OSError(errno_, os.strerror(errno_))
+    def _millis():
+        return _clock_s() * 1e3
 
-        return t.tv_sec + t.tv_nsec * 1e-9  # sec
 
-    def micros():
+class Clock(object):
+    """
+    Where the library gets the time from, see :func:`set_clock`.
+    """
+
+    virtual = False
+
+    def micros(self):
         """return a timestamp in microseconds (us)"""
-        return monotonic_time() * 1e6  # us
+        raise NotImplementedError
+
+    def millis(self):
+        """return a timestamp in milliseconds (ms)"""
+        return self.micros() / 1e3
+
+    def sleep(self, seconds):
+        raise NotImplementedError
+
+    def wait(self, waitable, timeout=None):
+        """
+        Waits on a :class:`threading.Event` or on a
+        :class:`threading.Condition` that is held.
+
+        :param waitable: event or condition
+        :param timeout: seconds of this clock, ``None`` waits forever
+        :return: what ``waitable.wait`` returned
+        """
+        raise NotImplementedError
+
+
+class MonotonicClock(Clock):
+    """
+    The system's monotonic clock, this is the default.
+    """
+
+    micros = staticmethod(_micros)
+    millis = staticmethod(_millis)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def wait(self, waitable, timeout=None):
+        return waitable.wait(timeout)
+
+
+class VirtualClock(Clock):
+    """
+    A clock that only moves when it is told to.
+
+    Simulations and tests install it with :func:`set_clock` and call
+    :meth:`advance` to let hours of bus time go by in a moment. Timing
+    wheels do not get a thread of their own under a virtual clock, the
+    timers that come due fire from inside :meth:`advance`. Threads that
+    wait through :func:`wait` wake once the clock reaches their timeout.
+    """
+
+    virtual = True
+
+    # real seconds a thread waiting on the virtual clock sleeps before it
+    # looks at the clock again
+    resolution = 0.001
+
+    def __init__(self, start=0.0):
+        """
+        :param start: seconds the clock starts at
+        """
+        self._now = start * 1e6
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def micros(self):
+        return self._now
+
+    def add_listener(self, callback):
+        """
+        :param callback: called with no arguments every time the clock
+            moves
+        :return:
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def advance(self, seconds, step=None):
+        """
+        Moves the clock forward.
+
+        :param seconds: how far to move it
+        :param step: move in steps of this many seconds, so the listeners
+            and waiting threads see the time in between
+        :return:
+        """
+        end = self._now + seconds * 1e6
+
+        if step is None:
+            step = seconds
+
+        step = max(step * 1e6, 1)
+
+        while self._now < end:
+            self._now = min(end, self._now + step)
+
+            with self._lock:
+                listeners = list(self._listeners)
+
+            for callback in listeners:
+                callback()
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def wait(self, waitable, timeout=None):
+        if timeout is None:
+            return waitable.wait()
+
+        deadline = self._now + timeout * 1e6
+
+        while True:
+            if waitable.wait(self.resolution):
+                return True
+
+            if self._now >= deadline:
+                return False
+
+
+_clock = MonotonicClock()
+micros = _clock.micros
+millis = _clock.millis
+
 
-    def millis():
-        """eturn a timestamp in milliseconds (ms)"""
-        return monotonic_time() * 1e3  # ms
+def get_clock():
+    return _clock
+
+
+def set_clock(clock):
+    """
+    Changes where the library gets the time from.
+
+    Install the clock before anything that keeps time is made, the shared
+    timing wheel is made again for the new clock.
+
+    :param clock: :class:`Clock`, ``None`` goes back to the system clock
+    :return: the clock that was in use
+    """
+    global _clock, micros, millis, _wheel
+
+    previous = _clock
+    _clock = clock or MonotonicClock()
+
+    # module functions are rebound instead of wrapped, timers.micros() is
+    # called from the framing loop for every read
+    micros = _clock.micros
+    millis = _clock.millis
+
+    with _wheel_lock:
+        wheel = _wheel
+        _wheel = None
+
+    if wheel is not None:
+        wheel.stop()
+
+    return previous
+
+
+def wait(waitable, timeout=None):
+    """
+    :param waitable: :class:`threading.Event` or a held
+        :class:`threading.Condition`
+    :param timeout: seconds, measured on the clock that is in use
+    :return: what ``waitable.wait`` returned
+    """
+    return _clock.wait(waitable, timeout)
 
 
 # Other timing functions:
 def delay(delay_ms):
     """delay for delay_ms milliseconds (ms)"""
-    t_start = millis()
-    while millis() - t_start < delay_ms:
-        pass  # do nothing
-
-    return
+    _clock.sleep(delay_ms / 1e3)
 
 
 def delay_microseconds(delay_us):
     """delay for delay_us microseconds (us)"""
-    t_start = micros()
-    while micros() - t_start < delay_us:
-        pass  # do nothing
-
-    return
+    _clock.sleep(delay_us / 1e6)
 
 
 # Classes
@@ -132,33 +259,247 @@ class TimerMS(object):
         return now - self.start
 
 
-class BusyTimer(object):
-
-    def __init__(self, timer, threshold, func):
-        self.timer = timer
-        self.threshold = threshold
-        self.func = func
-        self._thread = None
+# seconds per tick of the timing wheel
+DEFAULT_TICK = 0.01
+# slots of every level of the timing wheel, the lowest level first. With a
+# 10 ms tick the levels span 2.56 s, 164 s, 2.9 h and 7.8 days.
+DEFAULT_LEVELS = (256, 64, 64, 64)
+
+
+class WheelTimer(object):
+    """
+    A callback scheduled on a :class:`TimingWheel`.
+    """
+
+    __slots__ = ('_wheel', 'callback', 'args', 'expires', 'slot', 'cancelled')
+
+    def __init__(self, wheel, callback, args, expires):
+        self._wheel = wheel
+        self.callback = callback
+        self.args = args
+        # tick the timer fires on
+        self.expires = expires
+        self.slot = None
+        self.cancelled = False
+
+    def cancel(self):
+        self._wheel.cancel(self)
+
+
+class TimingWheel(object):
+    """
+    Runs callbacks after a delay from a single thread.
+
+    Time is cut into ticks. The lowest level of the wheel has a slot for
+    every tick, every level above it has a slot for a whole turn of the
+    level below. A timer goes into the lowest level it fits in and moves
+    down a level every time the level below comes round to it. Scheduling
+    and cancelling a timer costs the same however many timers there are.
+
+    The thread sleeps while no timer is scheduled. Callbacks fire up to one
+    tick late and must not block, they hold up every other timer.
+    """
+
+    def __init__(self, tick=DEFAULT_TICK, levels=DEFAULT_LEVELS):
+        """
+        :param tick: seconds per tick
+        :param levels: number of slots of every level, lowest level first
+        """
+        self.tick = tick
+        self._levels = [[set() for _ in range(size)] for size in levels]
+        self._sizes = levels
+        # ticks covered by one slot of every level and by the levels below
+        # every level and itself
+        self._units = []
+        self._spans = []
+        unit = 1
+
+        for size in levels:
+            self._units.append(unit)
+            unit *= size
+            self._spans.append(unit)
+
+        self._now = 0
+        self._count = 0
+        self._started = micros()
+        self._condition = threading.Condition()
         self._event = threading.Event()
+        self._thread = None
+        self._clock = None
+
+    def __len__(self):
+        return self._count
+
+    def _elapsed(self):
+        return int((micros() - self._started) / (self.tick * 1e6))
+
+    def schedule(self, delay, callback, *args):
+        """
+        :param delay: seconds until the callback is called
+        :param callback: called with ``args``
+        :return: :class:`WheelTimer`
+        """
+        with self._condition:
+            idle = not self._count
+
+            if idle:
+                # the wheel does not turn while it is empty
+                self._now = self._elapsed()
+
+            # the tick the delay runs out in, counted from the clock and not
+            # from the wheel which can be behind
+            expires = int(math.ceil(
+                (micros() - self._started + delay * 1e6) / (self.tick * 1e6)
+            ))
+            expires = max(expires, self._now + 1)
+            timer = WheelTimer(self, callback, args, expires)
+            self._place(timer)
+            self._count += 1
+
+            if idle:
+                self._condition.notify()
+
+        return timer
+
+    def _place(self, timer):
+        remaining = timer.expires - self._now
+        last = len(self._levels) - 1
+
+        for level, span in enumerate(self._spans):
+            if remaining < span or level == last:
+                break
+
+        index = (timer.expires // self._units[level]) % self._sizes[level]
+        timer.slot = self._levels[level][index]
+        timer.slot.add(timer)
+
+    def cancel(self, timer):
+        with self._condition:
+            if timer.slot is not None:
+                timer.slot.discard(timer)
+                timer.slot = None
+                self._count -= 1
+
+            timer.cancelled = True
 
     def start(self):
+        clock = get_clock()
+
+        if clock.virtual:
+            # driven by the clock instead of a thread
+            self._clock = clock
+            clock.add_listener(self.run_pending)
+            return
+
+        if self._thread is None:
+            self._event.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name='climatetalk-timers'
+            )
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        if self._clock is not None:
+            self._clock.remove_listener(self.run_pending)
+            self._clock = None
+
         self._event.set()
-        self._thread = threading.Thread(target=self._run)
-        self._thread.daemon = True
-        self._thread.start()
+
+        with self._condition:
+            self._condition.notify()
+
+        if self._thread is not None:
+            self._thread.join()
+
+    def _advance(self):
+        # moves the wheel on by one tick, returns the timers that expired
+        self._now += 1
+        now = self._now
+
+        # the levels above hand their next slot down when the level below
+        # them starts a new turn
+        for level in range(len(self._levels) - 1, 0, -1):
+            unit = self._units[level]
+            if now % unit:
+                continue
+
+            slot = self._levels[level][(now // unit) % self._sizes[level]]
+            timers = list(slot)
+            slot.clear()
+
+            for timer in timers:
+                self._place(timer)
+
+        slot = self._levels[0][now % self._sizes[0]]
+        expired = [timer for timer in slot if timer.expires <= now]
+
+        for timer in expired:
+            slot.discard(timer)
+            timer.slot = None
+
+        self._count -= len(expired)
+        return expired
+
+    def run_pending(self):
+        """
+        Fires the timers that have come due. The thread of the wheel calls
+        this every tick, under a :class:`VirtualClock` the clock does.
+
+        :return:
+        """
+        with self._condition:
+            expired = []
+            target = self._elapsed()
+
+            while self._now < target and self._count:
+                expired.extend(self._advance())
+
+            if not self._count:
+                self._now = target
+
+        for timer in expired:
+            if timer.cancelled:
+                continue
+
+            try:
+                timer.callback(*timer.args)
+            except Exception:  # NOQA
+                logger.exception('timer callback %r failed', timer.callback)
 
     def _run(self):
-        self._event.clear()
-        self.timer.reset()
-        while (
-            self.timer.elapsed() < self.threshold() and
-            not self._event.is_set()
-        ):
-            pass
-
-        if not self._event.is_set():
-            self.func()
-
-    @property
-    def is_running(self):
-        return self.timer.elapsed() > self.threshold
+        while not self._event.is_set():
+            with self._condition:
+                while not self._count and not self._event.is_set():
+                    self._condition.wait()
+
+            self.run_pending()
+
+            # sleep until the next tick
+            remaining = (
+                self._started + (self._now + 1) * self.tick * 1e6 - micros()
+            )
+            if remaining > 0:
+                self._event.wait(remaining / 1e6)
+
+        self._thread = None
+
+
+_wheel = None
+_wheel_lock = threading.Lock()
+
+
+def shared_wheel():
+    """
+    :return: the :class:`TimingWheel` shared by the whole library, it is
+        started the first time it is asked for
+    """
+    global _wheel
+
+    with _wheel_lock:
+        if _wheel is None:
+            _wheel = TimingWheel()
+            _wheel.start()
+
+    return _wheel
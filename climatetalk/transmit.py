@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import threading
+import logging
+from collections import deque
+from concurrent.futures import Future
+
+from . import timers
+from .airtime import (  # NOQA
+    AirtimeBudget,
+    BAUD_RATE,
+    BITS_PER_BYTE,
+    CONTROL,
+    INTERACTIVE,
+    BACKGROUND,
+    PRIORITIES,
+    airtime
+)
+
+logger = logging.getLogger(__name__)
+
+# seconds a frame waits behind more urgent priorities before it is sent
+# ahead of them, None never promotes
+DEFAULT_MAX_WAIT = {
+    CONTROL: None,
+    INTERACTIVE: 5.0,
+    BACKGROUND: 30.0
+}
+
+# number of recent queue times kept for the percentiles
+LATENCY_SAMPLES = 256
+
+
+class LatencyStats(object):
+    """
+    How long the frames of one priority waited in the queue before they
+    were written, in microseconds.
+    """
+
+    def __init__(self, size=LATENCY_SAMPLES):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        # frames that were sent ahead of more urgent ones because they had
+        # waited too long
+        self.promoted = 0
+        self._samples = deque(maxlen=size)
+
+    def add(self, latency):
+        self.count += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+        self._samples.append(latency)
+
+    @property
+    def mean(self):
+        if not self.count:
+            return 0
+
+        return self.total / self.count
+
+    def percentile(self, fraction):
+        """
+        :param fraction: between 0 and 1, 0.95 for the 95th percentile
+        :return: latency of the recent frames at that percentile
+        """
+        samples = sorted(self._samples)
+        if not samples:
+            return 0
+
+        index = min(int(fraction * len(samples)), len(samples) - 1)
+        return samples[index]
+
+
+class TransmitQueue(object):
+    """
+    Queue of frames waiting to be written to the bus.
+
+    A single writer thread sends every frame with one call to ``write`` and
+    then sleeps until the frame has gone out on the bus and the inter packet
+    gap has passed. Nobody spins and callers are not blocked while the
+    frame waits its turn, :meth:`put` returns a future right away.
+
+    Every priority has a queue of its own. The next frame sent is the
+    first one of the most urgent priority that has bus time left in its
+    budget, see :class:`climatetalk.airtime.AirtimeBudget`. So a busy
+    control queue can not hold back the others forever, a frame that has
+    waited longer than ``max_wait`` for its priority goes first.
+    """
+
+    def __init__(
+        self,
+        write,
+        gap,
+        baud_rate=BAUD_RATE,
+        budget=None,
+        max_wait=None
+    ):
+        """
+        :param write: callable that writes a bytes object to the bridge
+        :param gap: inter packet gap in microseconds
+        :param baud_rate: bus speed, used to work out how long a frame
+            occupies the bus
+        :param budget: :class:`climatetalk.airtime.AirtimeBudget`, one with
+            the default shares is made when ``None``
+        :param max_wait: dict of priority to seconds, overrides
+            :data:`DEFAULT_MAX_WAIT`
+        """
+        self._write = write
+        self.gap = gap
+        self.baud_rate = baud_rate
+
+        if budget is None:
+            budget = AirtimeBudget(gap, baud_rate)
+
+        self.budget = budget
+        self.max_wait = dict(DEFAULT_MAX_WAIT)
+        self.max_wait.update(max_wait or {})
+        self.latency = dict(
+            (priority, LatencyStats()) for priority in PRIORITIES
+        )
+        self._lanes = dict((priority, deque()) for priority in PRIORITIES)
+        # bytes waiting in every lane
+        self._queued = dict((priority, 0) for priority in PRIORITIES)
+        self._condition = threading.Condition()
+        self._event = threading.Event()
+        self._thread = None
+        self._ready_at = 0
+
+    def __len__(self):
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def put(self, data, callback=None, priority=INTERACTIVE):
+        """
+        :param data: frame to send
+        :param callback: called with the future once the frame is sent
+        :param priority: one of :data:`climatetalk.airtime.PRIORITIES`
+        :return: :class:`concurrent.futures.Future`, the result is ``data``
+        :raises climatetalk.airtime.BudgetExceeded: the priority is out of
+            bus time for longer than its budget allows a frame to wait
+        """
+        future = Future()
+
+        if callback is not None:
+            future.add_done_callback(callback)
+
+        with self._condition:
+            self.budget.admit(len(data), priority, self._queued[priority])
+            self._lanes[priority].append((data, future, timers.micros()))
+            self._queued[priority] += len(data)
+            self._condition.notify()
+
+        return future
+
+    def start(self):
+        if self._thread is None:
+            self._event.clear()
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        self._event.set()
+
+        with self._condition:
+            self._condition.notify()
+
+        if self._thread is not None:
+            self._thread.join()
+
+        with self._condition:
+            for priority, lane in self._lanes.items():
+                while lane:
+                    lane.popleft()[1].cancel()
+
+                self._queued[priority] = 0
+
+    def _starved(self, now):
+        starved = []
+
+        for priority in PRIORITIES:
+            lane = self._lanes[priority]
+            max_wait = self.max_wait.get(priority)
+
+            if (
+                lane and
+                max_wait is not None and
+                now - lane[0][2] > max_wait * 1e6
+            ):
+                starved.append(priority)
+
+        return starved
+
+    def _next(self):
+        with self._condition:
+            while not self._event.is_set():
+                timeout = None
+                starved = self._starved(timers.micros())
+                order = starved + [
+                    priority for priority in PRIORITIES
+                    if priority not in starved
+                ]
+
+                for priority in order:
+                    lane = self._lanes[priority]
+                    if not lane:
+                        continue
+
+                    data = lane[0][0]
+                    delay = self.budget.delay(len(data), priority)
+
+                    if not delay:
+                        data, future, queued_at = lane.popleft()
+                        self._queued[priority] -= len(data)
+
+                        if priority in starved:
+                            self.latency[priority].promoted += 1
+
+                        return data, future, priority, queued_at
+
+                    if timeout is None or delay < timeout:
+                        timeout = delay
+
+                if timeout is None:
+                    self._condition.wait()
+                else:
+                    timers.wait(self._condition, timeout / 1e6)
+
+            return None
+
+    def _run(self):
+        while not self._event.is_set():
+            # sleep until the previous frame has cleared the bus
+            remaining = self._ready_at - timers.micros()
+            if remaining > 0 and timers.wait(self._event, remaining / 1e6):
+                break
+
+            item = self._next()
+            if item is None:
+                break
+
+            data, future, priority, queued_at = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                self._write(bytes(data))
+            except EnvironmentError as err:
+                logger.exception('RS485 write failed')
+                future.set_exception(err)
+                continue
+
+            now = timers.micros()
+            self.latency[priority].add(now - queued_at)
+            self.budget.charge(len(data), priority)
+            self._ready_at = (
+                now +
+                airtime(len(data), self.baud_rate) +
+                self.gap
+            )
+            future.set_result(data)
+
+        self._thread = None
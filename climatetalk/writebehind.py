@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import threading
+from concurrent.futures import Future, wait
+
+from .airtime import INTERACTIVE
+from .message_types import SET_CONTROL_COMMAND, SET_CONTROL_COMMAND_RESPONSE
+from .protocol import NAK1, NAK2
+
+
+class CommandRejected(Exception):
+    """
+    The node answered a control command with a NAK.
+    """
+
+    def __init__(self, response):
+        self.response = response
+        self.code = response.payload_response_code
+        message = 'node 0x{0:02X} refused command 0x{1:04X}: 0x{2:02X}'
+        Exception.__init__(
+            self,
+            message.format(
+                response.source,
+                response.payload_command_code,
+                self.code
+            )
+        )
+
+
+def command_key(packet):
+    """
+    :param packet: packet that is about to be sent
+    :return: (address, subnet, command code) for a control command, else
+        ``None``
+    """
+    if packet.message_type != SET_CONTROL_COMMAND:
+        return None
+
+    return packet.destination, packet.subnet, packet.payload_command_code
+
+
+class _Slot(object):
+
+    def __init__(self, future):
+        # future of the command that is on its way to the node
+        self.future = future
+        # (packet, ack, priority, future) of the command that goes next
+        self.pending = None
+
+
+def _copy(source, target):
+    if target.done():
+        return
+
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+def _acknowledge(source, target):
+    # a NAK is a response as well, it fails the command
+    if (
+        not target.done() and
+        not source.cancelled() and
+        source.exception() is None and
+        source.result().payload_response_code in (NAK1, NAK2)
+    ):
+        target.set_exception(CommandRejected(source.result()))
+        return
+
+    _copy(source, target)
+
+
+class WriteBehind(object):
+    """
+    Coalesces control commands.
+
+    Commands are keyed on (address, subnet, command code). Only one command
+    for a key is on its way to the node at a time. Commands for a key that
+    arrive while one is on its way wait, and each new one replaces the one
+    waiting before it, so when the command on the bus completes only the
+    latest value is sent. The values in between never reach the bus.
+
+    Every caller gets a future. The future of a command that was replaced
+    completes with the command that replaced it.
+    """
+
+    def __init__(self, send, request, ack=False):
+        """
+        :param send: callable that queues a packet and returns a future,
+            called with the packet and a ``priority`` keyword
+        :param request: callable that sends a packet and returns a future
+            for the response, called with the packet, the response type, the
+            command code as the DB ID and a ``priority`` keyword
+        :param ack: by default wait for the node to acknowledge a command
+            before the next one for the same key is sent. A command the
+            node refuses fails with :class:`CommandRejected`.
+        """
+        self._send = send
+        self._request = request
+        self.ack = ack
+        # number of commands that were replaced before they were sent
+        self.superseded = 0
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def submit(self, packet, ack=None, priority=None):
+        """
+        :param packet: .. py:class:: climatetalk.packet.Packet
+        :param ack: ``True`` completes the future once the node has
+            acknowledged the command, ``False`` once it has been written,
+            ``None`` uses the default
+        :param priority: one of :data:`climatetalk.airtime.PRIORITIES`,
+            ``None`` uses the priority of the packet class
+        :return: :class:`concurrent.futures.Future`
+        """
+        if ack is None:
+            ack = self.ack
+
+        if priority is None:
+            priority = getattr(packet, 'priority', INTERACTIVE)
+
+        key = command_key(packet)
+        if key is None:
+            return self._transmit(packet, ack, priority)
+
+        with self._lock:
+            slot = self._slots.get(key)
+
+            if slot is not None:
+                if slot.pending is None:
+                    future = Future()
+                else:
+                    self.superseded += 1
+                    future = slot.pending[3]
+
+                slot.pending = (packet, ack, priority, future)
+                return future
+
+            future = Future()
+            self._slots[key] = _Slot(future)
+
+        self._start(key, packet, ack, priority, future)
+        return future
+
+    def _transmit(self, packet, ack, priority):
+        if not ack:
+            return self._send(packet, priority=priority)
+
+        key = command_key(packet)
+        future = Future()
+        response = self._request(
+            packet,
+            SET_CONTROL_COMMAND_RESPONSE,
+            None if key is None else key[2],
+            priority=priority
+        )
+        response.add_done_callback(lambda _: _acknowledge(response, future))
+        return future
+
+    def _start(self, key, packet, ack, priority, future):
+        try:
+            sent = self._transmit(packet, ack, priority)
+        except Exception as err:  # NOQA
+            future.set_exception(err)
+            self._done(key)
+            return
+
+        def done(_):
+            _copy(sent, future)
+            self._done(key)
+
+        sent.add_done_callback(done)
+
+    def _done(self, key):
+        with self._lock:
+            slot = self._slots.get(key)
+
+            if slot is None:
+                # stopped
+                return
+
+            if slot.pending is None:
+                del self._slots[key]
+                return
+
+            packet, ack, priority, future = slot.pending
+            slot.pending = None
+            slot.future = future
+
+        self._start(key, packet, ack, priority, future)
+
+    def flush(self, address=None, subnet=None, timeout=None):
+        """
+        Waits for the commands that are on their way or waiting.
+
+        :param address: only wait for this node, ``None`` waits for all
+        :param subnet: only wait for this subnet, ``None`` waits for all
+        :param timeout: seconds to wait, ``None`` waits until they are done
+        :return: ``True`` if all of them completed
+        """
+        futures = []
+
+        with self._lock:
+            for key, slot in self._slots.items():
+                if (
+                    (address is None or key[0] == address) and
+                    (subnet is None or key[1] == subnet)
+                ):
+                    futures.append(slot.future)
+                    if slot.pending is not None:
+                        futures.append(slot.pending[3])
+
+        return not wait(futures, timeout).not_done
+
+    def stop(self):
+        """
+        Cancels the futures of the commands that are on their way or
+        waiting, the commands that are waiting are not sent.
+        """
+        with self._lock:
+            slots = list(self._slots.values())
+            self._slots.clear()
+
+        for slot in slots:
+            slot.future.cancel()
+
+            if slot.pending is not None:
+                slot.pending[3].cancel()
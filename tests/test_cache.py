@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+
+from climatetalk.cache import SnapshotCache, STATUS
+from climatetalk.mdi.base import MDIBase
+from climatetalk.packet import GetStatusRequest
+
+KEY = (0x01, 0x01, STATUS)
+# what the cache hands back when it has to go to the node
+FETCHED = bytearray(b'fetched')
+
+
+def _cached(cache):
+    return cache.get(KEY, lambda: FETCHED)
+
+
+class _Writer(object):
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, packet, priority=None):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+
+class _Network(object):
+
+    def __init__(self, cache):
+        self.snapshots = cache
+        self.writer = _Writer()
+
+
+class SnapshotCacheTest(unittest.TestCase):
+
+    def test_fetch_is_single_flight(self):
+        cache = SnapshotCache(60)
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return bytearray(3)
+
+        threads = [
+            threading.Thread(target=cache.get, args=(KEY, fetch))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+
+        time.sleep(0.05)
+        release.set()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+
+    def test_patch_drops_a_fetch_in_flight(self):
+        cache = SnapshotCache(0.05)
+        cache.put(KEY, bytearray(3))
+        time.sleep(0.1)
+
+        def fetch():
+            # the command is acknowledged while the old payload is on its
+            # way back
+            cache.patch(KEY, 1, bytearray((7,)))
+            return bytearray(3)
+
+        self.assertEqual(cache.get(KEY, fetch), bytearray(3))
+        self.assertEqual(_cached(cache), FETCHED)
+
+    def test_command_patches_once_it_went_through(self):
+        cache = SnapshotCache(60)
+        cache.put(KEY, bytearray(3))
+        network = _Network(cache)
+        mdi = MDIBase(network, 0x01, 0x01, None, None)
+
+        mdi._send(GetStatusRequest(), patch=[(STATUS, 1, (7,))])
+        self.assertEqual(_cached(cache), bytearray(3))
+
+        network.writer.futures[0].set_result(None)
+        self.assertEqual(_cached(cache), bytearray((0, 7, 0)))
+
+    def test_failed_command_drops_the_snapshot(self):
+        cache = SnapshotCache(60)
+        cache.put(KEY, bytearray(3))
+        network = _Network(cache)
+        mdi = MDIBase(network, 0x01, 0x01, None, None)
+
+        mdi._send(GetStatusRequest(), patch=[(STATUS, 1, (7,))])
+        network.writer.futures[0].set_exception(RuntimeError('NAK'))
+
+        self.assertEqual(_cached(cache), FETCHED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import random
+import unittest
+
+from climatetalk.checksum import fletcher, FletcherChecksum
+
+
+def _frame(size, seed):
+    generator = random.Random(seed)
+    frame = bytearray(generator.randrange(256) for _ in range(size))
+    frame.extend(fletcher(frame))
+    return frame
+
+
+class FletcherChecksumTest(unittest.TestCase):
+
+    def test_matches_fletcher_in_any_chunk_size(self):
+        frame = _frame(60, 1)
+
+        for chunk in (1, 2, 3, 7, len(frame)):
+            checksum = FletcherChecksum()
+
+            for index in range(0, len(frame), chunk):
+                checksum.update(frame[index:index + chunk])
+
+            self.assertEqual(checksum.digest(), fletcher(frame[:-2]))
+            self.assertTrue(checksum.is_valid, chunk)
+
+    def test_single_bytes(self):
+        frame = _frame(20, 2)
+        checksum = FletcherChecksum()
+
+        for char in frame:
+            checksum.update(char)
+
+        self.assertTrue(checksum.is_valid)
+        self.assertEqual(checksum.count, len(frame))
+
+    def test_corrupt_frame(self):
+        frame = _frame(20, 3)
+        frame[5] ^= 0x01
+        checksum = FletcherChecksum()
+        checksum.update(frame)
+
+        self.assertFalse(checksum.is_valid)
+
+    def test_reset(self):
+        checksum = FletcherChecksum()
+        checksum.update(bytearray(range(30)))
+        checksum.reset()
+        checksum.update(_frame(20, 4))
+
+        self.assertTrue(checksum.is_valid)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import time
+import unittest
+from concurrent.futures import Future
+
+from climatetalk import timers
+from climatetalk.correlator import Correlator, RequestTimeout
+from climatetalk.network import Network
+from climatetalk.packet import GetStatusRequest, GetStatusResponse, Packet
+from climatetalk.packet_view import PacketView
+from climatetalk.simulator import SimulatedBus, Thermostat
+
+NODES = 40
+# seconds each attempt waits, sending every request takes a lot longer
+TIMEOUT = 0.25
+
+
+def _status_request(address):
+    packet = GetStatusRequest()
+    packet.destination = address
+    packet.subnet = 0x01
+    return packet
+
+
+class CorrelatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = timers.VirtualClock()
+        self.previous = timers.set_clock(self.clock)
+        self.bus = SimulatedBus(
+            [Thermostat(address) for address in range(1, NODES + 1)]
+        )
+        self.bus.start()
+        self.network = Network(None, None, sock=self.bus.sock)
+
+    def tearDown(self):
+        self.network.stop()
+        self.bus.stop()
+        timers.set_clock(self.previous)
+
+    def _run(self, futures, seconds):
+        # the bus answers on real time, the clock is moved in small steps
+        # so the answers are in before the deadlines come up
+        for _ in range(int(seconds * 100)):
+            if all(future.done() for future in futures):
+                break
+
+            self.clock.advance(0.01)
+            time.sleep(0.005)
+
+    def test_full_queue_is_not_sent_again(self):
+        futures = [
+            self.network.request(
+                _status_request(address),
+                GetStatusResponse.message_type,
+                timeout=TIMEOUT
+            )
+            for address in range(1, NODES + 1)
+        ]
+        self._run(futures, 30)
+
+        for future in futures:
+            response = future.result(0)
+            self.assertEqual(response.source, future.packet.destination)
+
+        # the requests that waited in the queue did not use up attempts
+        self.assertEqual(self.bus.received, NODES)
+
+    def test_unanswered_request_times_out(self):
+        future = self.network.request(
+            _status_request(NODES + 1),
+            GetStatusResponse.message_type,
+            timeout=TIMEOUT,
+            retries=2
+        )
+        self._run([future], 10)
+
+        self.assertRaises(RequestTimeout, future.result, 0)
+        self.assertEqual(future.attempts, 3)
+        self.assertEqual(self.bus.received, 3)
+
+
+class ResponseTest(unittest.TestCase):
+
+    def _send(self, packet, priority=None):
+        future = Future()
+        future.set_result(packet)
+        return future
+
+    def test_response_is_copied_out_of_the_receive_buffer(self):
+        correlator = Correlator(self._send)
+        future = correlator.request(
+            _status_request(0x01),
+            GetStatusResponse.message_type
+        )
+
+        buffer = bytearray([
+            0x00, 0x01, 0x01, 0x00, 0x00, 0x00, 0x01, 0x82, 0x00, 0x02,
+            0x01, 0x02, 0x00, 0x00
+        ])
+        correlator.dispatch(PacketView(buffer))
+        buffer[11] = 0xFF
+        correlator.stop()
+
+        response = future.result(0)
+        self.assertIsInstance(response, Packet)
+        self.assertEqual(response[11], 0x02)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import datetime
+import time
+import unittest
+
+from climatetalk import timers
+from climatetalk.commands import HeatDemand
+from climatetalk.network import Network
+from climatetalk.simulator import SimulatedBus, Thermostat
+
+# status offset of the heat demand of the simulated thermostat
+HEAT_DEMAND_OFFSET = 20
+
+
+def _heat_demand(value, minutes=1):
+    packet = HeatDemand()
+    packet.destination = 0x01
+    packet.subnet = 0x01
+    packet.set_command_data(datetime.time(minute=minutes), value)
+    return packet
+
+
+class DemandRefresherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = timers.VirtualClock()
+        self.previous = timers.set_clock(self.clock)
+        self.thermostat = Thermostat(0x01)
+        self.bus = SimulatedBus([self.thermostat])
+        self.bus.start()
+        self.network = Network(None, None, sock=self.bus.sock)
+
+    def tearDown(self):
+        self.network.stop()
+        self.bus.stop()
+        timers.set_clock(self.previous)
+
+    def _wait_for(self, commands):
+        # the bus runs on its own thread, on real time
+        deadline = time.time() + 5
+
+        while self.thermostat.commands < commands:
+            if time.time() > deadline:
+                self.fail('the thermostat received no command')
+
+            time.sleep(0.01)
+
+    def _held(self):
+        self.thermostat.expire()
+        return HEAT_DEMAND_OFFSET in self.thermostat._held
+
+    def test_hold_reaches_the_equipment(self):
+        self.network.demands.hold(_heat_demand(50)).result(5)
+        self._wait_for(1)
+
+        self.assertTrue(self._held())
+        self.assertEqual(self.thermostat.status[HEAT_DEMAND_OFFSET], 100)
+
+    def test_refresh_keeps_the_demand(self):
+        packet = _heat_demand(50)
+        self.network.demands.hold(packet).result(5)
+        self._wait_for(1)
+
+        # changing the packet afterwards does not change what is refreshed
+        packet[14] = 0
+
+        # the refresh goes out 45 seconds in, the demand would otherwise
+        # run out at 60 seconds
+        self.clock.advance(50, step=1)
+        self._wait_for(2)
+        self.clock.advance(40, step=1)
+
+        self.assertTrue(self._held())
+        self.assertEqual(self.thermostat.status[HEAT_DEMAND_OFFSET], 100)
+
+    def test_demand_runs_out_once_released(self):
+        self.network.demands.hold(_heat_demand(50)).result(5)
+        self._wait_for(1)
+        self.network.demands.cancel(0x01, 0x01, HeatDemand._command_code)
+
+        self.clock.advance(90, step=1)
+
+        self.assertFalse(self._held())
+        self.assertEqual(self.thermostat.status[HEAT_DEMAND_OFFSET], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import threading
+import time
+import unittest
+
+from climatetalk.dispatch import Dispatcher, BLOCK, COALESCE, DROP_OLDEST
+
+
+class _Packet(object):
+
+    def __init__(self, source, value):
+        self.source = source
+        self.subnet = 0x01
+        self.value = value
+
+
+class _Subscriber(object):
+
+    def __init__(self):
+        self.received = []
+
+    def __call__(self, packet):
+        self.received.append((packet.source, packet.value))
+
+
+class DispatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.subscriber = _Subscriber()
+
+    def tearDown(self):
+        self.dispatcher.stop()
+
+    def _dispatcher(self, **kwargs):
+        self.dispatcher = Dispatcher(
+            route=lambda message_type, packet: [self.subscriber],
+            **kwargs
+        )
+        return self.dispatcher
+
+    def _wait_for(self, count):
+        deadline = time.time() + 5
+
+        while len(self.subscriber.received) < count:
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.01)
+
+    def test_drop_oldest(self):
+        dispatcher = self._dispatcher(queue_size=2, policy=DROP_OLDEST)
+
+        # nothing runs until the workers are started
+        for value in range(4):
+            dispatcher.dispatch(None, _Packet(0x01, value))
+
+        dispatcher.start()
+        self._wait_for(2)
+
+        self.assertEqual(self.subscriber.received, [(0x01, 2), (0x01, 3)])
+        self.assertEqual(dispatcher.dropped, 2)
+
+    def test_coalesce(self):
+        dispatcher = self._dispatcher(policy=COALESCE)
+
+        for value in range(4):
+            dispatcher.dispatch(None, _Packet(0x01, value))
+
+        dispatcher.start()
+        self._wait_for(1)
+        time.sleep(0.05)
+
+        self.assertEqual(self.subscriber.received, [(0x01, 3)])
+        self.assertEqual(dispatcher.dropped, 3)
+
+    def test_block(self):
+        dispatcher = self._dispatcher(queue_size=1, policy=BLOCK)
+        dispatcher.dispatch(None, _Packet(0x01, 0))
+
+        thread = threading.Thread(
+            target=dispatcher.dispatch,
+            args=(None, _Packet(0x01, 1))
+        )
+        thread.start()
+        thread.join(0.1)
+        # the queue is full, the reader waits for the workers
+        self.assertTrue(thread.is_alive())
+
+        dispatcher.start()
+        thread.join(5)
+        self._wait_for(2)
+
+        self.assertEqual(self.subscriber.received, [(0x01, 0), (0x01, 1)])
+        self.assertEqual(dispatcher.dropped, 0)
+
+    def test_order_is_kept_per_node(self):
+        dispatcher = self._dispatcher(queue_size=100)
+
+        for value in range(20):
+            dispatcher.dispatch(None, _Packet(0x01, value))
+            dispatcher.dispatch(None, _Packet(0x02, value))
+
+        dispatcher.start()
+        self._wait_for(40)
+
+        for source in (0x01, 0x02):
+            self.assertEqual(
+                [value for node, value in self.subscriber.received
+                 if node == source],
+                list(range(20))
+            )
+
+    def test_unknown_policy(self):
+        self.dispatcher = Dispatcher()
+        self.assertRaises(ValueError, Dispatcher, policy='drop_newest')
+
+
+if __name__ == '__main__':
+    unittest.main()
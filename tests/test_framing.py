@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import unittest
+
+from climatetalk.checksum import fletcher
+from climatetalk.framing import ChecksumFramer, find_frames
+
+
+def _frame(source, payload):
+    frame = bytearray((0x00, source, 0x01, 0, 0, 0, 0x01, 0x82, 0))
+    frame.append(len(payload))
+    frame.extend(payload)
+    frame.extend(fletcher(frame, 0, len(frame)))
+    return frame
+
+
+class FindFramesTest(unittest.TestCase):
+
+    def test_back_to_back_frames(self):
+        first = _frame(0x01, bytearray(range(4)))
+        second = _frame(0x02, bytearray(range(8)))
+        frames, position, skipped = find_frames(first + second)
+
+        self.assertEqual(frames, [(0, len(first)), (len(first), len(second))])
+        self.assertEqual(position, len(first) + len(second))
+        self.assertEqual(skipped, 0)
+
+    def test_resync_after_garbage(self):
+        frame = _frame(0x01, bytearray(range(4)))
+        garbage = bytearray((0xAA, 0x55, 0xFF))
+        frames, position, skipped = find_frames(garbage + frame)
+
+        self.assertEqual(frames, [(len(garbage), len(frame))])
+        self.assertEqual(skipped, len(garbage))
+
+    def test_corrupt_frame_is_skipped(self):
+        bad = _frame(0x01, bytearray(range(4)))
+        bad[11] ^= 0xFF
+        good = _frame(0x02, bytearray(range(4)))
+        frames, position, skipped = find_frames(bad + good)
+
+        self.assertEqual(frames, [(len(bad), len(good))])
+        self.assertEqual(skipped, len(bad))
+
+    def test_incomplete_frame_is_waited_for(self):
+        frame = _frame(0x01, bytearray(range(8)))
+        frames, position, skipped = find_frames(frame[:-3])
+
+        self.assertEqual(frames, [])
+        self.assertEqual(position, 0)
+        self.assertEqual(skipped, 0)
+
+    def test_garbage_length_does_not_hold_back_a_good_frame(self):
+        frame = _frame(0x01, bytearray(range(4)))
+        # a length byte of 200 in front of the frame
+        garbage = bytearray(9) + bytearray((200,))
+        frames, position, skipped = find_frames(garbage + frame)
+
+        self.assertEqual(frames, [(len(garbage), len(frame))])
+        self.assertEqual(position, len(garbage) + len(frame))
+
+
+class ChecksumFramerTest(unittest.TestCase):
+
+    def test_frames_split_across_reads(self):
+        first = _frame(0x01, bytearray(range(4)))
+        second = _frame(0x02, bytearray(range(8)))
+        data = first + second
+        framer = ChecksumFramer()
+
+        frames = []
+        for index in range(0, len(data), 5):
+            frames.extend(framer.feed(data[index:index + 5]))
+
+        self.assertEqual(frames, [first, second])
+        self.assertEqual(framer.skipped, 0)
+
+    def test_resync_across_reads(self):
+        frame = _frame(0x01, bytearray(range(4)))
+        framer = ChecksumFramer()
+
+        self.assertEqual(framer.feed(bytearray((0xFF, 0x13)) + frame[:6]), [])
+        self.assertEqual(framer.feed(frame[6:]), [frame])
+        self.assertEqual(framer.skipped, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import socket
+import threading
+import time
+import unittest
+
+from climatetalk.cache import STATUS
+from climatetalk.checksum import fletcher
+from climatetalk.network import Network
+from climatetalk.packet import (
+    GetStatusRequest,
+    GetStatusResponse,
+    SetControlCommandRequest
+)
+from climatetalk.simulator import SimulatedBus, Thermostat
+
+
+def _status_response(payload):
+    frame = bytearray((0x00, 0x01, 0x01, 0, 0, 0, 0x01, 0x82, 0))
+    frame.append(len(payload))
+    frame.extend(payload)
+    frame.extend(fletcher(frame, 0, len(frame)))
+    return frame
+
+
+def _command(code):
+    packet = SetControlCommandRequest()
+    packet.destination = 0x01
+    packet.subnet = 0x01
+    packet.payload_command_code = code
+    packet.extend(bytearray(4))
+    packet[9] = len(packet) - 12
+    return packet
+
+
+class _Bridge(object):
+    # sends each item to the connection after the one before, every
+    # connection but the last is dropped once its item is sent
+
+    def __init__(self, items):
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.bind(('127.0.0.1', 0))
+        self._server.listen(1)
+        self._clients = []
+        self._thread = threading.Thread(target=self._run, args=(items,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def address(self):
+        return self._server.getsockname()
+
+    def _run(self, items):
+        for index, data in enumerate(items):
+            client, _ = self._server.accept()
+            client.sendall(bytes(data))
+
+            if index < len(items) - 1:
+                client.close()
+            else:
+                self._clients.append(client)
+
+    def stop(self):
+        for client in self._clients:
+            client.close()
+
+        self._server.close()
+
+
+class NetworkTest(unittest.TestCase):
+
+    def _wait_for(self, condition):
+        deadline = time.time() + 5
+
+        while not condition():
+            if time.time() > deadline:
+                self.fail('timed out')
+
+            time.sleep(0.01)
+
+    def test_stop_cancels_waiting_commands(self):
+        bus = SimulatedBus()
+        bus.start()
+        network = Network(None, None, ack_commands=True, sock=bus.sock)
+
+        # nothing answers, the second one waits behind the first
+        first = network.writer.submit(_command(0x0101))
+        second = network.writer.submit(_command(0x0101))
+        self._wait_for(lambda: bus.received)
+        network.stop()
+        time.sleep(0.1)
+        bus.stop()
+
+        self.assertTrue(first.cancelled())
+        self.assertTrue(second.cancelled())
+        self.assertEqual(bus.received, 1)
+
+    def test_gap_framing(self):
+        bus = SimulatedBus([Thermostat(0x01)])
+        bus.start()
+        network = Network(
+            None,
+            None,
+            checksum_framing=False,
+            sock=bus.sock
+        )
+        packet = GetStatusRequest()
+        packet.destination = 0x01
+        packet.subnet = 0x01
+
+        try:
+            # one after the other, identical requests in flight share one
+            responses = [
+                network.request(
+                    packet,
+                    GetStatusResponse.message_type
+                ).result(5)
+                for _ in range(3)
+            ]
+        finally:
+            network.stop()
+            bus.stop()
+
+        self.assertEqual([r.source for r in responses], [0x01] * 3)
+        self.assertEqual(network.rs485.dropped, 0)
+
+    def test_reconnect_drops_the_partial_frame(self):
+        payload = bytearray(range(1, 9))
+        frame = _status_response(payload)
+        # the connection is lost halfway through the first frame
+        bridge = _Bridge([frame[:6], frame])
+        network = Network(*bridge.address)
+
+        try:
+            self._wait_for(
+                lambda: network.snapshots.peek((0x01, 0x01, STATUS))
+            )
+        finally:
+            network.stop()
+            bridge.stop()
+
+        self.assertEqual(network.reconnects, 1)
+        self.assertEqual(
+            network.snapshots.peek((0x01, 0x01, STATUS)),
+            GetStatusResponse(frame).payload_data
+        )
+        self.assertEqual(network.rs485.skipped, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
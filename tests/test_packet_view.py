@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import unittest
+
+from climatetalk.checksum import fletcher
+from climatetalk.packet import Packet, PACKET_TYPES
+from climatetalk.packet_view import PacketView, VIEW_TYPES, iter_packets
+
+HEADER = ('destination', 'source', 'subnet', 'send_method', 'send_parameters',
+          'source_node_type', 'message_type', 'packet_number',
+          'packet_length', 'packet_payload')
+
+
+def _frame(message_type, length=40):
+    frame = bytearray((0x01, 0x02, 0x01, 0x00, 0x12, 0x34, 0x01))
+    frame.append(message_type)
+    frame.append(0x05)
+    frame.append(length)
+    frame.extend((index * 7 + 3) & 0xFF for index in range(length))
+    frame.extend(fletcher(frame, 0, len(frame)))
+    return frame
+
+
+def _normalize(value):
+    if isinstance(value, (memoryview, bytearray)):
+        return bytes(value)
+
+    return value
+
+
+def _read(obj, name):
+    try:
+        return _normalize(getattr(obj, name))
+    except Exception as err:  # NOQA
+        return type(err)
+
+
+class PacketViewTest(unittest.TestCase):
+
+    def test_views_read_like_packets(self):
+        for message_type, view_class in VIEW_TYPES.items():
+            frame = _frame(message_type)
+            packet = PACKET_TYPES[message_type](bytearray(frame))
+            view = PacketView(frame)
+
+            self.assertIsInstance(view, view_class)
+
+            names = set(HEADER)
+            names.update(
+                name for name in view_class.__dict__
+                if hasattr(view_class.__dict__[name], '__get__') and
+                not name.startswith('_') and
+                not callable(getattr(view, name, None))
+            )
+
+            for name in sorted(names):
+                self.assertEqual(
+                    _read(view, name),
+                    _read(packet, name),
+                    '{0}.{1}'.format(view_class.__name__, name)
+                )
+
+    def test_to_packet_owns_its_data(self):
+        message_type = next(iter(VIEW_TYPES))
+        frame = _frame(message_type)
+        packet = PacketView(frame).to_packet()
+        frame[10] ^= 0xFF
+
+        self.assertIsInstance(packet, Packet)
+        self.assertEqual(packet, _frame(message_type))
+
+    def test_iter_packets(self):
+        message_types = list(VIEW_TYPES)[:3]
+        data = bytearray((0xFF, 0x00))
+
+        for message_type in message_types:
+            data.extend(_frame(message_type, 4))
+
+        self.assertEqual(
+            [view.message_type for view in iter_packets(data)],
+            [PacketView(_frame(mt, 4)).message_type for mt in message_types]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import datetime
+import time
+import unittest
+
+from climatetalk import timers
+from climatetalk.commands import HeatDemand
+from climatetalk.mdi.thermostat import ThermostatMDI
+from climatetalk.network import Network
+from climatetalk.simulator import SimulatedBus, Thermostat
+
+# address nothing on the bus answers to
+MISSING = 0x09
+
+
+class PollerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = timers.VirtualClock()
+        self.previous = timers.set_clock(self.clock)
+        self.bus = SimulatedBus([Thermostat(0x01)])
+        self.bus.start()
+        # the whole bus, the polls are only spaced by their air time
+        self.network = Network(
+            None,
+            None,
+            poll_budget=1.0,
+            sock=self.bus.sock
+        )
+        self.poller = self.network.poller
+
+    def tearDown(self):
+        self.network.stop()
+        self.bus.stop()
+        timers.set_clock(self.previous)
+
+    def _add(self, address, **kwargs):
+        mdi = ThermostatMDI(self.network, address, 0x01, None, None)
+        return self.poller.add(mdi, **kwargs)
+
+    def _advance(self, seconds):
+        # the bus answers on real time
+        for _ in range(int(seconds * 100)):
+            self.clock.advance(0.01)
+            time.sleep(0.002)
+
+    def test_missing_node_does_not_hold_up_the_others(self):
+        missing = self._add(MISSING)
+        target = self._add(0x01)
+
+        # a poll of the missing node takes 6 seconds to time out, the
+        # other node is due again 4 seconds after its first poll
+        self._advance(5.5)
+
+        self.assertTrue(missing.polling)
+        self.assertEqual(target.polls, 2)
+
+    def test_idle_node_backs_off(self):
+        target = self._add(0x01, min_interval=2, max_interval=8)
+        self._advance(20)
+
+        self.assertEqual(target.interval, 8)
+        self.assertLess(target.polls, 6)
+
+    def test_demand_polls_at_the_fastest_rate(self):
+        target = self._add(0x01, min_interval=2, max_interval=8)
+        self._advance(20)
+
+        packet = HeatDemand()
+        packet.destination = 0x01
+        packet.subnet = 0x01
+        packet.set_command_data(datetime.time(minute=1), 50)
+        self.network.send(packet)
+
+        polls = target.polls
+        self._advance(10)
+
+        self.assertTrue(target.active)
+        self.assertEqual(target.interval, 2)
+        self.assertGreaterEqual(target.polls - polls, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
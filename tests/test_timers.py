@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import unittest
+
+from climatetalk import timers
+
+
+class TimingWheelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = timers.VirtualClock()
+        self.previous = timers.set_clock(self.clock)
+        self.wheel = timers.TimingWheel()
+        self.wheel.start()
+        self.fired = []
+
+    def tearDown(self):
+        self.wheel.stop()
+        timers.set_clock(self.previous)
+
+    def _fire(self, name):
+        self.fired.append((name, timers.micros() / 1e6))
+
+    def test_fires_on_time(self):
+        # the first level covers 2.56 seconds and the second 163.84, the
+        # later timers start out on the upper levels
+        for delay in (0.05, 3.0, 200.0):
+            self.wheel.schedule(delay, self._fire, delay)
+
+        self.clock.advance(250, 0.01)
+
+        self.assertEqual([name for name, _ in self.fired], [0.05, 3.0, 200.0])
+
+        for delay, fired in self.fired:
+            # up to one tick late
+            self.assertGreaterEqual(fired, delay - 1e-6)
+            self.assertLess(fired, delay + self.wheel.tick + 1e-6)
+
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_cancel(self):
+        timer = self.wheel.schedule(1.0, self._fire, 'cancelled')
+        self.wheel.schedule(2.0, self._fire, 'kept')
+        timer.cancel()
+
+        self.clock.advance(3, 0.01)
+
+        self.assertEqual([name for name, _ in self.fired], ['kept'])
+
+    def test_schedule_after_an_idle_spell(self):
+        self.clock.advance(1000, 1)
+        self.wheel.schedule(0.5, self._fire, 'late')
+        self.clock.advance(0.4, 0.01)
+
+        self.assertEqual(self.fired, [])
+
+        self.clock.advance(0.2, 0.01)
+
+        self.assertEqual([name for name, _ in self.fired], ['late'])
+
+    def test_failing_callback_does_not_stop_the_wheel(self):
+        def fail():
+            raise RuntimeError('failed')
+
+        self.wheel.schedule(0.1, fail)
+        self.wheel.schedule(0.2, self._fire, 'after')
+        self.clock.advance(1, 0.01)
+
+        self.assertEqual([name for name, _ in self.fired], ['after'])
+
+
+if __name__ == '__main__':
+    unittest.main()
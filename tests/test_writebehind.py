@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# Copyright 2020 Kevin Schlosser
+
+import unittest
+from concurrent.futures import Future
+
+from climatetalk.correlator import Correlator
+from climatetalk.message_types import SET_CONTROL_COMMAND_RESPONSE
+from climatetalk.packet import (
+    SetControlCommandRequest,
+    SetControlCommandResponse
+)
+from climatetalk.protocol import ACK1, NAK2
+from climatetalk.writebehind import WriteBehind, CommandRejected
+
+
+def _command(code, value=0, address=0x01):
+    packet = SetControlCommandRequest()
+    packet.destination = address
+    packet.subnet = 0x01
+    packet.payload_command_code = code
+    packet.extend(bytearray((0, value, 0, 0)))
+    return packet
+
+
+def _response(code, response_code, address=0x01):
+    packet = SetControlCommandResponse()
+    packet.source = address
+    packet.subnet = 0x01
+    packet.payload_command_code = code
+    packet.payload_response_code = response_code
+    packet.extend(bytearray(2))
+    return packet
+
+
+class _Transport(object):
+    # stands in for Network.send and Network.request, the futures are
+    # completed by the test
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, packet, priority=None):
+        future = Future()
+        self.sent.append((packet, None, future))
+        return future
+
+    def request(self, packet, response_type, db_id=None, priority=None):
+        future = Future()
+        self.sent.append((packet, db_id, future))
+        return future
+
+
+class WriteBehindTest(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = _Transport()
+
+    def test_only_the_latest_value_is_sent(self):
+        writer = WriteBehind(self.transport.send, self.transport.request)
+        first = writer.submit(_command(0x0101, 1))
+        second = writer.submit(_command(0x0101, 2))
+        third = writer.submit(_command(0x0101, 3))
+
+        self.assertEqual(len(self.transport.sent), 1)
+
+        self.transport.sent[0][2].set_result(None)
+        self.assertTrue(first.done())
+        self.assertEqual(len(self.transport.sent), 2)
+        self.assertEqual(self.transport.sent[1][0][13], 3)
+        self.assertEqual(writer.superseded, 1)
+
+        self.transport.sent[1][2].set_result('sent')
+        self.assertEqual(second.result(0), 'sent')
+        self.assertEqual(third.result(0), 'sent')
+
+    def test_commands_with_other_codes_are_not_held_back(self):
+        writer = WriteBehind(self.transport.send, self.transport.request)
+        writer.submit(_command(0x0101))
+        writer.submit(_command(0x0102))
+
+        self.assertEqual(len(self.transport.sent), 2)
+
+    def test_ack_completes_the_command(self):
+        writer = WriteBehind(self.transport.send, self.transport.request, True)
+        future = writer.submit(_command(0x0101))
+        packet, db_id, response = self.transport.sent[0]
+
+        self.assertEqual(db_id, 0x0101)
+
+        response.set_result(_response(0x0101, ACK1))
+        self.assertEqual(future.result(0).payload_response_code, ACK1)
+
+    def test_nak_fails_the_command(self):
+        writer = WriteBehind(self.transport.send, self.transport.request, True)
+        future = writer.submit(_command(0x0101))
+        self.transport.sent[0][2].set_result(_response(0x0101, NAK2))
+
+        self.assertRaises(CommandRejected, future.result, 0)
+        self.assertEqual(future.exception().code, NAK2)
+
+
+class CommandCorrelationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.transport = _Transport()
+        self.correlator = Correlator(self.transport.send)
+
+    def tearDown(self):
+        self.correlator.stop()
+
+    def test_acks_are_matched_on_the_command_code(self):
+        first = self.correlator.request(
+            _command(0x0101),
+            SET_CONTROL_COMMAND_RESPONSE,
+            0x0101
+        )
+        second = self.correlator.request(
+            _command(0x0102),
+            SET_CONTROL_COMMAND_RESPONSE,
+            0x0102
+        )
+
+        self.correlator.dispatch(_response(0x0102, ACK1))
+
+        self.assertFalse(first.done())
+        self.assertEqual(second.result(0).payload_command_code, 0x0102)
+
+
+if __name__ == '__main__':
+    unittest.main()